@@ -0,0 +1,217 @@
+import time
+import threading
+import numpy as np
+import soundfile as sf
+
+class SimulatedCallbackFlags:
+    def __init__(self, output_underflow: bool = False):
+        """ Equivalente ao sd.CallbackFlags para os backends simulados (só as flags de saída). """
+        self.output_underflow = output_underflow
+        self.output_overflow = False
+        self.priming_output = False
+
+    def __bool__(self):
+        return self.output_underflow or self.output_overflow or self.priming_output
+
+class SimulatedTimeInfo:
+    def __init__(self):
+        """ Equivalente ao 'time' do callback do PortAudio, no relógio simulado do backend. """
+        self.currentTime = 0.0
+        self.outputBufferDacTime = 0.0
+        self.inputBufferAdcTime = 0.0
+
+class NullSinkBackend:
+    def __init__(self,
+                 sample_rate: int,
+                 channels: int,
+                 blocksize: int,
+                 callback,
+                 realtime: bool = True,
+                 duration_seconds: float = None):
+        """
+        Dispositivo de saída simulado: chama o callback com a mesma assinatura do
+        sd.OutputStream (outdata, frames, time_info, status) e descarta o áudio.
+
+        O relógio é simulado: com 'realtime' os blocos são pedidos no ritmo da
+        taxa de amostragem (e um atraso maior que um bloco é informado ao
+        callback como output_underflow, como faria o PortAudio); sem 'realtime'
+        os blocos são pedidos o mais rápido possível.
+
+        Args:
+            sample_rate (int): Taxa de amostragem simulada.
+            channels (int): Canais de saída.
+            blocksize (int): Frames por chamada do callback.
+            callback (callable): Mesmo callback usado com o sd.OutputStream.
+            realtime (bool): Ritmo de tempo real (True) ou livre (False).
+            duration_seconds (float, optional): Para sozinho depois desse tempo simulado.
+        """
+        if sample_rate <= 0 or blocksize <= 0:
+            raise ValueError("A taxa de amostragem e o tamanho do bloco devem ser positivos.")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.realtime = realtime
+        self.duration_seconds = duration_seconds
+        self.latency = blocksize / sample_rate
+
+        self.frames_played = 0
+        self.late_blocks = 0 # Blocos entregues com mais de um bloco de atraso (só em tempo real)
+
+        # Buffers e objetos do callback alocados uma vez
+        self._outdata = np.zeros((blocksize, channels), dtype=np.float32)
+        self._time_info = SimulatedTimeInfo()
+        self._status_ok = SimulatedCallbackFlags()
+        self._status_underflow = SimulatedCallbackFlags(output_underflow=True)
+
+        self._running = False
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._running
+
+    @property
+    def time(self):
+        """ Tempo do relógio simulado, em segundos. """
+        return self.frames_played / self.sample_rate
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._open_sink()
+        self._thread = threading.Thread(target=self._clock_loop, name="SimulatedAudioDevice", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+        self._close_sink()
+
+    def close(self):
+        self.stop()
+
+    def wait(self, timeout = None):
+        """ Espera o backend parar sozinho (com 'duration_seconds'). """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self._running
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open_sink(self):
+        pass
+
+    def _close_sink(self):
+        pass
+
+    def _write_sink(self, outdata):
+        pass
+
+    def _clock_loop(self):
+        block_duration = self.blocksize / self.sample_rate
+        end_frame = int(self.duration_seconds * self.sample_rate) if self.duration_seconds is not None else None
+        start_time = time.perf_counter()
+        status = self._status_ok
+
+        while self._running:
+            if end_frame is not None and self.frames_played >= end_frame:
+                break
+
+            stream_time = self.frames_played / self.sample_rate
+            self._time_info.currentTime = stream_time
+            self._time_info.outputBufferDacTime = stream_time + self.latency
+
+            self.callback(self._outdata, self.blocksize, self._time_info, status)
+            self._write_sink(self._outdata)
+            self.frames_played += self.blocksize
+
+            status = self._status_ok
+            if self.realtime:
+                # Próximo pedido do "dispositivo": o fim do bloco que acabou de ser entregue
+                delay = start_time + self.frames_played / self.sample_rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > block_duration:
+                    # O dispositivo teria ficado sem áudio: avisa o callback e retoma o relógio
+                    self.late_blocks += 1
+                    status = self._status_underflow
+                    start_time -= delay
+
+        self._running = False
+
+class WavFileSinkBackend(NullSinkBackend):
+    def __init__(self,
+                 output_path,
+                 sample_rate: int,
+                 channels: int,
+                 blocksize: int,
+                 callback,
+                 realtime: bool = False,
+                 duration_seconds: float = None,
+                 subtype: str = 'FLOAT'):
+        """
+        Como o NullSinkBackend, mas grava em WAV tudo o que o callback entregou.
+
+        Args:
+            output_path (str): Arquivo WAV de saída.
+            subtype (str): Subtipo do WAV ('FLOAT', 'PCM_24', 'PCM_16').
+            (demais argumentos como no NullSinkBackend; por padrão sem ritmo de tempo real)
+        """
+        super().__init__(sample_rate, channels, blocksize, callback, realtime, duration_seconds)
+        self.output_path = output_path
+        self.subtype = subtype
+        self._sink_file = None
+
+    def _open_sink(self):
+        self._sink_file = sf.SoundFile(self.output_path, 'w', samplerate=self.sample_rate,
+                                       channels=self.channels, subtype=self.subtype, format='WAV')
+
+    def _close_sink(self):
+        if self._sink_file is not None:
+            self._sink_file.close()
+            self._sink_file = None
+
+    def _write_sink(self, outdata):
+        self._sink_file.write(outdata)
+
+def create_output_backend(kind, sample_rate, channels, blocksize, callback, latency = None, **options):
+    """
+    Cria o backend de saída.
+
+    Args:
+        kind (str): 'sounddevice' (placa de som), 'null' (descarta) ou 'wav' (grava em options['output_path']).
+        sample_rate, channels, blocksize, callback: Como no sd.OutputStream.
+        latency: 'latency' do sd.OutputStream (ignorado pelos backends simulados).
+        **options: realtime, duration_seconds, output_path, subtype.
+    """
+    if kind == 'sounddevice':
+        # Import local: os backends simulados funcionam sem PortAudio instalado
+        import sounddevice as sd
+        return sd.OutputStream(samplerate=sample_rate,
+                               channels=channels,
+                               callback=callback,
+                               dtype='float32',
+                               blocksize=blocksize,
+                               latency=latency)
+    if kind == 'null':
+        return NullSinkBackend(sample_rate, channels, blocksize, callback,
+                               realtime=options.get('realtime', True),
+                               duration_seconds=options.get('duration_seconds'))
+    if kind == 'wav':
+        return WavFileSinkBackend(options['output_path'], sample_rate, channels, blocksize, callback,
+                                  realtime=options.get('realtime', False),
+                                  duration_seconds=options.get('duration_seconds'),
+                                  subtype=options.get('subtype', 'FLOAT'))
+
+    raise ValueError(f"Backend de áudio desconhecido: '{kind}'.")
@@ -1,6 +1,338 @@
 import soundfile as sf
 import numpy as np
 import os
+import threading
+
+from peak_pyramid_module import PeakPyramid
+
+class StreamingAudioData:
+    def __init__(self,
+                 filepath,
+                 window_seconds: float = 20.0,
+                 history_seconds: float = 4.0,
+                 read_block_frames: int = 65536,
+                 dtype = 'float32'):
+        """
+        Áudio lido sob demanda de um arquivo, com memória constante.
+
+        Mantém em memória apenas uma janela deslizante de frames decodificados
+        em torno da posição de leitura. Uma thread leitora usa os blocos com
+        seek do soundfile.SoundFile para manter a janela preenchida à frente.
+        Imita o suficiente de um np.ndarray (len, shape, ndim, dtype e
+        fatiamento) para ser usado no lugar de 'audio_data'.
+
+        Args:
+            filepath (str): Caminho do arquivo de áudio.
+            window_seconds (float): Tamanho da janela em memória (segundos).
+            history_seconds (float): Quanto da janela é mantido atrás da posição de leitura (ex.: para a waveform).
+            read_block_frames (int): Frames lidos do arquivo por vez pela thread leitora.
+            dtype (str): Tipo dos dados decodificados.
+        """
+        self.filepath = filepath
+        self._file = sf.SoundFile(filepath)
+
+        # Informações do cabeçalho, sem ler as amostras
+        self.sample_rate = self._file.samplerate
+        self.num_channels = self._file.channels
+        self.num_frames = self._file.frames
+
+        self.dtype = np.dtype(dtype)
+        self.ndim = 2 # Sempre (frames, channels), também para mono
+        self.shape = (self.num_frames, self.num_channels)
+
+        self.window_frames = max(int(window_seconds * self.sample_rate), 2 * read_block_frames)
+        self.history_frames = min(int(history_seconds * self.sample_rate), self.window_frames // 2)
+        self.read_block_frames = read_block_frames
+
+        # Janela circular: o frame f do arquivo fica em window[f % window_frames]
+        # enquanto window_start <= f < window_end.
+        self.window = np.zeros((self.window_frames, self.num_channels), dtype=self.dtype)
+        self.nbytes = self.window.nbytes
+        self.window_start = 0
+        self.window_end = 0
+        self.consumer_position = 0 # Fim da última fatia lida
+
+        self.miss_count = 0 # Leituras fora da janela (leitura síncrona do arquivo)
+
+        # Picos da waveform: construídos em segundo plano por build_peak_pyramid_async();
+        # até lá, get_peaks() calcula o min/max direto da janela pedida
+        self.peak_pyramid = None
+        self._window_peaks = WindowPeaks(self, self.sample_rate)
+        self._peak_thread = None
+
+        self._file_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        self._reader_thread = threading.Thread(target=self._reader_loop, name="StreamingAudioReader", daemon=True)
+        self._reader_thread.start()
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.num_frames)
+            if step != 1:
+                raise ValueError("StreamingAudioData só suporta fatias contíguas.")
+            frames = self._read_frames(start, max(stop - start, 0), advance=True)
+            return frames
+
+        # Índice inteiro: um único frame, sem mover a janela
+        index = int(key)
+        if index < 0:
+            index += self.num_frames
+        return self._read_frames(index, 1, advance=False)[0]
+
+    def peek(self, start, frames):
+        """ Lê frames sem mover a janela deslizante (leituras fora da reprodução, ex.: waveform). """
+        return self._read_frames(start, frames, advance=False)
+
+    def _read_frames(self, start, frames, advance):
+        if self.window_start <= start and start + frames <= self.window_end:
+            first_index = start % self.window_frames
+            if first_index + frames <= self.window_frames:
+                data = self.window[first_index : first_index + frames]
+            else:
+                # A fatia dá a volta na janela circular
+                data = np.concatenate((self.window[first_index:], self.window[: first_index + frames - self.window_frames]))
+        else:
+            data = self._read_from_file(start, frames, reanchor=advance)
+
+        if advance:
+            self.consumer_position = start + frames
+            self._wake.set()
+        return data
+
+    def _read_from_file(self, start, frames, reanchor):
+        """ Leitura síncrona quando a fatia não está na janela (seek, loop da música). """
+        self.miss_count += 1
+        with self._file_lock:
+            self._file.seek(start)
+            data = self._file.read(frames, dtype=self.dtype.name, always_2d=True)
+
+            if reanchor:
+                # Reposiciona a janela logo após a fatia lida; a leitora volta a preencher dali
+                self.window_start = self.window_end = start + len(data)
+        return data
+
+    def _reader_loop(self):
+        while self._running:
+            with self._file_lock:
+                read_frames = self._fill_next_block()
+
+            if read_frames == 0:
+                # Janela cheia (ou fim do arquivo): espera o consumidor avançar
+                self._wake.wait(timeout=0.1)
+                self._wake.clear()
+
+    def _fill_next_block(self):
+        window_end = self.window_end
+        frames = min(self.read_block_frames, self.num_frames - window_end)
+
+        # Só sobrescreve frames que já ficaram mais para trás que o histórico mantido
+        oldest_needed = self.consumer_position - self.history_frames
+        frames = min(frames, oldest_needed + self.window_frames - window_end)
+        if frames <= 0:
+            return 0
+
+        # Não atravessa o fim da janela circular em uma única leitura
+        first_index = window_end % self.window_frames
+        frames = min(frames, self.window_frames - first_index)
+
+        self._file.seek(window_end)
+        read_frames = self._file.read(frames, dtype=self.dtype.name, always_2d=True,
+                                      out=self.window[first_index : first_index + frames])
+        read_frames = len(read_frames)
+
+        self.window_start = max(self.window_start, window_end + read_frames - self.window_frames)
+        self.window_end = window_end + read_frames
+        return read_frames
+
+    def build_peak_pyramid_async(self):
+        """ Constrói a PeakPyramid da faixa em uma thread própria, com leitura separada do arquivo. """
+        self._peak_thread = threading.Thread(target=self._build_peak_pyramid, name="PeakPyramidBuilder", daemon=True)
+        self._peak_thread.start()
+
+    def _build_peak_pyramid(self):
+        try:
+            self.peak_pyramid = PeakPyramid.from_file(self.filepath)
+        except Exception as e:
+            print(f"Erro ao calcular os picos da waveform: {e}")
+
+    def get_peaks(self):
+        """ Retorna a PeakPyramid, se já pronta, ou os picos calculados da janela pedida (mesma interface). """
+        peak_pyramid = self.peak_pyramid
+        return peak_pyramid if peak_pyramid is not None else self._window_peaks
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        self._reader_thread.join(timeout=1.0)
+        with self._file_lock:
+            self._file.close()
+
+class CompactAudioData:
+    # Escalas para converter o PCM inteiro em float32 (-1.0 a 1.0)
+    INT16_SCALE = 1.0 / 32768.0
+    INT24_SCALE = 1.0 / 2147483648.0 # O int24 é desempacotado nos 3 bytes altos de um int32
+
+    def __init__(self, pcm, storage, sample_rate):
+        """
+        Áudio guardado em memória no PCM inteiro nativo, mais um fator de escala.
+
+        A conversão para float32 é feita bloco a bloco na leitura (read_into ou
+        fatiamento), então a faixa inteira nunca existe em float32 na memória.
+        Imita o suficiente de um np.ndarray (len, shape, ndim, dtype e
+        fatiamento) para ser usado no lugar de 'audio_data'.
+
+        Args:
+            pcm (np.ndarray): int16 (frames, channels) ou, para int24, uint8 (frames, channels, 3).
+            storage (str): 'int16' ou 'int24'.
+            sample_rate (int): Taxa de amostragem do áudio.
+        """
+        if storage not in ('int16', 'int24'):
+            raise ValueError(f"Armazenamento compacto não suportado: '{storage}'")
+
+        self.pcm = pcm
+        self.storage = storage
+        self.sample_rate = sample_rate
+        self.scale = np.float32(self.INT16_SCALE if storage == 'int16' else self.INT24_SCALE)
+
+        self.num_channels = pcm.shape[1]
+        self.dtype = np.dtype(np.float32) # Tipo entregue na leitura
+        self.ndim = 2
+        self.shape = (pcm.shape[0], self.num_channels)
+        self.nbytes = pcm.nbytes
+
+        # Buffer de desempacotamento do int24, reaproveitado entre blocos
+        self._unpack_buffer = np.zeros(0, dtype=np.int32)
+
+    @classmethod
+    def from_file(cls, filepath, storage = 'int16', read_block_frames: int = 65536):
+        """ Lê um arquivo direto para o armazenamento compacto, sem passar por um array float32 inteiro. """
+        if storage == 'int16':
+            pcm, sample_rate = sf.read(filepath, dtype='int16', always_2d=True)
+            return cls(pcm, storage, sample_rate)
+
+        info = sf.info(filepath)
+        pcm = np.empty((info.frames, info.channels, 3), dtype=np.uint8)
+        position = 0
+
+        # Lê em blocos de int32 e guarda só os 3 bytes mais significativos (little-endian)
+        for block in sf.blocks(filepath, blocksize=read_block_frames, dtype='int32', always_2d=True):
+            block_bytes = block.view(np.uint8).reshape(len(block), info.channels, 4)
+            pcm[position : position + len(block)] = block_bytes[:, :, 1:]
+            position += len(block)
+
+        return cls(pcm[:position], storage, info.samplerate)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CompactAudioData só suporta fatias contíguas.")
+            return self._convert_range(start, max(stop - start, 0))
+
+        index = int(key)
+        if index < 0:
+            index += len(self)
+        return self._convert_range(index, 1)[0]
+
+    def _convert_range(self, start, frames):
+        out = np.empty((frames, self.num_channels), dtype=np.float32)
+        unpack_buffer = np.empty(out.shape, dtype=np.int32) if self.storage == 'int24' else None
+        self._convert_into(self.pcm[start : start + frames], out, unpack_buffer)
+        return out
+
+    def read_into(self, start, out):
+        """
+        Converte len(out) frames a partir de 'start' para float32 direto em 'out',
+        sem alocar (depois que o buffer de desempacotamento atingir o tamanho do bloco).
+
+        Args:
+            start (int): Primeiro frame a ler.
+            out (np.ndarray): Destino float32 (frames, channels).
+        """
+        frames = len(out)
+        pcm_block = self.pcm[start : start + frames]
+        if self.storage == 'int16':
+            self._convert_into(pcm_block, out, None)
+            return
+
+        if self._unpack_buffer.size < frames * self.num_channels:
+            self._unpack_buffer = np.zeros(frames * self.num_channels, dtype=np.int32)
+
+        unpack_buffer = self._unpack_buffer[: frames * self.num_channels].reshape(frames, self.num_channels)
+        self._convert_into(pcm_block, out, unpack_buffer)
+
+    def _convert_into(self, pcm_block, out, unpack_buffer):
+        # Conversão de tipo e escala em passos separados: multiplicar inteiro por float
+        # direto em 'out' faria o NumPy alocar um buffer de conversão a cada bloco.
+        # As escalas são potências de 2, então o resultado é idêntico.
+        if self.storage == 'int16':
+            np.copyto(out, pcm_block)
+            out *= self.scale
+            return
+
+        unpack_bytes = unpack_buffer.view(np.uint8).reshape(len(pcm_block), self.num_channels, 4)
+        unpack_bytes[:, :, 0] = 0
+        unpack_bytes[:, :, 1:] = pcm_block
+        np.copyto(out, unpack_buffer)
+        out *= self.scale
+
+def read_audio_window(audio_data, start, frames):
+    """
+    Lê 'frames' frames em float32 a partir de 'start', voltando ao início no fim
+    da faixa, em no máximo duas fatias contíguas. Aceita np.ndarray,
+    CompactAudioData (converte só a janela) e StreamingAudioData (não move a janela).
+
+    Returns:
+        np.ndarray: (frames,) para mono 1D ou (frames, channels).
+    """
+    total_frames = len(audio_data)
+    window_shape = (frames, audio_data.shape[1]) if audio_data.ndim > 1 else (frames,)
+    window = np.zeros(window_shape, dtype=np.float32)
+
+    filled = 0
+    while filled < frames:
+        position = (start + filled) % total_frames
+        frames_to_copy = min(frames - filled, total_frames - position)
+        if isinstance(audio_data, StreamingAudioData):
+            window[filled : filled + frames_to_copy] = audio_data.peek(position, frames_to_copy)
+        else:
+            window[filled : filled + frames_to_copy] = audio_data[position : position + frames_to_copy]
+        filled += frames_to_copy
+
+    return window
+
+class WindowPeaks:
+    def __init__(self, audio_data, sample_rate):
+        """
+        Picos da waveform calculados na hora, a partir das amostras da janela pedida.
+
+        Tem a interface de consulta da PeakPyramid (get_bins e sample_rate) e
+        serve enquanto a pirâmide de uma faixa em streaming ainda está sendo
+        construída. O custo cresce com a janela, não com a largura em pixels.
+
+        Args:
+            audio_data: Áudio da faixa (qualquer tipo aceito por read_audio_window).
+            sample_rate (int): Taxa de amostragem da faixa.
+        """
+        self.audio_data = audio_data
+        self.sample_rate = sample_rate
+
+    def get_bins(self, start_frame, frames, num_bins):
+        """ Retorna (mínimos, máximos) float32 de 'num_bins' colunas cobrindo 'frames' frames a partir de 'start_frame'. """
+        if num_bins <= 0 or frames <= 0 or len(self.audio_data) == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        window = read_audio_window(self.audio_data, start_frame, max(frames, num_bins))
+        mono = window.mean(axis=1, dtype=np.float32) if window.ndim > 1 else window
+        column_starts = np.arange(num_bins) * len(mono) // num_bins
+        return np.minimum.reduceat(mono, column_starts), np.maximum.reduceat(mono, column_starts)
 
 class AudioControl():
     def __init__(self):
@@ -9,13 +341,83 @@ class AudioControl():
         self.sample_rate = None
         self.num_channels = None
         self.duration_seconds = None
+        self.peak_pyramid = None
 
-    def load_audio(self, filepath, target_dtype='float32'):
+    def load_audio(self, filepath, target_dtype='float32', streaming=False, storage='float32', pcm_cache=None):
+        """
+        Carrega um arquivo de áudio.
+
+        Args:
+            filepath (str): Caminho do arquivo.
+            target_dtype (str): Tipo dos dados decodificados (modos 'float32' e streaming).
+            streaming (bool): Lê o arquivo sob demanda, com memória constante.
+            storage (str): 'float32' (padrão), ou 'int16'/'int24' para guardar o PCM
+                           inteiro e converter para float32 bloco a bloco na leitura.
+                           'auto' escolhe pelo formato do arquivo, sem perder resolução
+                           (PCM de 16 bits -> 'int16', 24 bits -> 'int24', outros -> 'float32').
+            pcm_cache (PcmDiskCache, optional): Cache em disco do PCM decodificado. Se a
+                           faixa estiver nele, é mapeada em memória em vez de decodificada.
+        """
         if not filepath or not os.path.exists(filepath):
             print(f"Erro: Arquivo não encontrado em '{filepath}'")
             self._reset_attributes()
             return False
         
+        if storage == 'auto':
+            storage = self._get_lossless_storage(filepath)
+
+        if streaming:
+            audio_loaded = self._load_audio_streaming(filepath, target_dtype)
+        else:
+            audio_loaded = self._load_audio_stored(filepath, target_dtype, storage, pcm_cache)
+
+        if audio_loaded:
+            self._build_peak_pyramid()
+
+        return audio_loaded
+
+    # Subtipos do libsndfile que cabem sem perda no armazenamento inteiro compacto
+    LOSSLESS_STORAGE = {'PCM_S8': 'int16', 'PCM_U8': 'int16', 'PCM_16': 'int16', 'PCM_24': 'int24'}
+
+    @classmethod
+    def _get_lossless_storage(cls, filepath):
+        try:
+            return cls.LOSSLESS_STORAGE.get(sf.info(filepath).subtype, 'float32')
+        except Exception:
+            return 'float32' # O carregamento normal reporta o erro
+
+    def _load_audio_stored(self, filepath, target_dtype, storage, pcm_cache):
+        cache_storage = storage if storage in ('int16', 'int24') else target_dtype
+        if pcm_cache is not None and self._load_audio_from_pcm_cache(filepath, cache_storage, pcm_cache):
+            return True
+
+        if storage in ('int16', 'int24'):
+            audio_loaded = self._load_audio_compact(filepath, storage)
+        else:
+            audio_loaded = self._load_audio_decoded(filepath, target_dtype)
+
+        if audio_loaded and pcm_cache is not None:
+            pcm = self.audio_data.pcm if isinstance(self.audio_data, CompactAudioData) else self.audio_data
+            pcm_cache.store(filepath, cache_storage, pcm, self.sample_rate)
+
+        return audio_loaded
+
+    def _build_peak_pyramid(self):
+        """ Pré-calcula os picos min/max da faixa para a waveform (uma vez por carregamento). """
+        if isinstance(self.audio_data, StreamingAudioData):
+            # Decodificar o arquivo inteiro aqui travaria o carregamento: a pirâmide fica pronta em
+            # segundo plano e, até lá, AudioEngine.get_peak_pyramid() usa os picos da janela
+            self.peak_pyramid = None
+            self.audio_data.build_peak_pyramid_async()
+            return
+
+        try:
+            self.peak_pyramid = PeakPyramid.from_audio_data(self.audio_data, self.sample_rate)
+        except Exception as e:
+            print(f"Erro ao calcular os picos da waveform: {e}")
+            self.peak_pyramid = None
+
+    def _load_audio_decoded(self, filepath, target_dtype):
         try:
             # Lê arquivo de áudio
             audio_data, sample_rate = sf.read(filepath, dtype = target_dtype)
@@ -57,12 +459,110 @@ class AudioControl():
             self._reset_attributes()
             return False
     
+    def _load_audio_from_pcm_cache(self, filepath, cache_storage, pcm_cache):
+        """
+        Abre o PCM já decodificado do cache em disco, mapeado em memória (np.load com mmap_mode='r').
+        """
+        cached = pcm_cache.load(filepath, cache_storage)
+        if cached is None:
+            return False
+
+        pcm, sample_rate = cached
+        if cache_storage in ('int16', 'int24'):
+            audio_data = CompactAudioData(pcm, cache_storage, sample_rate)
+        else:
+            audio_data = pcm
+
+        self.filepath = filepath
+        self.audio_data = audio_data
+        self.sample_rate = sample_rate
+        self.num_channels = 1 if audio_data.ndim == 1 else audio_data.shape[1]
+        self.duration_seconds = len(audio_data) / sample_rate if sample_rate > 0 else None
+
+        print(f"\n--- Informações do Áudio Carregado (cache em disco, {cache_storage}) ---")
+        print(f"Arquivo: {os.path.basename(self.filepath)}")
+        print(f"Taxa de Amostragem (sample rate): {self.sample_rate} Hz")
+        print(f"Número de Canais {self.num_channels}")
+        print(f"Duração: {self.duration_seconds:.2f} segundos")
+
+        return True
+
+    def _load_audio_streaming(self, filepath, target_dtype):
+        """
+        Abre o arquivo em modo streaming: só o cabeçalho é lido agora e as
+        amostras são decodificadas em uma janela deslizante por uma thread leitora.
+        """
+        try:
+            audio_data = StreamingAudioData(filepath, dtype=target_dtype)
+
+            self.filepath = filepath
+            self.audio_data = audio_data
+            self.sample_rate = audio_data.sample_rate
+            self.num_channels = audio_data.num_channels
+            self.duration_seconds = audio_data.num_frames / audio_data.sample_rate if audio_data.sample_rate > 0 else None
+
+            print(f"\n--- Informações do Áudio Carregado (streaming) ---")
+            print(f"Arquivo: {os.path.basename(self.filepath)}")
+            print(f"Taxa de Amostragem (sample rate): {self.sample_rate} Hz")
+            print(f"Número de Canais {self.num_channels}")
+            print(f"Duração: {self.duration_seconds:.2f} segundos")
+            print(f"Janela em memória: {audio_data.window_frames / audio_data.sample_rate:.1f} segundos ({audio_data.nbytes / (1024 * 1024):.1f} MB)")
+
+            return True
+
+        except sf.LibsndfileError as e:
+            print(f"Erro ao abrir o arquivo de áudio com soundfile: {e}")
+            self._reset_attributes()
+            return False
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado ao abrir o áudio em streaming: {e}")
+            self._reset_attributes()
+            return False
+
+    def _load_audio_compact(self, filepath, storage):
+        """
+        Carrega o áudio guardando o PCM inteiro (int16/int24) e um fator de escala,
+        com cerca de metade (int16) ou 3/4 (int24) da memória do float32.
+        """
+        try:
+            audio_data = CompactAudioData.from_file(filepath, storage)
+
+            self.filepath = filepath
+            self.audio_data = audio_data
+            self.sample_rate = audio_data.sample_rate
+            self.num_channels = audio_data.num_channels
+            self.duration_seconds = len(audio_data) / audio_data.sample_rate if audio_data.sample_rate > 0 else None
+
+            print(f"\n--- Informações do Áudio Carregado ({storage}) ---")
+            print(f"Arquivo: {os.path.basename(self.filepath)}")
+            print(f"Taxa de Amostragem (sample rate): {self.sample_rate} Hz")
+            print(f"Número de Canais {self.num_channels}")
+            print(f"Duração: {self.duration_seconds:.2f} segundos")
+            print(f"Memória das amostras: {audio_data.nbytes / (1024 * 1024):.1f} MB")
+
+            return True
+
+        except sf.LibsndfileError as e:
+            print(f"Erro ao ler o arquivo de áudio com soundfile: {e}")
+            self._reset_attributes()
+            return False
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado ao carregar o áudio ({storage}): {e}")
+            self._reset_attributes()
+            return False
+
+    def close(self):
+        """ Fecha o arquivo e a thread leitora se o áudio foi aberto em modo streaming. """
+        if isinstance(self.audio_data, StreamingAudioData):
+            self.audio_data.close()
+
     def _reset_attributes(self):
         self.filepath = None
         self.audio_data = None
         self.sample_rate = None
         self.num_channels = None
         self.duration_seconds = None
+        self.peak_pyramid = None
 
     def get_info(self):
         '''
@@ -78,5 +578,7 @@ class AudioControl():
             "channels": self.num_channels,
             "duration": self.duration_seconds,
             "dtype": self.audio_data.dtype,
-            "shape": self.audio_data.shape
+            "shape": self.audio_data.shape,
+            "streaming": isinstance(self.audio_data, StreamingAudioData),
+            "storage": self.audio_data.storage if isinstance(self.audio_data, CompactAudioData) else str(self.audio_data.dtype)
         }
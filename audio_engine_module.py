@@ -0,0 +1,537 @@
+import math
+import threading
+import time
+import numpy as np
+
+from resampler_module import PolyphaseResampler
+from audio_metrics_module import AudioMetrics
+
+PARAMETER_HISTORY = 64 # Escritas de parâmetros cuja posição aplicada fica disponível para a automação
+
+class AudioEngine:
+    def __init__(self,
+                 sample_rate: int,
+                 channels: int = 2,
+                 blocksize: int = 1024,
+                 lookahead_blocks: int = 3,
+                 effects_controller = None):
+        """
+        Motor de áudio com renderização antecipada (render-ahead).
+
+        Uma thread produtora lê a faixa, reamostra para a taxa do dispositivo,
+        aplica os efeitos e ajusta os canais de cada bloco, escrevendo o
+        resultado em um ring buffer pré-alocado. O callback do PortAudio apenas
+        copia o próximo bloco pronto para 'outdata', sem alocação, sem efeitos
+        e sem locks.
+
+        Args:
+            sample_rate (int): Taxa de amostragem do stream de saída (taxa nativa do dispositivo).
+            channels (int): Número de canais do stream de saída.
+            blocksize (int): Tamanho do bloco (frames) usado no sd.OutputStream.
+            lookahead_blocks (int): Quantos blocos a produtora renderiza à frente do callback. Cada
+                                    bloco soma blocksize / sample_rate de latência entre um gesto
+                                    e o som (veja lookahead_blocks_for).
+            effects_controller (ReverbControl, optional): Controlador de efeitos aplicado a cada bloco.
+        """
+        if sample_rate <= 0:
+            raise ValueError("A taxa de amostragem (sample_rate) deve ser positiva.")
+        if lookahead_blocks < 2:
+            raise ValueError("O lookahead precisa de pelo menos 2 blocos.")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.lookahead_blocks = lookahead_blocks
+        self.effects_controller = effects_controller
+        self.block_duration = blocksize / sample_rate
+
+        # Ring buffer pré-alocado: um slot por bloco renderizado
+        self.ring = np.zeros((lookahead_blocks, blocksize, channels), dtype=np.float32)
+        # Posição (frame da faixa) do início de cada bloco no ring, para a waveform
+        self.ring_block_frames = np.zeros(lookahead_blocks, dtype=np.int64)
+
+        # Índices monotônicos do ring (SPSC): só a produtora escreve em
+        # _write_index e só o callback escreve em _read_index.
+        self._write_index = 0
+        self._read_index = 0
+        self._read_offset = 0 # Frames já consumidos do bloco atual (callbacks com 'frames' != blocksize)
+
+        # Estado da faixa (acessado apenas pela thread produtora)
+        self.audio_data = None
+        self.peak_pyramid = None # Picos da faixa atual (PeakPyramid), para a waveform
+        self.track_position = 0
+        self._track_block = None
+        self._track_resampler = None # Só existe quando a taxa da faixa difere da do stream
+        self._track_resample_input = None
+        self._pending_track = None
+        self.track_index = 0 # Incrementado a cada troca de faixa aplicada
+        # (frame do stream em que a faixa atual foi aplicada, crossfade da troca), publicados juntos
+        self._track_start = (0, 0.0)
+        self._loading_count = 0
+
+        # Histórico (produtora -> UI) das sequências da caixa de parâmetros que os efeitos
+        # leram pela primeira vez e do frame do stream do bloco que as aplicou
+        self._parameter_sequences = np.zeros(PARAMETER_HISTORY, dtype=np.int64)
+        self._parameter_positions = np.zeros(PARAMETER_HISTORY, dtype=np.int64)
+        self._parameter_count = 0
+        self._last_parameter_sequence = None
+
+        # Estado do crossfade (faixa anterior em fade-out)
+        self._fade_audio_data = None
+        self._fade_position = 0
+        self._fade_block = None
+        self._fade_resampler = None
+        self._fade_resample_input = None
+        self._fade_total_frames = 0
+        self._fade_done_frames = 0
+        self._fade_ramp = np.arange(blocksize, dtype=np.float32)
+        self._fade_in_gain = np.zeros((blocksize, 1), dtype=np.float32)
+        self._fade_out_gain = np.zeros((blocksize, 1), dtype=np.float32)
+
+        self.playback_active = False
+        self.underflow_count = 0 # Callbacks que encontraram o ring vazio
+        self.metrics = AudioMetrics(sample_rate, blocksize)
+        self.analyser = None # SpectrumAnalyser que recebe cada bloco renderizado (opcional)
+
+        self._running = False
+        self._producer_thread = None
+
+    # --- Controle da faixa ---
+    def set_track(self, audio_data, crossfade_seconds: float = 0.0, sample_rate = None, peak_pyramid = None):
+        """
+        Agenda a troca da faixa tocada. A troca é feita pela thread produtora
+        na fronteira do próximo bloco renderizado, sem parar o stream.
+
+        Args:
+            audio_data (np.ndarray): Áudio (samples,) ou (samples, channels).
+            crossfade_seconds (float): Duração do crossfade de potência constante
+                                       entre a faixa atual e a nova (0.0 = troca seca).
+            sample_rate (int, optional): Taxa da faixa. Se diferente da do stream, a faixa é
+                                         reamostrada em streaming (o stream não é reaberto).
+            peak_pyramid (PeakPyramid, optional): Picos pré-calculados da faixa, publicados
+                                                  junto com ela para a waveform.
+        """
+        if audio_data is None or len(audio_data) == 0:
+            print("Erro no AudioEngine: faixa vazia.")
+            return False
+
+        # Publica a faixa e a duração do crossfade juntas em uma única atribuição
+        self._pending_track = (audio_data, max(0.0, crossfade_seconds), sample_rate or self.sample_rate, peak_pyramid)
+        self.playback_active = True
+        return True
+
+    def load_track_async(self, filepath, crossfade_seconds: float = 0.0, on_loaded = None, **load_options):
+        """
+        Decodifica uma faixa em uma thread separada e agenda a troca quando terminar.
+        O stream de saída e o loop da câmera continuam rodando durante a decodificação.
+
+        Args:
+            filepath (str): Caminho do arquivo de áudio.
+            crossfade_seconds (float): Duração do crossfade na troca.
+            on_loaded (callable, optional): Chamado com (filepath, audio_controller) se
+                                            o carregamento der certo, ou (filepath, None) se falhar.
+            **load_options: Repassados para AudioControl.load_audio (ex.: storage, pcm_cache).
+        """
+        loader_thread = threading.Thread(target=self._load_track_worker,
+                                         args=(filepath, crossfade_seconds, on_loaded, load_options),
+                                         name="AudioEngineLoader",
+                                         daemon=True)
+        self._loading_count += 1
+        loader_thread.start()
+        return loader_thread
+
+    def _load_track_worker(self, filepath, crossfade_seconds, on_loaded, load_options):
+        # Import local para evitar dependência circular entre os módulos
+        from audio_control_module import AudioControl
+
+        try:
+            audio_controller = AudioControl()
+            if audio_controller.load_audio(filepath, **load_options):
+                self.set_track(audio_controller.audio_data, crossfade_seconds, audio_controller.sample_rate,
+                               audio_controller.peak_pyramid)
+            else:
+                audio_controller = None
+
+            if on_loaded is not None:
+                on_loaded(filepath, audio_controller)
+        finally:
+            self._loading_count -= 1
+
+    def is_loading(self):
+        """ Retorna True enquanto alguma faixa estiver sendo decodificada em segundo plano. """
+        return self._loading_count > 0
+
+    def is_using_track(self, audio_data):
+        """
+        Retorna True se 'audio_data' ainda pode ser lido pela thread produtora: faixa
+        agendada, faixa atual ou faixa anterior em crossfade. Só depois disso a
+        faixa antiga pode ser fechada (ex.: o leitor de um StreamingAudioData).
+        """
+        pending_track = self._pending_track
+        return (audio_data is self.audio_data or audio_data is self._fade_audio_data
+                or (pending_track is not None and audio_data is pending_track[0]))
+
+    def _apply_pending_track(self):
+        pending_track = self._pending_track
+        if pending_track is None:
+            return
+
+        self._pending_track = None
+        audio_data, crossfade_seconds, track_sample_rate, peak_pyramid = pending_track
+
+        # Com crossfade, a faixa atual continua tocando (em fade-out) a partir da posição atual
+        crossfade_frames = int(crossfade_seconds * self.sample_rate)
+        if crossfade_frames > 0 and self.audio_data is not None:
+            self._fade_audio_data = self.audio_data
+            self._fade_position = self.track_position
+            self._fade_block = self._track_block
+            self._fade_resampler = self._track_resampler
+            self._fade_resample_input = self._track_resample_input
+            self._fade_total_frames = crossfade_frames
+            self._fade_done_frames = 0
+        else:
+            self._fade_audio_data = None
+
+        self.audio_data = audio_data
+        self.peak_pyramid = peak_pyramid
+        self.track_position = 0
+        self.track_index += 1
+        self._track_start = (self._write_index * self.blocksize,
+                             crossfade_seconds if self._fade_audio_data is not None else 0.0)
+
+        # Bloco de leitura no número de canais da faixa, alocado uma vez por faixa
+        track_channels = self._get_track_channels(audio_data)
+        self._track_block = np.zeros((self.blocksize, track_channels), dtype=np.float32)
+
+        if track_sample_rate != self.sample_rate:
+            self._track_resampler = PolyphaseResampler(track_sample_rate, self.sample_rate, track_channels)
+            max_input_frames = self._track_resampler.get_max_input_frames(self.blocksize)
+            self._track_resample_input = np.zeros((max_input_frames, track_channels), dtype=np.float32)
+        else:
+            self._track_resampler = None
+            self._track_resample_input = None
+
+    @staticmethod
+    def _get_track_channels(audio_data):
+        return 1 if audio_data.ndim == 1 else audio_data.shape[1]
+
+    @staticmethod
+    def lookahead_blocks_for(lookahead_ms, sample_rate, blocksize):
+        """ Menor número de blocos (mínimo 2) que cobre 'lookahead_ms' de render-ahead. """
+        return max(2, math.ceil(lookahead_ms * sample_rate / (1000 * blocksize)))
+
+    # --- Thread produtora ---
+    def start(self):
+        """ Inicia a thread produtora e pré-enche o ring buffer. """
+        if self._running:
+            return
+
+        self._running = True
+        self._producer_thread = threading.Thread(target=self._producer_loop, name="AudioEngineProducer", daemon=True)
+        self._producer_thread.start()
+
+    def stop(self):
+        """ Para a thread produtora. """
+        self._running = False
+        if self._producer_thread is not None:
+            self._producer_thread.join(timeout=1.0)
+            self._producer_thread = None
+
+    def _producer_loop(self):
+        # Dorme uma fração do bloco quando o ring está cheio, sem bloquear o callback
+        idle_sleep_s = self.block_duration / 4
+
+        while self._running:
+            if self._write_index - self._read_index >= self.lookahead_blocks:
+                time.sleep(idle_sleep_s)
+                continue
+
+            self._apply_pending_track()
+
+            slot = self._write_index % self.lookahead_blocks
+            render_start = time.perf_counter()
+            self._render_block(self.ring[slot], slot)
+            if self.analyser is not None:
+                self.analyser.push_block(self.ring[slot])
+            self.metrics.record_render(time.perf_counter() - render_start)
+
+            # Publica o bloco somente depois de totalmente escrito
+            self._write_index += 1
+
+    def render_next_block(self, out_block):
+        """
+        Renderiza o próximo bloco de forma síncrona, sem thread produtora e sem
+        callback (bounce/replay offline). Não deve ser usado junto com start().
+
+        Args:
+            out_block (np.ndarray): Destino float32 (blocksize, channels).
+        """
+        self._apply_pending_track()
+        slot = self._write_index % self.lookahead_blocks
+        self._render_block(out_block, slot)
+        if self.analyser is not None:
+            self.analyser.push_block(out_block)
+        self._write_index += 1
+        self._read_index = self._write_index
+
+    def _render_block(self, out_block, slot):
+        if not self.playback_active or self.audio_data is None:
+            out_block[:] = 0
+            self.ring_block_frames[slot] = self.track_position
+            return
+
+        self.ring_block_frames[slot] = self.track_position
+        self.track_position = self._read_track_block(self.audio_data, self.track_position, self._track_block,
+                                                     self._track_resampler, self._track_resample_input)
+
+        if self._fade_audio_data is not None:
+            self._mix_crossfade_block(self._track_block)
+
+        if self.effects_controller is not None:
+            # In-place no bloco da faixa: nenhum buffer novo do lado do motor
+            try:
+                self.effects_controller.process_into(self._track_block, self._track_block)
+            except Exception as e:
+                print(f"Erro no processamento de efeitos: {e}")
+            self._publish_parameter_sequence()
+
+        self._write_channels(self._track_block, out_block)
+
+    def _publish_parameter_sequence(self):
+        """ Registra o frame do stream do bloco que aplicou uma nova escrita de parâmetros. """
+        sequence = self.effects_controller.get_applied_sequence()
+        if sequence == self._last_parameter_sequence:
+            return
+        self._last_parameter_sequence = sequence
+        slot = self._parameter_count % PARAMETER_HISTORY
+        self._parameter_sequences[slot] = sequence
+        self._parameter_positions[slot] = self._write_index * self.blocksize
+        self._parameter_count += 1 # Publica o slot depois de escrito
+
+    def _mix_crossfade_block(self, track_block):
+        """ Mistura a faixa anterior (fade-out) com a nova (fade-in) com ganhos de potência constante. """
+        self._fade_position = self._read_track_block(self._fade_audio_data, self._fade_position, self._fade_block,
+                                                     self._fade_resampler, self._fade_resample_input)
+
+        # Progresso do crossfade por frame (0.0 a 1.0)
+        progress = self._fade_in_gain[:, 0]
+        np.add(self._fade_ramp, self._fade_done_frames, out=progress)
+        progress /= self._fade_total_frames
+        np.clip(progress, 0.0, 1.0, out=progress)
+        progress *= np.pi / 2
+
+        np.cos(progress, out=self._fade_out_gain[:, 0])
+        np.sin(progress, out=self._fade_in_gain[:, 0])
+
+        # Ganhos aplicados in-place, canal a canal: o broadcast (frames, 1) x (frames, canais)
+        # faria o NumPy alocar buffers a cada bloco. O bloco da faixa anterior é reescrito a cada bloco.
+        for channel in range(track_block.shape[1]):
+            track_block[:, channel] *= self._fade_in_gain[:, 0]
+        for channel in range(self._fade_block.shape[1]):
+            self._fade_block[:, channel] *= self._fade_out_gain[:, 0]
+        track_channels = track_block.shape[1]
+        fade_channels = self._fade_block.shape[1]
+        if fade_channels == track_channels or fade_channels == 1:
+            track_block += self._fade_block
+        else:
+            shared_channels = min(fade_channels, track_channels)
+            track_block[:, :shared_channels] += self._fade_block[:, :shared_channels]
+
+        self._fade_done_frames += self.blocksize
+        if self._fade_done_frames >= self._fade_total_frames:
+            # Crossfade concluído: libera a faixa anterior
+            self._fade_audio_data = None
+            self._fade_block = None
+            self._fade_resampler = None
+            self._fade_resample_input = None
+
+    def _read_track_block(self, audio_data, position, track_block, resampler, resample_input):
+        """
+        Lê um bloco da faixa em float32 a partir de 'position' já na taxa do
+        stream (reamostrando se preciso). Retorna a nova posição na faixa.
+        """
+        if resampler is None:
+            return self._read_looped(audio_data, position, track_block)
+
+        input_frames = resampler.get_input_frames_needed(self.blocksize)
+        input_block = resample_input[:input_frames]
+        position = self._read_looped(audio_data, position, input_block)
+        resampler.process_into(input_block, track_block)
+        return position
+
+    @staticmethod
+    def _read_looped(audio_data, position, out):
+        """
+        Lê len(out) frames em float32 a partir de 'position', voltando ao
+        início no fim (loop). Retorna a nova posição.
+        """
+        total_frames = len(audio_data)
+        frames = len(out)
+        filled = 0
+
+        while filled < frames:
+            frames_to_copy = min(frames - filled, total_frames - position)
+
+            if hasattr(audio_data, 'read_into'):
+                # Fontes compactas convertem direto para float32 no bloco de destino
+                audio_data.read_into(position, out[filled : filled + frames_to_copy])
+            else:
+                source = audio_data[position : position + frames_to_copy]
+                if source.ndim == 1:
+                    source = source[:, np.newaxis]
+
+                np.copyto(out[filled : filled + frames_to_copy], source, casting='unsafe')
+
+            filled += frames_to_copy
+            position += frames_to_copy
+            if position >= total_frames:
+                position = 0 # Loop da música
+
+        return position
+
+    def _write_channels(self, processed_block, out_block):
+        """ Ajusta os canais do bloco processado para os canais do stream. """
+        if processed_block.ndim == 1:
+            processed_block = processed_block[:, np.newaxis]
+
+        block_channels = processed_block.shape[1]
+        if block_channels == self.channels:
+            out_block[:] = processed_block
+        elif block_channels == 1:
+            out_block[:] = processed_block # Broadcast mono -> todos os canais
+        elif self.channels == 1:
+            out_block[:, 0] = processed_block[:, 0]
+        else:
+            shared_channels = min(block_channels, self.channels)
+            out_block[:, :shared_channels] = processed_block[:, :shared_channels]
+            out_block[:, shared_channels:] = 0
+
+    # --- Callback do PortAudio ---
+    def callback(self, outdata, frames, time_info, status):
+        """
+        Callback para o sd.OutputStream. Apenas copia blocos já renderizados.
+        Xruns e tempos são registrados em self.metrics (nunca com print aqui dentro).
+        """
+        callback_start = time.perf_counter()
+        if status:
+            self.metrics.record_status(status)
+
+        self._copy_ready_frames(outdata, frames)
+        self.metrics.record_callback(time.perf_counter() - callback_start, frames)
+
+    def _copy_ready_frames(self, outdata, frames):
+        if self._read_offset == 0 and frames == self.blocksize:
+            if self._write_index - self._read_index > 0:
+                outdata[:] = self.ring[self._read_index % self.lookahead_blocks]
+                self._read_index += 1
+            else:
+                outdata[:] = 0
+                self.underflow_count += 1
+            return
+
+        # Caminho genérico: o PortAudio pediu um número de frames diferente do bloco
+        filled = 0
+        while filled < frames:
+            if self._write_index - self._read_index <= 0:
+                outdata[filled:] = 0
+                self.underflow_count += 1
+                return
+
+            slot = self._read_index % self.lookahead_blocks
+            frames_to_copy = min(frames - filled, self.blocksize - self._read_offset)
+            outdata[filled : filled + frames_to_copy] = self.ring[slot, self._read_offset : self._read_offset + frames_to_copy]
+
+            filled += frames_to_copy
+            self._read_offset += frames_to_copy
+            if self._read_offset >= self.blocksize:
+                self._read_offset = 0
+                self._read_index += 1
+
+    # --- Informações ---
+    def get_buffered_blocks(self):
+        """ Retorna quantos blocos renderizados aguardam o callback. """
+        return self._write_index - self._read_index
+
+    def get_fill_level(self):
+        """ Retorna o nível de preenchimento do ring buffer (0.0 a 1.0). """
+        return self.get_buffered_blocks() / self.lookahead_blocks
+
+    def get_render_position(self):
+        """ Retorna o frame do stream em que começa o próximo bloco a ser renderizado (onde um parâmetro escrito agora passa a valer). """
+        return self._write_index * self.blocksize
+
+    def get_track_start(self):
+        """ Retorna (frame do stream em que a faixa atual foi aplicada, crossfade usado na troca em segundos). """
+        return self._track_start
+
+    def get_parameter_position(self, sequence):
+        """
+        Retorna o frame do stream do primeiro bloco que aplicou a escrita de parâmetros com
+        essa sequência (ou uma posterior), ou None se os efeitos ainda não a leram.
+
+        Args:
+            sequence (int): ReverbControl.parameters.get_sequence() logo após a escrita.
+        """
+        count = self._parameter_count
+        position = None
+        for index in range(count - 1, max(count - PARAMETER_HISTORY, 0) - 1, -1):
+            slot = index % PARAMETER_HISTORY
+            if self._parameter_sequences[slot] < sequence:
+                break
+            position = int(self._parameter_positions[slot])
+        return position
+
+    def get_peak_pyramid(self):
+        """
+        Retorna os picos da faixa atual para a waveform. Para faixas em streaming cuja
+        pirâmide ainda está sendo construída, retorna os picos calculados da janela.
+        """
+        audio_data = self.audio_data
+        peak_pyramid = self.peak_pyramid
+        if peak_pyramid is None and hasattr(audio_data, 'get_peaks'):
+            return audio_data.get_peaks()
+        return peak_pyramid
+
+    def get_output_frame(self):
+        """ Retorna quantos frames do stream já foram entregues ao dispositivo (posição tocada na saída). """
+        return self._read_index * self.blocksize + self._read_offset
+
+    def get_playback_frame(self):
+        """ Retorna o frame da faixa que está sendo tocado agora (aproximado ao bloco). """
+        if self._read_offset > 0:
+            slot = self._read_index % self.lookahead_blocks
+        else:
+            slot = (self._read_index - 1) % self.lookahead_blocks # Último bloco entregue ao PortAudio
+        return int(self.ring_block_frames[slot]) + self._read_offset
+
+    def get_info(self):
+        '''
+        Retorna um dicionário com o estado do motor de áudio.
+        '''
+
+        return {
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "blocksize": self.blocksize,
+            "lookahead_blocks": self.lookahead_blocks,
+            "buffered_blocks": self.get_buffered_blocks(),
+            "fill_level": self.get_fill_level(),
+            "underflows": self.underflow_count,
+            "track_index": self.track_index,
+            "crossfading": self._fade_audio_data is not None,
+        }
+
+    def get_metrics(self):
+        '''
+        Retorna as métricas de tempo real: xruns, histogramas de tempo do callback
+        e da renderização, utilização do orçamento e piores tempos por estágio de efeito.
+        Pode ser chamado da thread da interface.
+        '''
+
+        metrics = self.metrics.get_summary()
+        metrics["ring_underflows"] = self.underflow_count
+        if self.effects_controller is not None and hasattr(self.effects_controller, 'get_stage_times'):
+            metrics["effect_stages"] = self.effects_controller.get_stage_times()
+        if self.analyser is not None:
+            metrics["spectrum"] = self.analyser.get_stats()
+        return metrics
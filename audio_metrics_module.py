@@ -0,0 +1,133 @@
+import math
+import numpy as np
+
+class DurationHistogram:
+    def __init__(self, budget_seconds: float, min_us: float = 1.0, num_bins: int = 24):
+        """
+        Histograma de durações em bins logarítmicos (base 2), pré-alocado.
+
+        record() é chamado de uma única thread (callback ou produtora) e só
+        escreve em arrays NumPy já alocados; a thread da interface lê os
+        mesmos arrays com get_summary().
+
+        Args:
+            budget_seconds (float): Orçamento de tempo por chamada (duração de um bloco).
+            min_us (float): Limite superior do primeiro bin, em microssegundos.
+            num_bins (int): Número de bins; o último acumula tudo acima de min_us * 2^(num_bins - 2).
+        """
+        if budget_seconds <= 0:
+            raise ValueError("O orçamento (budget_seconds) deve ser positivo.")
+
+        self.budget_seconds = budget_seconds
+        self.min_us = min_us
+        self.counts = np.zeros(num_bins, dtype=np.int64)
+        # Limite superior (µs) de cada bin: min_us, 2*min_us, 4*min_us, ...
+        self.bin_upper_us = min_us * np.power(2.0, np.arange(num_bins))
+        # [chamadas, soma (s), pior (s), última (s), soma da utilização, pior utilização]
+        self._stats = np.zeros(6, dtype=np.float64)
+
+    def record(self, duration_s, budget_s = None):
+        """
+        Registra uma duração. 'budget_s' substitui o orçamento padrão (ex.: callback com 'frames' diferente do bloco).
+        """
+        duration_us = duration_s * 1e6
+        if duration_us < self.min_us:
+            bin_index = 0
+        else:
+            bin_index = min(int(math.log2(duration_us / self.min_us)) + 1, len(self.counts) - 1)
+        self.counts[bin_index] += 1
+
+        utilisation = duration_s / (budget_s or self.budget_seconds)
+        stats = self._stats
+        stats[0] += 1
+        stats[1] += duration_s
+        stats[3] = duration_s
+        stats[4] += utilisation
+        if duration_s > stats[2]:
+            stats[2] = duration_s
+        if utilisation > stats[5]:
+            stats[5] = utilisation
+
+    def get_percentile_us(self, percentile):
+        """ Retorna o limite superior (µs) do bin que contém o percentil pedido (0 a 100). """
+        counts = self.counts.copy()
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+
+        bin_index = int(np.searchsorted(np.cumsum(counts), total * percentile / 100.0))
+        return float(self.bin_upper_us[min(bin_index, len(counts) - 1)])
+
+    def reset(self):
+        self.counts[:] = 0
+        self._stats[:] = 0
+
+    def get_summary(self):
+        '''
+        Retorna um dicionário com o resumo das durações registradas.
+        '''
+
+        calls, total_s, worst_s, last_s, total_utilisation, worst_utilisation = self._stats.tolist()
+        calls = int(calls)
+        return {
+            "calls": calls,
+            "mean_us": total_s / calls * 1e6 if calls else 0.0,
+            "p99_us": self.get_percentile_us(99),
+            "worst_us": worst_s * 1e6,
+            "last_us": last_s * 1e6,
+            "budget_us": self.budget_seconds * 1e6,
+            "mean_utilisation": total_utilisation / calls if calls else 0.0,
+            "worst_utilisation": worst_utilisation,
+        }
+
+class AudioMetrics:
+    # Índices dos contadores de xrun informados pelo PortAudio em 'status'
+    OUTPUT_UNDERFLOW = 0
+    OUTPUT_OVERFLOW = 1
+    PRIMING_OUTPUT = 2
+    COUNTER_NAMES = ("output_underflows", "output_overflows", "priming_output")
+
+    def __init__(self, sample_rate: int, blocksize: int):
+        """
+        Métricas de tempo real do motor de áudio, sem alocação no caminho do callback.
+
+        Args:
+            sample_rate (int): Taxa de amostragem do stream.
+            blocksize (int): Tamanho do bloco do stream (define o orçamento de tempo).
+        """
+        self.sample_rate = sample_rate
+        self.block_duration = blocksize / sample_rate
+
+        self.counters = np.zeros(len(self.COUNTER_NAMES), dtype=np.int64)
+        self.callback_times = DurationHistogram(self.block_duration) # Tempo dentro do callback do PortAudio
+        self.render_times = DurationHistogram(self.block_duration)   # Tempo para renderizar um bloco na produtora
+
+    def record_status(self, status):
+        """ Conta as flags de xrun do callback (sd.CallbackFlags). Não imprime nada. """
+        if getattr(status, 'output_underflow', False):
+            self.counters[self.OUTPUT_UNDERFLOW] += 1
+        if getattr(status, 'output_overflow', False):
+            self.counters[self.OUTPUT_OVERFLOW] += 1
+        if getattr(status, 'priming_output', False):
+            self.counters[self.PRIMING_OUTPUT] += 1
+
+    def record_callback(self, duration_s, frames):
+        self.callback_times.record(duration_s, frames / self.sample_rate)
+
+    def record_render(self, duration_s):
+        self.render_times.record(duration_s)
+
+    def reset(self):
+        self.counters[:] = 0
+        self.callback_times.reset()
+        self.render_times.reset()
+
+    def get_summary(self):
+        '''
+        Retorna um dicionário com os contadores de xrun e os resumos de tempo do callback e da renderização.
+        '''
+
+        summary = dict(zip(self.COUNTER_NAMES, self.counters.tolist()))
+        summary["callback"] = self.callback_times.get_summary()
+        summary["render"] = self.render_times.get_summary()
+        return summary
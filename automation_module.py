@@ -0,0 +1,369 @@
+import os
+import time
+import argparse
+from collections import deque
+import numpy as np
+import soundfile as sf
+
+# Um evento por mudança de valor, ancorado na posição (frame do stream) do bloco que vai aplicá-lo
+AUTOMATION_DTYPE = np.dtype([
+    ("sample_position", np.int64), # Frame do stream de saída em que o valor passa a valer
+    ("time_s", np.float64),        # Tempo de relógio desde o início da gravação (apenas referência)
+    ("track_number", np.int32),    # Índice em 'track_paths' da faixa tocando
+    ("wet_level", np.float32),
+    ("delay_mix", np.float32),
+    ("volume_percentage", np.float32),
+])
+AUTOMATION_PARAMETERS = ("wet_level", "delay_mix", "volume_percentage")
+
+class AutomationRecorder:
+    def __init__(self,
+                 sample_rate: int,
+                 initial_capacity: int = 4096,
+                 blocksize: int = 1024,
+                 ramp_seconds: float = 0.05,
+                 parallel_sends: bool = False):
+        """
+        Grava os valores que os gestos entregaram aos sinks (depois da camada de
+        controle) como um fluxo compacto de eventos.
+
+        Cada evento guarda a posição em frames do stream de saída (a mesma base
+        de tempo do AudioEngine), então a reprodução não depende do FPS da
+        câmera nem do relógio de parede. Só são gravados quadros em que algum
+        valor mudou. O bloco, a rampa e a topologia dos efeitos também são
+        salvos: a rampa em blocos depende do bloco, então o replay precisa deles
+        para reproduzir a sessão exatamente.
+
+        Args:
+            sample_rate (int): Taxa do stream de saída (AudioEngine.sample_rate).
+            initial_capacity (int): Eventos pré-alocados; o array dobra quando enche.
+            blocksize (int): Bloco do AudioEngine na gravação (pode vir da calibração).
+            ramp_seconds (float): ReverbControl.ramp_seconds na gravação.
+            parallel_sends (bool): Se o ReverbControl usava sends paralelos.
+        """
+        if sample_rate <= 0:
+            raise ValueError("A taxa de amostragem (sample_rate) deve ser positiva.")
+
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.ramp_seconds = ramp_seconds
+        self.parallel_sends = parallel_sends
+        self.events = np.zeros(max(initial_capacity, 1), dtype=AUTOMATION_DTYPE)
+        self.num_events = 0
+        self.track_paths = []
+        self.track_start_positions = [] # Frame do stream em que o motor aplicou cada faixa (-1 até a troca acontecer)
+        self.track_crossfades = []      # Crossfade (s) usado pelo motor em cada troca
+
+        self._last_values = None
+        self._pending_positions = deque() # (evento, sequência da caixa de parâmetros) à espera do bloco que a aplicou
+        self._start_time = time.perf_counter()
+
+    def mark_track(self, filepath):
+        """
+        Registra a troca de faixa; os próximos eventos apontam para ela. A posição em que
+        o motor aplica a troca (e o crossfade usado) chega depois, por record(track_start=...).
+        """
+        self.track_paths.append(os.path.abspath(filepath))
+        self.track_start_positions.append(-1)
+        self.track_crossfades.append(0.0)
+        self._last_values = None # Força um evento na próxima gravação, mesmo sem mudança de valor
+
+    def _update_track_start(self, track_start):
+        if not self.track_paths or self.track_start_positions[-1] >= 0:
+            return
+        start_position, crossfade_seconds = track_start
+
+        # Enquanto o motor não aplica a troca, ele ainda informa o início da faixa anterior
+        if len(self.track_paths) > 1 and start_position <= self.track_start_positions[-2]:
+            return
+        self.track_start_positions[-1] = int(start_position)
+        self.track_crossfades[-1] = float(crossfade_seconds)
+
+    def record(self, sample_position, wet_level, delay_mix, volume_percentage, track_start = None, parameter_sequence = None):
+        """
+        Grava os valores aplicados neste quadro, se algum mudou. NaN indica um parâmetro
+        que ainda não foi entregue ao sink (o replay não escreve nada para ele).
+
+        Args:
+            sample_position (int): AudioEngine.get_render_position() no momento da escrita. Com
+                                   'parameter_sequence', é só a posição provisória do evento.
+            wet_level (float): Valor entregue a ReverbControl.set_wet_level.
+            delay_mix (float): Valor entregue a ReverbControl.set_delay_mix.
+            volume_percentage (float): Volume entregue ao sistema (0 a 100).
+            track_start (tuple, optional): AudioEngine.get_track_start(); completa a posição
+                                           e o crossfade da última faixa marcada.
+            parameter_sequence (int, optional): ReverbControl.parameters.get_sequence() depois das
+                                                escritas do quadro. Se o reverb ou o delay mudaram, a
+                                                posição do evento é corrigida por resolve_positions()
+                                                para o bloco em que a thread de áudio leu essa escrita.
+        """
+        if track_start is not None:
+            self._update_track_start(track_start)
+
+        values = np.array((wet_level, delay_mix, volume_percentage), dtype=np.float32)
+        last_values = self._last_values
+        if last_values is not None and np.array_equal(values, last_values, equal_nan=True):
+            return False
+        self._last_values = values
+
+        if last_values is None:
+            last_values = np.full(len(values), np.nan, dtype=np.float32) # Nada entregue antes do primeiro evento
+        if parameter_sequence is not None and not np.array_equal(values[:2], last_values[:2], equal_nan=True):
+            # Evento dos efeitos, reposicionado por resolve_positions(); o volume fica na posição da
+            # UI, então uma mudança de volume no mesmo quadro vira um segundo evento
+            effects_values = np.append(values[:2], last_values[2])
+            self._pending_positions.append((self.num_events, parameter_sequence))
+            self._append_event(sample_position, effects_values)
+            if np.array_equal(effects_values, values, equal_nan=True):
+                return True
+        self._append_event(sample_position, values)
+        return True
+
+    def _append_event(self, sample_position, values):
+        if self.num_events == len(self.events):
+            self.events = np.concatenate([self.events, np.zeros(len(self.events), dtype=AUTOMATION_DTYPE)])
+
+        event = self.events[self.num_events]
+        event["sample_position"] = sample_position
+        event["time_s"] = time.perf_counter() - self._start_time
+        event["track_number"] = max(len(self.track_paths) - 1, 0)
+        event["wet_level"], event["delay_mix"], event["volume_percentage"] = values
+        self.num_events += 1
+
+    def resolve_positions(self, applied_position):
+        """
+        Move os eventos com mudança de efeito para o bloco em que a thread de áudio aplicou
+        a escrita (ela pode ter lido a caixa de parâmetros antes ou depois de record()).
+
+        Args:
+            applied_position (callable): AudioEngine.get_parameter_position; recebe a sequência
+                                         e retorna a posição do bloco, ou None se ainda não aplicada.
+        """
+        while self._pending_positions:
+            event_index, parameter_sequence = self._pending_positions[0]
+            sample_position = applied_position(parameter_sequence)
+            if sample_position is None:
+                break # As próximas escritas também ainda não foram aplicadas
+            self.events[event_index]["sample_position"] = sample_position
+            self._pending_positions.popleft()
+
+    def save(self, filepath):
+        """ Salva os eventos em .npz (array estruturado + taxa + faixas). """
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        try:
+            np.savez_compressed(filepath,
+                                events=self.events[: self.num_events],
+                                sample_rate=np.int64(self.sample_rate),
+                                blocksize=np.int64(self.blocksize),
+                                ramp_seconds=np.float64(self.ramp_seconds),
+                                parallel_sends=np.bool_(self.parallel_sends),
+                                track_paths=np.array(self.track_paths, dtype=str),
+                                track_start_positions=np.array(self.track_start_positions, dtype=np.int64),
+                                track_crossfades=np.array(self.track_crossfades, dtype=np.float32))
+        except OSError as e:
+            print(f"Erro ao salvar a automação em '{filepath}': {e}")
+            return False
+
+        print(f"Automação salva em '{filepath}': {self.num_events} eventos.")
+        return True
+
+class AutomationReplayer:
+    def __init__(self, filepath):
+        """
+        Reproduz uma automação gravada pelo AutomationRecorder de forma determinística:
+        os eventos são aplicados na fronteira de bloco cuja posição alcança o evento.
+
+        Args:
+            filepath (str): Arquivo .npz da automação.
+        """
+        with np.load(filepath) as automation:
+            self.events = automation["events"]
+            self.sample_rate = int(automation["sample_rate"])
+            # Gravações antigas não têm as configurações do motor: None = as do motor passado ao bounce
+            self.blocksize = int(automation["blocksize"]) if "blocksize" in automation else None
+            self.ramp_seconds = float(automation["ramp_seconds"]) if "ramp_seconds" in automation else None
+            self.parallel_sends = bool(automation["parallel_sends"]) if "parallel_sends" in automation else None
+            self.track_paths = [str(path) for path in automation["track_paths"]]
+            if "track_start_positions" in automation:
+                self.track_start_positions = automation["track_start_positions"].astype(np.int64)
+                self.track_crossfades = automation["track_crossfades"].astype(np.float64)
+            else:
+                # Gravações antigas: a faixa entra no primeiro evento que aponta para ela, sem crossfade
+                self.track_start_positions = np.full(len(self.track_paths), -1, dtype=np.int64)
+                self.track_crossfades = np.zeros(len(self.track_paths))
+
+        # Faixas cuja posição não chegou a ser gravada entram no primeiro evento que aponta para elas
+        for track_number in np.flatnonzero(self.track_start_positions < 0):
+            track_events = np.flatnonzero(self.events["track_number"] == track_number)
+            if len(track_events):
+                self.track_start_positions[track_number] = self.events["sample_position"][track_events[0]]
+        if len(self.track_start_positions):
+            self.track_start_positions[0] = max(self.track_start_positions[0], 0)
+
+        self._next_event = 0
+        self._current_track = -1
+        self._applied_values = [None] * len(AUTOMATION_PARAMETERS) # Último valor escrito de cada parâmetro
+
+    def create_engine(self, blocksize = None):
+        """
+        Cria um AudioEngine (sem start()) com um ReverbControl nas mesmas configurações
+        da gravação: taxa, bloco, rampa e topologia dos efeitos.
+
+        Args:
+            blocksize (int, optional): Bloco para gravações antigas, que não o salvaram (padrão 1024).
+        """
+        # Import local para evitar dependência circular entre os módulos
+        from audio_engine_module import AudioEngine
+        from filter.reverb_delay_control_module import ReverbControl
+
+        effects_options = {}
+        if self.ramp_seconds is not None:
+            effects_options["ramp_seconds"] = self.ramp_seconds
+        if self.parallel_sends is not None:
+            effects_options["parallel_sends"] = self.parallel_sends
+        return AudioEngine(self.sample_rate, blocksize=self.blocksize or blocksize or 1024,
+                           effects_controller=ReverbControl(self.sample_rate, **effects_options))
+
+    def rewind(self):
+        self._next_event = 0
+        self._current_track = -1
+        self._applied_values = [None] * len(AUTOMATION_PARAMETERS)
+
+    def _changed_value(self, parameter_index, event):
+        # Valor do parâmetro se ele precisa ser escrito: já entregue na gravação e diferente do último escrito
+        value = event[AUTOMATION_PARAMETERS[parameter_index]]
+        if np.isnan(value) or value == self._applied_values[parameter_index]:
+            return None
+        self._applied_values[parameter_index] = value
+        return value
+
+    def is_finished(self):
+        return self._next_event >= len(self.events)
+
+    def get_end_position(self):
+        end_position = int(self.events["sample_position"][-1]) if len(self.events) else 0
+        if len(self.track_start_positions):
+            end_position = max(end_position, int(self.track_start_positions.max()))
+        return end_position
+
+    def apply_until(self, sample_position, effects_controller = None, on_volume = None, on_track = None):
+        """
+        Aplica todos os eventos com posição <= 'sample_position' (o último valor vence).
+
+        Args:
+            sample_position (int): Posição (frame do stream) do início do próximo bloco.
+            effects_controller (ReverbControl, optional): Recebe wet level e delay mix.
+            on_volume (callable, optional): Chamado com o volume (0 a 100).
+            on_track (callable, optional): Chamado com (caminho da faixa, crossfade em segundos)
+                                           na posição em que o motor aplicou a troca na gravação.
+        """
+        # Trocas de faixa até esta posição, em ordem
+        track_applied = False
+        if on_track is not None:
+            for track_number in range(self._current_track + 1, len(self.track_paths)):
+                start_position = self.track_start_positions[track_number]
+                if start_position < 0:
+                    continue # A troca nunca foi aplicada na gravação
+                if start_position > sample_position:
+                    break
+                self._current_track = track_number
+                on_track(self.track_paths[track_number], float(self.track_crossfades[track_number]))
+                track_applied = True
+
+        positions = self.events["sample_position"]
+        last_event = int(np.searchsorted(positions, sample_position, side='right'))
+        if last_event <= self._next_event:
+            return track_applied
+
+        # Como ao vivo, só os parâmetros que mudaram são escritos
+        event = self.events[last_event - 1]
+        if effects_controller is not None:
+            wet_level = self._changed_value(0, event)
+            if wet_level is not None:
+                effects_controller.set_wet_level(wet_level)
+            delay_mix = self._changed_value(1, event)
+            if delay_mix is not None:
+                effects_controller.set_delay_mix(delay_mix)
+        if on_volume is not None:
+            volume_percentage = self._changed_value(2, event)
+            if volume_percentage is not None:
+                on_volume(float(volume_percentage))
+
+        self._next_event = last_event
+        return True
+
+    def bounce(self, audio_engine, output_path, tail_seconds: float = 0.0, subtype: str = 'FLOAT', **load_options):
+        """
+        Renderiza a sessão inteira para WAV, sem câmera e sem dispositivo, bloco a bloco
+        pelo AudioEngine (faixas, reamostragem, crossfade e efeitos como ao vivo).
+
+        Args:
+            audio_engine (AudioEngine): Motor na taxa da gravação, com o ReverbControl desejado,
+                                        sem start() (a renderização é síncrona).
+            output_path (str): Arquivo WAV de saída.
+            tail_seconds (float): Tempo renderizado depois do último evento.
+            subtype (str): Subtipo do WAV de saída.
+            **load_options: Repassados para AudioControl.load_audio (ex.: storage, pcm_cache).
+        """
+        # Import local para evitar dependência circular entre os módulos
+        from audio_control_module import AudioControl
+
+        if audio_engine.sample_rate != self.sample_rate:
+            print(f"Erro: a automação foi gravada a {self.sample_rate} Hz e o motor está a {audio_engine.sample_rate} Hz.")
+            return None
+        if self.blocksize is not None and audio_engine.blocksize != self.blocksize:
+            # A rampa dos parâmetros (em blocos) e as fronteiras dos eventos mudariam
+            print(f"Erro: a automação foi gravada com blocos de {self.blocksize} frames e o motor usa {audio_engine.blocksize}.")
+            return None
+        effects_controller = audio_engine.effects_controller
+        if effects_controller is not None and self.ramp_seconds is not None and (
+                effects_controller.ramp_seconds != self.ramp_seconds or effects_controller.parallel_sends != self.parallel_sends):
+            print("Erro: o ReverbControl do motor não usa a rampa e a topologia da gravação (veja create_engine).")
+            return None
+
+        def load_track(filepath, crossfade_seconds):
+            # Carregamento síncrono: a troca entra no mesmo bloco em que entrou na gravação
+            audio_controller = AudioControl()
+            if audio_controller.load_audio(filepath, **load_options):
+                audio_engine.set_track(audio_controller.audio_data, crossfade_seconds, audio_controller.sample_rate,
+                                       audio_controller.peak_pyramid)
+            else:
+                print(f"Falha ao carregar {filepath}; o bounce continua com a faixa anterior.")
+
+        self.rewind()
+        end_position = self.get_end_position() + int(max(tail_seconds, 0.0) * self.sample_rate)
+        out_block = np.zeros((audio_engine.blocksize, audio_engine.channels), dtype=np.float32)
+
+        start_time = time.perf_counter()
+        try:
+            with sf.SoundFile(output_path, 'w', samplerate=self.sample_rate, channels=audio_engine.channels,
+                              subtype=subtype, format='WAV') as destination:
+                while audio_engine.get_render_position() < end_position:
+                    self.apply_until(audio_engine.get_render_position(), audio_engine.effects_controller, on_track=load_track)
+                    audio_engine.render_next_block(out_block)
+                    destination.write(out_block)
+        except (RuntimeError, OSError) as e:
+            print(f"Erro ao gravar '{output_path}': {e}")
+            return None
+        elapsed = time.perf_counter() - start_time
+
+        rendered_seconds = audio_engine.get_render_position() / self.sample_rate
+        print(f"Bounce '{output_path}': {rendered_seconds:.1f} s de áudio em {elapsed:.2f} s.")
+        return {"seconds": rendered_seconds, "elapsed": elapsed, "events": len(self.events)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Renderiza (bounce) uma sessão gravada pelo AutomationRecorder.")
+    parser.add_argument("automation", help="Arquivo .npz da automação")
+    parser.add_argument("output", help="Arquivo WAV de saída")
+    parser.add_argument("--blocksize", type=int, default=None,
+                        help="Bloco para gravações antigas; as novas usam o bloco salvo na gravação")
+    parser.add_argument("--tail", type=float, default=2.0, help="Segundos renderizados depois do último evento")
+    args = parser.parse_args()
+
+    replayer = AutomationReplayer(args.automation)
+    engine = replayer.create_engine(args.blocksize)
+    if replayer.bounce(engine, args.output, tail_seconds=args.tail) is None:
+        raise SystemExit(1)
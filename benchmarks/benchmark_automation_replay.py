@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import contextlib
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_engine_module import AudioEngine
+from automation_module import AutomationRecorder, AutomationReplayer
+from control_rate_module import ControlRateLimiter
+from filter.reverb_delay_control_module import ReverbControl
+
+# --- Configurações do Benchmark ---
+SAMPLE_RATE = 48000
+BLOCKSIZE = 1024
+FRAME_RATE = 30
+DURATION_S = 20
+JITTER = 0.004 # Ruído das landmarks no valor do gesto (efeitos, 0 a 1; o volume usa 100x)
+RACE_PROBABILITY = 0.3 # Quadros em que a thread de áudio renderiza um bloco entre a escrita e a gravação
+
+def gesture_curves(rng):
+    """ Valores pedidos pelos gestos a cada quadro: reverb, delay e volume, com ruído. """
+    times = np.arange(FRAME_RATE * DURATION_S) / FRAME_RATE
+    wet = np.interp(times, [0, 4, 7, 12, DURATION_S], [0.0, 0.0, 0.6, 0.6, 0.2]) + rng.normal(0, JITTER, len(times))
+    delay = np.interp(times, [0, 9, 11, 16, DURATION_S], [0.0, 0.0, 0.5, 0.1, 0.1]) + rng.normal(0, JITTER, len(times))
+    volume = np.interp(times, [0, 5, 8, 15, DURATION_S], [40, 40, 80, 20, 20]) + rng.normal(0, JITTER * 100, len(times))
+    return times, np.clip(wet, 0, 1), np.clip(delay, 0, 1), np.clip(volume, 0, 100)
+
+def create_effects():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return ReverbControl(SAMPLE_RATE)
+
+def render_block(engine, effects, volume, block_states, out_block):
+    """ Guarda o que a thread de áudio lê antes do bloco (caixa de parâmetros + volume) e renderiza. """
+    block_state = np.zeros(len(effects.parameters.names) + 1, dtype=np.float32)
+    effects.parameters.read_into(block_state[:-1])
+    block_state[-1] = volume[-1] if volume else np.nan
+    block_states.append(block_state)
+    engine.render_next_block(out_block)
+
+def run_live(track, record_delivered):
+    """
+    Sessão ao vivo simulada: gestos -> camada de controle -> sinks, gravando a automação a cada quadro.
+    Em parte dos quadros um bloco é renderizado entre a escrita dos parâmetros e record(), como
+    acontece com a thread produtora do motor.
+    """
+    rng = np.random.default_rng(0)
+    times, wet, delay, volume = gesture_curves(rng)
+    effects = create_effects()
+    engine = AudioEngine(SAMPLE_RATE, blocksize=BLOCKSIZE, effects_controller=effects)
+    engine.set_track(track)
+    delivered_volume = []
+    control_rate = ControlRateLimiter({"volume": delivered_volume.append,
+                                       "reverb_wet": effects.set_wet_level,
+                                       "delay_mix": effects.set_delay_mix},
+                                      dead_bands={"volume": 1.0, "reverb_wet": 0.01, "delay_mix": 0.01},
+                                      max_rates_hz={"volume": 20, "reverb_wet": 30, "delay_mix": 30})
+    recorder = AutomationRecorder(SAMPLE_RATE, blocksize=BLOCKSIZE, ramp_seconds=effects.ramp_seconds,
+                                  parallel_sends=effects.parallel_sends)
+    recorder.mark_track("live.wav")
+
+    block_states = []
+    out_block = np.zeros((BLOCKSIZE, engine.channels), dtype=np.float32)
+    for frame_index, now in enumerate(times):
+        # O volume do sistema não passa pela thread de áudio: seu evento fica na posição da UI,
+        # então um bloco renderizado no meio do quadro ainda tem o volume anterior
+        previous_volume = list(delivered_volume)
+        control_rate.submit("reverb_wet", wet[frame_index], now=now)
+        control_rate.submit("delay_mix", delay[frame_index], now=now)
+        control_rate.submit("volume", volume[frame_index], now=now)
+        control_rate.flush(now=now)
+        if rng.random() < RACE_PROBABILITY:
+            render_block(engine, effects, previous_volume, block_states, out_block)
+
+        if record_delivered:
+            recorder.record(engine.get_render_position(), control_rate.get_value("reverb_wet", np.nan),
+                            control_rate.get_value("delay_mix", np.nan), control_rate.get_value("volume", np.nan),
+                            track_start=engine.get_track_start(), parameter_sequence=effects.parameters.get_sequence())
+            recorder.resolve_positions(engine.get_parameter_position)
+        else:
+            # Gravação anterior: os valores crus dos gestos, antes da zona morta e da taxa máxima
+            recorder.record(engine.get_render_position(), wet[frame_index], delay[frame_index], volume[frame_index],
+                            track_start=engine.get_track_start())
+
+        # Blocos tocados até o próximo quadro da câmera
+        while engine.get_render_position() < (now + 1 / FRAME_RATE) * SAMPLE_RATE:
+            render_block(engine, effects, delivered_volume, block_states, out_block)
+
+    return recorder, np.array(block_states), effects.parameters.get_sequence(), len(delivered_volume)
+
+def run_replay(track, automation_path, num_blocks):
+    """ Replay da automação gravada no mesmo motor síncrono, bloco a bloco. """
+    replayer = AutomationReplayer(automation_path)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        engine = replayer.create_engine()
+    effects = engine.effects_controller
+    engine.set_track(track)
+    applied_volume = []
+
+    block_states = []
+    out_block = np.zeros((BLOCKSIZE, engine.channels), dtype=np.float32)
+    for _ in range(num_blocks):
+        replayer.apply_until(engine.get_render_position(), effects, on_volume=applied_volume.append)
+        render_block(engine, effects, applied_volume, block_states, out_block)
+
+    return np.array(block_states), effects.parameters.get_sequence(), len(applied_volume)
+
+if __name__ == '__main__':
+    track = (np.random.default_rng(1).standard_normal((SAMPLE_RATE * 4, 2)) * 0.2).astype(np.float32)
+
+    print(f"{DURATION_S} s de gestos a {FRAME_RATE} FPS, blocos de {BLOCKSIZE} frames a {SAMPLE_RATE} Hz\n")
+    print(f"{'Gravação':<22}{'Eventos':>9}{'Escritas ao vivo':>18}{'Escritas replay':>17}{'Blocos diferentes':>19}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for label, record_delivered in (("valores dos gestos", False), ("valores entregues", True)):
+            recorder, live_states, live_writes, live_volume_writes = run_live(track, record_delivered)
+            automation_path = os.path.join(work_dir, "automation.npz")
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                recorder.save(automation_path)
+
+            replay_states, replay_writes, replay_volume_writes = run_replay(track, automation_path, len(live_states))
+            different_blocks = int((~np.all((live_states == replay_states) | (np.isnan(live_states) & np.isnan(replay_states)), axis=1)).sum())
+            print(f"{label:<22}{recorder.num_events:>9}{live_writes + live_volume_writes:>18}"
+                  f"{replay_writes + replay_volume_writes:>17}{different_blocks:>19}")
+
+            if record_delivered and (different_blocks or live_writes != replay_writes or live_volume_writes != replay_volume_writes):
+                raise AssertionError("O replay da automação não reproduz as escritas da sessão ao vivo.")
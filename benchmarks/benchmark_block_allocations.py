@@ -0,0 +1,102 @@
+import os
+import sys
+import tracemalloc
+import tempfile
+import contextlib
+import numpy as np
+import soundfile as sf
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_engine_module import AudioEngine
+from audio_control_module import AudioControl
+
+# --- Configurações do Benchmark ---
+SAMPLE_RATE = 48000
+BLOCKSIZE = 1024
+WARMUP_BLOCKS = 50
+MEASURED_BLOCKS = 500
+# Objetos Python transitórios (floats de perf_counter, ints de índices, buffers internos do
+# einsum) ficam abaixo disso; qualquer buffer de bloco, mesmo mono float32, já chega a 4 KB.
+MAX_TRANSIENT_BYTES = BLOCKSIZE * 4
+
+def measure_block_allocations(render_block):
+    """
+    Retorna (pico em bytes acima do regime, bytes retidos) ao renderizar MEASURED_BLOCKS blocos
+    depois do aquecimento. O pico captura também alocações liberadas no mesmo bloco.
+    """
+    for _ in range(WARMUP_BLOCKS):
+        render_block()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline_bytes, _ = tracemalloc.get_traced_memory()
+    for _ in range(MEASURED_BLOCKS):
+        render_block()
+    final_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak_bytes - baseline_bytes, final_bytes - baseline_bytes
+
+def create_engine_scenario(track_path, storage, crossfade_seconds, effects_controller = None):
+    """ Motor síncrono tocando a faixa em 'storage' (reamostrada de 44.1 kHz), opcionalmente em crossfade. """
+    audio_controller = AudioControl()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        audio_controller.load_audio(track_path, storage=storage)
+
+    engine = AudioEngine(SAMPLE_RATE, blocksize=BLOCKSIZE, effects_controller=effects_controller)
+    engine.set_track(audio_controller.audio_data, sample_rate=audio_controller.sample_rate)
+    out_block = np.zeros((BLOCKSIZE, engine.channels), dtype=np.float32)
+    engine.render_next_block(out_block)
+    if crossfade_seconds > 0:
+        # Duas faixas tocando juntas durante todo o trecho medido
+        engine.set_track(audio_controller.audio_data, crossfade_seconds, audio_controller.sample_rate)
+
+    return lambda: engine.render_next_block(out_block)
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as work_dir:
+        track_path = os.path.join(work_dir, "track.wav")
+        rng = np.random.default_rng(0)
+        sf.write(track_path, (rng.standard_normal((44100 * 30, 2)) * 0.2).clip(-1, 1).astype(np.float32), 44100, subtype='PCM_16')
+
+        crossfade_seconds = (WARMUP_BLOCKS + MEASURED_BLOCKS + 10) * BLOCKSIZE / SAMPLE_RATE
+        scenarios = [
+            ("float32, reamostrada", create_engine_scenario(track_path, 'float32', 0.0)),
+            ("int16, reamostrada", create_engine_scenario(track_path, 'int16', 0.0)),
+            ("int16, crossfade", create_engine_scenario(track_path, 'int16', crossfade_seconds)),
+        ]
+
+        print(f"{'Cenário (sem efeitos)':<26}{'Pico/bloco (B)':>16}{'Retido (B)':>12}")
+        failures = []
+        for name, render_block in scenarios:
+            peak_bytes, retained_bytes = measure_block_allocations(render_block)
+            print(f"{name:<26}{peak_bytes:>16}{retained_bytes:>12}")
+            # Retido: só ruído constante do tracemalloc; um vazamento por bloco somaria megabytes
+            if peak_bytes >= MAX_TRANSIENT_BYTES or retained_bytes >= MAX_TRANSIENT_BYTES:
+                failures.append(name)
+
+        # Com o ReverbControl, cada plugin do pedalboard devolve um array novo (a API não aceita
+        # buffer de destino), e no máximo dois estão vivos ao mesmo tempo: a saída de um estágio
+        # enquanto o próximo aloca a sua, ou a dos dois ramos paralelos. O orçamento é esse e
+        # nada mais: qualquer outra cópia no caminho do bloco faz o check falhar.
+        try:
+            from filter.reverb_delay_control_module import ReverbControl
+        except ImportError:
+            print("\npedalboard não instalado: cenários com efeitos ignorados.")
+        else:
+            block_bytes = BLOCKSIZE * 2 * np.dtype(np.float32).itemsize
+            print(f"\n{'Cenário (com efeitos)':<26}{'Pico/bloco (B)':>16}{'Retido (B)':>12}{'Orçamento (B)':>15}")
+            for name, parallel_sends in (("int16 + ReverbControl", False), ("int16 + sends paralelos", True)):
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    effects_controller = ReverbControl(SAMPLE_RATE, parallel_sends=parallel_sends)
+                peak_bytes, retained_bytes = measure_block_allocations(
+                    create_engine_scenario(track_path, 'int16', 0.0, effects_controller))
+                effects_controller.close()
+
+                budget_bytes = len(effects_controller.stage_names) * block_bytes + MAX_TRANSIENT_BYTES
+                print(f"{name:<26}{peak_bytes:>16}{retained_bytes:>12}{budget_bytes:>15}")
+                if peak_bytes >= budget_bytes or retained_bytes >= MAX_TRANSIENT_BYTES:
+                    failures.append(name)
+
+        assert not failures, f"Alocação por bloco acima do orçamento em regime: {failures}"
+        print("\nOK: o motor não aloca buffers por bloco; os efeitos alocam só as saídas do pedalboard.")
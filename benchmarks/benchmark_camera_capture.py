@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import tempfile
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from camera_capture_module import ThreadedCapture
+
+# --- Configurações do Benchmark ---
+VIDEO_FPS = 30
+VIDEO_SECONDS = 4
+FRAME_SIZE = (1280, 720)
+PROCESSING_MS = (10, 25, 50) # Custo simulado por quadro (detecção + desenho)
+
+def create_test_video(path):
+    """ Vídeo sintético com o número do quadro, para testar sem webcam. """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), VIDEO_FPS, FRAME_SIZE)
+    for frame_index in range(VIDEO_FPS * VIDEO_SECONDS):
+        frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+        cv2.putText(frame, str(frame_index), (100, 400), cv2.FONT_HERSHEY_SIMPLEX, 8, (255, 255, 255), 12)
+        writer.write(frame)
+    writer.release()
+
+def busy_wait(seconds):
+    """ Simula o processamento do quadro segurando a CPU (como o MediaPipe). """
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+        pass
+
+def run_blocking(path, processing_s):
+    """
+    Loop atual: capture.read() no próprio loop. A "câmera" disponibiliza o quadro i
+    em start + i / FPS e guarda os quadros não lidos, como o buffer do driver.
+    """
+    capture = cv2.VideoCapture(path)
+    start_time = time.perf_counter()
+    frames = 0
+    total_age = 0.0
+    while True:
+        available_time = start_time + frames / VIDEO_FPS
+        delay = available_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        ok, frame = capture.read()
+        if not ok:
+            break
+        total_age += time.perf_counter() - available_time
+        busy_wait(processing_s)
+        frames += 1
+    elapsed = time.perf_counter() - start_time
+    capture.release()
+    return frames / elapsed, total_age / max(frames, 1)
+
+def run_threaded(path, processing_s):
+    capture = ThreadedCapture(path)
+    start_time = time.perf_counter()
+    frames = 0
+    total_age = 0.0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        total_age += time.perf_counter() - capture.delivered_frame_time
+        busy_wait(processing_s)
+        frames += 1
+    elapsed = time.perf_counter() - start_time
+    capture.release()
+    return frames / elapsed, total_age / max(frames, 1), capture.get_stats()
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = os.path.join(temp_dir, "camera_teste.avi")
+        create_test_video(video_path)
+
+        print(f"Vídeo sintético {FRAME_SIZE[0]}x{FRAME_SIZE[1]} a {VIDEO_FPS} FPS ({VIDEO_SECONDS} s)\n")
+        # Idade: tempo entre o quadro ficar disponível e o loop recebê-lo
+        print(f"{'Proc. (ms)':<12}{'Bloqueante: FPS':>16}{'idade (ms)':>12}{'Em thread: FPS':>16}{'idade (ms)':>12}{'Descartados':>13}")
+        for processing_ms in PROCESSING_MS:
+            blocking_fps, blocking_age = run_blocking(video_path, processing_ms / 1000)
+            threaded_fps, threaded_age, stats = run_threaded(video_path, processing_ms / 1000)
+            print(f"{processing_ms:<12}{blocking_fps:>16.1f}{blocking_age * 1000:>12.1f}"
+                  f"{threaded_fps:>16.1f}{threaded_age * 1000:>12.1f}{stats['frames_dropped']:>13}")
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+import soundfile as sf
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_control_module import AudioControl
+
+# --- Configurações do Benchmark ---
+NUM_TRACKS = 8
+TRACK_DURATION_S = 240.0
+SAMPLE_RATE = 44100
+BLOCKSIZE = 1024
+CONVERSION_REPEATS = 2000
+
+def create_library(directory):
+    """ Gera uma biblioteca sintética em WAV PCM 16-bit, como o converter_para_wav.py produz. """
+    rng = np.random.default_rng(0)
+    paths = []
+    for track_idx in range(NUM_TRACKS):
+        path = os.path.join(directory, f"track_{track_idx}.wav")
+        frames = int(TRACK_DURATION_S * SAMPLE_RATE)
+        audio = (rng.standard_normal((frames, 2)) * 0.2).clip(-1.0, 1.0).astype(np.float32)
+        sf.write(path, audio, SAMPLE_RATE, subtype='PCM_16')
+        paths.append(path)
+    return paths
+
+def measure_library_rss(paths, storage):
+    """ Carrega a biblioteca inteira e retorna o pico de RSS do processo (MB). """
+    controllers = []
+    for path in paths:
+        audio_controller = AudioControl()
+        audio_controller.load_audio(path, storage=storage)
+        controllers.append(audio_controller)
+
+    sample_bytes = sum(controller.audio_data.nbytes for controller in controllers)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # Linux: KB
+    return peak_rss_kb / 1024, sample_bytes / (1024 * 1024)
+
+def measure_conversion_cost(path, storage):
+    """ Custo médio (µs) para entregar um bloco float32 ao motor de áudio. """
+    audio_controller = AudioControl()
+    audio_controller.load_audio(path, storage=storage)
+    audio_data = audio_controller.audio_data
+    out = np.zeros((BLOCKSIZE, audio_controller.num_channels), dtype=np.float32)
+    max_start = len(audio_data) - BLOCKSIZE
+
+    start_time = time.perf_counter()
+    for repeat in range(CONVERSION_REPEATS):
+        start = (repeat * BLOCKSIZE) % max_start
+        if hasattr(audio_data, 'read_into'):
+            audio_data.read_into(start, out)
+        else:
+            np.copyto(out, audio_data[start : start + BLOCKSIZE])
+    elapsed = time.perf_counter() - start_time
+    return elapsed / CONVERSION_REPEATS * 1e6
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--rss':
+        # Processo filho: mede o pico de RSS de um único modo de armazenamento
+        library_dir, storage = sys.argv[2].split('::')
+        paths = sorted(os.path.join(library_dir, f) for f in os.listdir(library_dir))
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            peak_rss_mb, sample_mb = measure_library_rss(paths, storage)
+        print(f"{peak_rss_mb:.1f} {sample_mb:.1f}")
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as library_dir:
+        print(f"Gerando biblioteca: {NUM_TRACKS} faixas x {TRACK_DURATION_S:.0f} s ...")
+        paths = create_library(library_dir)
+
+        print(f"\n{'Armazenamento':<14}{'Pico RSS (MB)':>15}{'Amostras (MB)':>15}{'Bloco (µs)':>12}")
+        for storage in ('float32', 'int16', 'int24'):
+            # Cada modo roda em um processo separado para o pico de RSS não se misturar
+            result = subprocess.run([sys.executable, __file__, '--rss', f"{library_dir}::{storage}"],
+                                    capture_output=True, text=True, check=True)
+            peak_rss_mb, sample_mb = result.stdout.split()
+
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                block_cost_us = measure_conversion_cost(paths[0], storage)
+
+            print(f"{storage:<14}{float(peak_rss_mb):>15.1f}{float(sample_mb):>15.1f}{block_cost_us:>12.2f}")
@@ -0,0 +1,46 @@
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from control_rate_module import ControlRateLimiter
+
+# --- Configurações do Benchmark ---
+FRAME_RATE = 30
+DURATION_S = 20
+JITTER_PERCENT = 0.4 # Ruído das landmarks no valor do gesto (desvio padrão, em pontos percentuais)
+DEAD_BANDS = (0.0, 0.5, 1.0, 2.0)
+MAX_RATES_HZ = (None, 20, 10)
+
+def gesture_curve(rng):
+    """ Volume (0 a 100%) pedido pelo gesto a cada quadro: mão parada, subida, parada, descida rápida. """
+    times = np.arange(FRAME_RATE * DURATION_S) / FRAME_RATE
+    target = np.interp(times, [0, 5, 8, 14, 15, DURATION_S], [40, 40, 80, 80, 20, 20])
+    return np.clip(target + rng.normal(0, JITTER_PERCENT, len(times)), 0, 100), times
+
+if __name__ == '__main__':
+    values, times = gesture_curve(np.random.default_rng(0))
+    print(f"{len(values)} quadros a {FRAME_RATE} FPS, ruído de {JITTER_PERCENT} pp\n")
+    print(f"{'Zona morta':<12}{'Taxa máx.':>10}{'Escritas':>10}{'Suprimidas':>12}{'Erro médio (pp)':>17}{'Erro final (pp)':>17}")
+    for dead_band in DEAD_BANDS:
+        for max_rate_hz in MAX_RATES_HZ:
+            applied = [values[0]]
+            limiter = ControlRateLimiter({"volume": applied.append}, dead_bands=dead_band, max_rates_hz=max_rate_hz)
+
+            # Valor aplicado no sink em cada quadro, comparado com o pedido pelo gesto
+            applied_per_frame = np.empty_like(values)
+            for frame_index, (value, now) in enumerate(zip(values, times)):
+                limiter.submit("volume", value, now=now)
+                limiter.flush(now=now)
+                applied_per_frame[frame_index] = applied[-1]
+
+            # Depois do gesto: quadros sem mão, só flush (o último valor pendente precisa chegar)
+            for extra_frame in range(1, FRAME_RATE):
+                limiter.flush(now=times[-1] + extra_frame / FRAME_RATE)
+
+            stats = limiter.get_stats()["volume"]
+            mean_error = np.abs(applied_per_frame - values).mean()
+            final_error = abs(applied[-1] - values[-1])
+            rate_label = f"{max_rate_hz} Hz" if max_rate_hz else "-"
+            print(f"{dead_band:<12}{rate_label:>10}{stats['written']:>10}{stats['submitted'] - stats['written']:>12}"
+                  f"{mean_error:>17.2f}{final_error:>17.2f}")
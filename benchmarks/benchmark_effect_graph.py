@@ -0,0 +1,74 @@
+import os
+# Um núcleo por ramo: o paralelismo medido é o do grafo, não o do BLAS
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from filter.effect_graph_module import ParallelEffectGraph
+
+# --- Configurações do Benchmark ---
+SAMPLE_RATE = 48000
+BLOCKSIZE = 1024
+CHANNELS = 2
+MAX_BRANCHES = max(os.cpu_count() or 1, 4)
+DURATION_S = 1.5 # Tempo medido por configuração
+
+class MatrixFir:
+    """ Substituto do plugin quando o pedalboard não está instalado: FIR como produto de matrizes (o BLAS libera o GIL). """
+    def __init__(self, seed):
+        rng = np.random.default_rng(seed)
+        self.matrix = (rng.standard_normal((BLOCKSIZE, BLOCKSIZE)) / BLOCKSIZE).astype(np.float32)
+
+    def __call__(self, block, sample_rate, reset = True):
+        return self.matrix[: len(block), : len(block)] @ block
+
+def create_plugin(seed):
+    try:
+        from pedalboard import Reverb
+    except ImportError:
+        return MatrixFir(seed)
+    return Reverb(room_size=0.85, wet_level=1.0, dry_level=0.0)
+
+def measure_block_us(process_block):
+    for _ in range(20):
+        process_block()
+
+    blocks = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < DURATION_S:
+        process_block()
+        blocks += 1
+    return (time.perf_counter() - start_time) / blocks * 1e6
+
+if __name__ == '__main__':
+    input_block = (np.random.default_rng(0).standard_normal((BLOCKSIZE, CHANNELS)) * 0.2).astype(np.float32)
+    out_block = np.zeros_like(input_block)
+    plugin_kind = type(create_plugin(0)).__name__
+    budget_us = BLOCKSIZE / SAMPLE_RATE * 1e6
+
+    print(f"Plugin por ramo: {plugin_kind}; bloco {BLOCKSIZE} frames ({budget_us:.0f} µs de orçamento); {os.cpu_count()} núcleos\n")
+    print(f"{'Ramos':<7}{'Serial (µs)':>13}{'Paralelo (µs)':>15}{'Speedup':>10}{'Orçamento':>11}")
+
+    for num_branches in range(1, MAX_BRANCHES + 1):
+        plugins = [create_plugin(seed) for seed in range(num_branches)]
+
+        # Referência: os mesmos ramos, um depois do outro, na thread chamadora
+        mix_bus = np.zeros_like(input_block)
+        def process_serial():
+            np.copyto(mix_bus, input_block)
+            for plugin in plugins:
+                np.add(mix_bus, plugin(input_block, SAMPLE_RATE, reset=False), out=mix_bus)
+        serial_us = measure_block_us(process_serial)
+
+        graph = ParallelEffectGraph(SAMPLE_RATE, CHANNELS, BLOCKSIZE)
+        for branch_index, plugin in enumerate(plugins):
+            graph.add_branch(f"send_{branch_index}", [plugin])
+        parallel_us = measure_block_us(lambda: graph.process_into(input_block, out_block))
+        graph.close()
+
+        print(f"{num_branches:<7}{serial_us:>13.1f}{parallel_us:>15.1f}{serial_us / parallel_us:>10.2f}{parallel_us / budget_us:>10.0%}")
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hand_detector_module import HandDetector
+
+# --- Configurações do Benchmark ---
+VIDEO_SOURCE = sys.argv[1] if len(sys.argv) > 1 else 0 # Vídeo com mãos (ou a câmera, se omitido)
+FRAME_SIZE = (1920, 1080) # Quadro exibido, como nos apps
+MAX_FRAMES = 300
+INFERENCE_HEIGHTS = (1080, 720, 480, 360)
+TRACKING_INFERENCE_HEIGHT = 720 # Resolução das linhas com os modos de rastreamento
+TRACKING_MODES = (("inteiro", {}), # Referência do ROI: rastreamento do MediaPipe no quadro inteiro
+                  ("adapt.", {"adaptive_rate": True}),
+                  ("ROI", {"roi_tracking": True}),
+                  ("ROI+adapt.", {"roi_tracking": True, "adaptive_rate": True}))
+
+def load_frames():
+    """ Lê os quadros uma vez para que todas as resoluções processem exatamente as mesmas imagens. """
+    capture = cv2.VideoCapture(VIDEO_SOURCE)
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE[0])
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE[1])
+    frames = []
+    while len(frames) < MAX_FRAMES:
+        success, frame = capture.read()
+        if not success:
+            break
+        if (frame.shape[1], frame.shape[0]) != FRAME_SIZE:
+            frame = cv2.resize(frame, FRAME_SIZE, interpolation=cv2.INTER_LINEAR)
+        frames.append(frame)
+    capture.release()
+    return frames
+
+def run_detector(frames, inference_height, **tracking_options):
+    """ Retorna o FPS da detecção, as landmarks (coordenadas do quadro exibido) de cada quadro e as estatísticas do detector. """
+    detector = HandDetector(number_hands=2, min_detection_confidence=0.7,
+                            inference_height=inference_height, **tracking_options)
+    detected = []
+    start_time = time.perf_counter()
+    for frame in frames:
+        detector.find_hands(frame, draw_hands=False)
+        hands = detector.find_positions(frame, draw_points=False)
+        detected.append([np.array([landmark[1:] for landmark in hand["landmarks"]], dtype=np.float32) for hand in hands])
+    elapsed = time.perf_counter() - start_time
+    return len(frames) / elapsed, detected, detector.get_stats()
+
+def landmark_error_px(reference, detected):
+    """ Erro médio (px) das landmarks em relação à referência, nos quadros com o mesmo número de mãos. """
+    errors = []
+    for reference_hands, hands in zip(reference, detected):
+        if not reference_hands or len(reference_hands) != len(hands):
+            continue
+        for reference_points in reference_hands:
+            # Pareia cada mão com a mais próxima (a ordem do MediaPipe pode trocar)
+            distances = [np.linalg.norm(points - reference_points, axis=1).mean() for points in hands]
+            errors.append(min(distances))
+    return float(np.mean(errors)) if errors else float('nan')
+
+if __name__ == '__main__':
+    frames = load_frames()
+    if not frames:
+        print("Erro: nenhum quadro lido. Passe o caminho de um vídeo com mãos.")
+        sys.exit(1)
+
+    print(f"{len(frames)} quadros de {FRAME_SIZE[0]}x{FRAME_SIZE[1]}; referência: inferência em {FRAME_SIZE[1]}p\n")
+    reference = None
+    print(f"{'Inferência':<12}{'FPS':>8}{'Quadros com mão':>17}{'Erro médio (px)':>17}")
+    for inference_height in INFERENCE_HEIGHTS:
+        fps, detected, _ = run_detector(frames, inference_height)
+        if reference is None:
+            reference = detected
+        frames_with_hands = sum(1 for hands in detected if hands)
+        error_px = landmark_error_px(reference, detected)
+        print(f"{str(inference_height) + 'p':<12}{fps:>8.1f}{frames_with_hands:>17}{error_px:>17.2f}")
+
+    # Modos de rastreamento: taxa variável (landmarks previstas nos quadros pulados) e recorte em volta das mãos
+    print(f"\n{'Modo':<14}{'FPS':>8}{'Erro médio (px)':>17}{'Previstos':>11}{'Erro previsão (px)':>20}{'Pixels inferidos':>18}")
+    mode_fps = {}
+    for mode_name, tracking_options in TRACKING_MODES:
+        fps, detected, stats = run_detector(frames, TRACKING_INFERENCE_HEIGHT, **tracking_options)
+        mode_fps[mode_name] = fps
+        error_px = landmark_error_px(reference, detected)
+        print(f"{f'{TRACKING_INFERENCE_HEIGHT}p {mode_name}':<14}{fps:>8.1f}{error_px:>17.2f}{stats['skip_ratio']:>11.0%}"
+              f"{stats['prediction_error_mean_px']:>20.2f}{stats['inference_pixel_ratio']:>18.0%}")
+
+    # O recorte usa uma instância de imagem estática (detecção da palma a cada chamada): só compensa
+    # se for mais rápido que o rastreamento no quadro inteiro. É o que decide HAND_ROI_TRACKING nos apps.
+    roi_wins = mode_fps["ROI"] > mode_fps["inteiro"]
+    print(f"\nROI vs quadro inteiro: {mode_fps['ROI'] / mode_fps['inteiro']:.2f}x -> "
+          f"HAND_ROI_TRACKING = {roi_wins} nesta máquina")
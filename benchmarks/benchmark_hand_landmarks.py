@@ -0,0 +1,87 @@
+import os
+import sys
+import math
+import time
+import types
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2, classification_pb2
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hand_detector_module import HandDetector
+
+# --- Configurações do Benchmark ---
+FRAME_SHAPE = (1080, 1920, 3)
+HAND_COUNTS = (1, 2)
+DURATION_S = 1.0 # Tempo medido por configuração
+
+def make_results(num_hands, rng):
+    """ Resultados no mesmo formato (protobuf) que o MediaPipe Hands devolve. """
+    multi_hand_landmarks = []
+    multi_handedness = []
+    for hand_idx in range(num_hands):
+        hand_landmarks = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in rng.random((HandDetector.NUM_LANDMARKS, 3)).tolist():
+            hand_landmarks.landmark.add(x=x, y=y, z=z - 0.5)
+        multi_hand_landmarks.append(hand_landmarks)
+
+        handedness = classification_pb2.ClassificationList()
+        handedness.classification.add(index=hand_idx, score=0.9, label=("Left", "Right")[hand_idx % 2])
+        multi_handedness.append(handedness)
+    return types.SimpleNamespace(multi_hand_landmarks=multi_hand_landmarks, multi_handedness=multi_handedness)
+
+def legacy_positions(results, img):
+    """ find_positions anterior: listas [id, x, y] montadas landmark a landmark, mais um dicionário por mão. """
+    all_hands_landmarks = []
+    height, width, _ = img.shape
+    for hand_idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
+        hand_landmark_list = []
+        for id, lm in enumerate(hand_landmarks.landmark):
+            hand_landmark_list.append([id, int(lm.x * width), int(lm.y * height)])
+        all_hands_landmarks.append({"id": hand_idx, "landmarks": hand_landmark_list, "handedness": results.multi_handedness[hand_idx]})
+    return all_hands_landmarks
+
+def measure_us(step):
+    step()
+    calls = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < DURATION_S:
+        step()
+        calls += 1
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    img = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    detector = HandDetector(number_hands=max(HAND_COUNTS))
+
+    print(f"Quadro {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]}: landmarks do quadro + distância polegar-indicador de cada mão\n")
+    print(f"{'Mãos':<6}{'Listas (µs)':>13}{'Arrays, detecção (µs)':>23}{'Arrays, previsão (µs)':>23}")
+    for num_hands in HAND_COUNTS:
+        detector.results = make_results(num_hands, rng)
+
+        def legacy_step():
+            hands = legacy_positions(detector.results, img)
+            for hand in hands:
+                landmarks = hand["landmarks"]
+                math.hypot(landmarks[8][1] - landmarks[4][1], landmarks[8][2] - landmarks[4][2])
+
+        # Quadro com detecção: cópia dos resultados para os arrays + conversão para pixels
+        def array_detection_step():
+            detector._load_results()
+            hand_points, _, _ = detector.find_landmarks(img)
+            np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 8, :2], axis=1)
+
+        # Quadro previsto (taxa adaptativa): as landmarks já estão no array normalizado
+        def array_predicted_step():
+            hand_points, _, _ = detector.find_landmarks(img)
+            np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 8, :2], axis=1)
+
+        legacy_us = measure_us(legacy_step)
+        detection_us = measure_us(array_detection_step)
+        predicted_us = measure_us(array_predicted_step)
+        print(f"{num_hands:<6}{legacy_us:>13.1f}{detection_us:>23.1f}{predicted_us:>23.1f}")
+
+    # O formato antigo continua disponível (find_positions); float32 pode diferir em 1 px no truncamento
+    shim_points = np.array([hand["landmarks"] for hand in detector.find_positions(img, draw_points=False)])
+    legacy_points = np.array([hand["landmarks"] for hand in legacy_positions(detector.results, img)])
+    print(f"\nfind_positions (compatibilidade): maior diferença para o formato anterior = {np.abs(shim_points - legacy_points).max()} px")
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import contextlib
+import numpy as np
+import soundfile as sf
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from offline_render_module import OfflineRenderer, ParameterTimeline
+
+# --- Configurações do Benchmark ---
+TRACK_DURATION_S = 60.0
+SAMPLE_RATE = 44100
+CONTROL_BLOCKS = (256, 512, 1024, 4096)
+
+def create_track(path):
+    """ Gera uma faixa sintética (ruído estéreo) em WAV PCM 16-bit. """
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal((int(TRACK_DURATION_S * SAMPLE_RATE), 2)) * 0.2).clip(-1.0, 1.0)
+    sf.write(path, audio.astype(np.float32), SAMPLE_RATE, subtype='PCM_16')
+
+def create_timeline():
+    """ Automação parecida com uma sessão ao vivo: os três parâmetros mudam o tempo todo. """
+    times_s = np.linspace(0.0, TRACK_DURATION_S, 121)
+    timeline = ParameterTimeline()
+    timeline.add_keyframes("wet_level", times_s, 0.5 + 0.5 * np.sin(times_s))
+    timeline.add_keyframes("delay_mix", times_s, 0.35 + 0.35 * np.cos(times_s * 0.7))
+    timeline.add_keyframes("delay_seconds", times_s, 0.3 + 0.2 * np.sin(times_s * 0.3))
+    return timeline
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "input.wav")
+        output_path = os.path.join(work_dir, "output.wav")
+        create_track(input_path)
+        timeline = create_timeline()
+
+        print(f"Faixa: {TRACK_DURATION_S:.0f} s a {SAMPLE_RATE} Hz, automação de wet/delay mix/delay time\n")
+        print(f"{'Sub-bloco':<12}{'Tempo (s)':>11}{'x tempo real':>14}")
+        for control_block_frames in CONTROL_BLOCKS:
+            renderer = OfflineRenderer(control_block_frames=control_block_frames)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                stats = renderer.render(input_path, output_path, timeline)
+            print(f"{control_block_frames:<12}{stats['elapsed']:>11.2f}{stats['realtime_factor']:>14.1f}")
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from overlay_compositor_module import TextSpriteCache, OverlayPanel
+
+# --- Configurações do Benchmark ---
+FRAME_SHAPE = (1080, 1920, 3)
+ITEM_COUNTS = (1, 5, 10, 20)
+FONT_SCALE = 0.7
+DURATION_S = 1.0 # Tempo medido por configuração
+
+def measure_us(draw):
+    draw()
+    calls = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < DURATION_S:
+        draw()
+        calls += 1
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+if __name__ == '__main__':
+    img = np.random.default_rng(0).integers(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    sprite_cache = TextSpriteCache(cv2.FONT_HERSHEY_SIMPLEX)
+
+    print(f"Quadro {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]}, textos com escala {FONT_SCALE}\n")
+    print(f"{'Itens':<7}{'putText (µs)':>14}{'Painel estável (µs)':>21}{'Painel mudando (µs)':>21}")
+    for item_count in ITEM_COUNTS:
+        items = [(f"Musica {index:02d} - Artista.wav", (30, 40 + 30 * index), FONT_SCALE, (0, 255, 0), 1)
+                 for index in range(item_count)]
+
+        def draw_put_text():
+            for text, origin, font_scale, color, thickness in items:
+                cv2.putText(img, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+
+        # Conteúdo igual a cada quadro: só a mistura da camada
+        steady_panel = OverlayPanel(sprite_cache)
+        def draw_steady_panel():
+            steady_panel.set_items(items)
+            steady_panel.draw(img)
+
+        # Um item muda a cada quadro (ex.: contador de FPS): só o retângulo desse item é refeito
+        changing_panel = OverlayPanel(sprite_cache)
+        frame_counter = [0]
+        def draw_changing_panel():
+            frame_counter[0] = (frame_counter[0] + 1) % 60
+            changing_items = [(f"FPS: {frame_counter[0]}", (30, 20), FONT_SCALE, (0, 255, 0), 1)] + items[1:]
+            changing_panel.set_items(changing_items)
+            changing_panel.draw(img)
+
+        put_text_us = measure_us(draw_put_text)
+        steady_us = measure_us(draw_steady_panel)
+        changing_us = measure_us(draw_changing_panel)
+        print(f"{item_count:<7}{put_text_us:>14.0f}{steady_us:>21.0f}{changing_us:>21.0f}")
+
+    print(f"\nCache de sprites: {sprite_cache.get_stats()}")
@@ -0,0 +1,49 @@
+import os
+# Um único núcleo: o resultado é a vazão por núcleo
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from resampler_module import PolyphaseResampler
+
+# --- Configurações do Benchmark ---
+CONVERSIONS = [(44100, 48000), (48000, 44100), (22050, 48000), (32000, 44100)]
+BLOCKSIZE = 1024
+CHANNELS = 2
+DURATION_S = 2.0 # Tempo medido por conversão
+
+def measure_throughput(input_rate, output_rate, taps_per_phase):
+    """ Retorna frames de saída por segundo (um núcleo) em blocos do tamanho do stream. """
+    resampler = PolyphaseResampler(input_rate, output_rate, CHANNELS, taps_per_phase=taps_per_phase)
+    input_block = np.random.default_rng(0).standard_normal(
+        (resampler.get_max_input_frames(BLOCKSIZE), CHANNELS)).astype(np.float32)
+    out = np.zeros((BLOCKSIZE, CHANNELS), dtype=np.float32)
+
+    # Aquecimento (aloca o buffer de trabalho)
+    for _ in range(10):
+        resampler.process_into(input_block[: resampler.get_input_frames_needed(BLOCKSIZE)], out)
+
+    blocks = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < DURATION_S:
+        resampler.process_into(input_block[: resampler.get_input_frames_needed(BLOCKSIZE)], out)
+        blocks += 1
+    elapsed = time.perf_counter() - start_time
+
+    return blocks * BLOCKSIZE / elapsed
+
+if __name__ == '__main__':
+    print(f"Bloco: {BLOCKSIZE} frames, {CHANNELS} canais\n")
+    print(f"{'Conversão':<18}{'Taps':>6}{'Frames/s/núcleo':>18}{'x tempo real':>14}{'µs/bloco':>11}")
+
+    for input_rate, output_rate in CONVERSIONS:
+        for taps_per_phase in (16, 32, 64):
+            frames_per_second = measure_throughput(input_rate, output_rate, taps_per_phase)
+            realtime_factor = frames_per_second / output_rate
+            block_cost_us = BLOCKSIZE / frames_per_second * 1e6
+            print(f"{f'{input_rate} -> {output_rate}':<18}{taps_per_phase:>6}{frames_per_second:>18,.0f}{realtime_factor:>14.1f}{block_cost_us:>11.1f}")
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from waveform_renderer_module import WaveformRenderer
+
+# --- Configurações do Benchmark ---
+FRAME_SHAPE = (1080, 1920, 3)
+WAVEFORM_HEIGHT_PX = 120
+WIDTHS_PX = (100, 400, 1000, 1800)
+DURATION_S = 1.0 # Tempo medido por configuração
+
+def draw_columns_loop(img, x_start, y_center, column_mins, column_maxs):
+    """ Desenho anterior: um cv2.line por coluna, mais a linha central. """
+    for x_local in range(len(column_mins)):
+        y_draw_min = int(y_center - column_maxs[x_local] * (WAVEFORM_HEIGHT_PX / 2))
+        y_draw_max = int(y_center - column_mins[x_local] * (WAVEFORM_HEIGHT_PX / 2))
+        cv2.line(img, (x_start + x_local, y_draw_min), (x_start + x_local, y_draw_max), (255, 255, 255), 1)
+    cv2.line(img, (x_start, y_center), (x_start + len(column_mins), y_center), (255, 255, 255), 1)
+
+def measure_us(draw):
+    draw()
+    calls = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < DURATION_S:
+        draw()
+        calls += 1
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    img = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    renderers = {method: WaveformRenderer(WAVEFORM_HEIGHT_PX, method=method) for method in ('polylines', 'mask')}
+    y_center = FRAME_SHAPE[0] // 2
+
+    print(f"Quadro {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]}, waveform de {WAVEFORM_HEIGHT_PX} px de altura\n")
+    print(f"{'Largura':<9}{'cv2.line (µs)':>15}{'polylines (µs)':>16}{'máscara (µs)':>14}{'Idêntico':>10}")
+    for width_px in WIDTHS_PX:
+        column_maxs = (np.abs(rng.standard_normal(width_px)) * 0.4).astype(np.float32)
+        column_mins = -(np.abs(rng.standard_normal(width_px)) * 0.4).astype(np.float32)
+        x_start = (FRAME_SHAPE[1] - width_px) // 2
+
+        loop_us = measure_us(lambda: draw_columns_loop(img, x_start, y_center, column_mins, column_maxs))
+        method_us = {method: measure_us(lambda: renderer.draw(img, x_start, y_center, column_mins, column_maxs))
+                     for method, renderer in renderers.items()}
+
+        # Os três caminhos devem pintar exatamente os mesmos pixels
+        reference = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        draw_columns_loop(reference, x_start, y_center, column_mins, column_maxs)
+        identical = True
+        for renderer in renderers.values():
+            drawn = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+            renderer.draw(drawn, x_start, y_center, column_mins, column_maxs)
+            identical = identical and np.array_equal(drawn, reference)
+
+        print(f"{width_px:<9}{loop_us:>15.0f}{method_us['polylines']:>16.0f}{method_us['mask']:>14.0f}{'sim' if identical else 'NÃO':>10}")
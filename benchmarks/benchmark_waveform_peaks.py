@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from audio_control_module import read_audio_window
+from peak_pyramid_module import PeakPyramid
+
+# --- Configurações do Benchmark ---
+SAMPLE_RATE = 44100
+TRACK_SECONDS = 240
+WINDOW_SECONDS = (3.0, 30.0, 240.0)
+WIDTHS_PX = (100, 400, 1200)
+REPEATS = 20
+CHECK_TRACK_FRAMES = 10007 # Não é múltiplo de nenhum tamanho de bin: o loop cai no meio de um bin parcial
+CHECK_WINDOWS = ((9000, 3000, 50), (-700, 2000, 64), (10000, 4000, 7), (5003, 25000, 40), (-30000, 12000, 3))
+
+def window_min_max(audio_data, start_frame, window_frames, width_px):
+    """ Caminho antigo da waveform: janela inteira convertida, média dos canais e min/max por pixel. """
+    waveform_data = np.mean(read_audio_window(audio_data, start_frame, window_frames), axis=1)
+    samples_per_pixel = len(waveform_data) / width_px
+    column_mins = np.zeros(width_px, dtype=np.float32)
+    column_maxs = np.zeros(width_px, dtype=np.float32)
+    for x_local in range(width_px):
+        sample_slice = waveform_data[int(x_local * samples_per_pixel) : int((x_local + 1) * samples_per_pixel)]
+        if len(sample_slice):
+            column_mins[x_local], column_maxs[x_local] = np.min(sample_slice), np.max(sample_slice)
+    return column_mins, column_maxs
+
+def brute_force_bins(peak_pyramid, mono, start_frame, frames, num_bins):
+    """ Referência da pirâmide: para cada coluna, min/max das amostras de todos os bins que os frames dela tocam, com loop. """
+    frames_per_column = frames / num_bins
+    level = int(np.clip(np.floor(np.log2(max(frames_per_column / peak_pyramid.base_bin_frames, 1.0))), 0, len(peak_pyramid.level_mins) - 1))
+    bin_frames = peak_pyramid.base_bin_frames << level
+    num_frames = len(mono)
+
+    column_mins = np.zeros(num_bins, dtype=np.float32)
+    column_maxs = np.zeros(num_bins, dtype=np.float32)
+    for column in range(num_bins):
+        column_start = start_frame + column * frames_per_column
+        column_end = start_frame + (column + 1) * frames_per_column
+        track_bins = {(frame % num_frames) // bin_frames for frame in range(int(np.floor(column_start)), int(np.ceil(column_end)))}
+        samples = np.concatenate([mono[track_bin * bin_frames : (track_bin + 1) * bin_frames] for track_bin in track_bins])
+        column_mins[column], column_maxs[column] = samples.min(), samples.max()
+    return column_mins, column_maxs
+
+def check_wrapped_windows(rng):
+    """ Janelas que cruzam o ponto de loop (e maiores que a faixa) batem exatamente com a força bruta. """
+    audio_data = (rng.standard_normal((CHECK_TRACK_FRAMES, 2)) * 0.2).astype(np.float32)
+    mono = audio_data.mean(axis=1, dtype=np.float32)
+    peak_pyramid = PeakPyramid.from_audio_data(audio_data, SAMPLE_RATE)
+    for start_frame, frames, num_bins in CHECK_WINDOWS:
+        column_mins, column_maxs = peak_pyramid.get_bins(start_frame, frames, num_bins)
+        expected_mins, expected_maxs = brute_force_bins(peak_pyramid, mono, start_frame, frames, num_bins)
+        if not (np.array_equal(column_mins, expected_mins) and np.array_equal(column_maxs, expected_maxs)):
+            raise AssertionError(f"get_bins difere da força bruta (início {start_frame}, {frames} frames, {num_bins} colunas)")
+    print(f"Janelas com loop: {len(CHECK_WINDOWS)} consultas iguais à força bruta ({CHECK_TRACK_FRAMES} frames)\n")
+
+def measure_us(function):
+    start_time = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - start_time) / REPEATS * 1e6
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    check_wrapped_windows(rng)
+    audio_data = (rng.standard_normal((SAMPLE_RATE * TRACK_SECONDS, 2)) * 0.2).astype(np.float32)
+
+    start_time = time.perf_counter()
+    peak_pyramid = PeakPyramid.from_audio_data(audio_data, SAMPLE_RATE)
+    print(f"Pirâmide: {len(peak_pyramid.level_mins)} níveis, {peak_pyramid.nbytes / 1e6:.1f} MB, "
+          f"construída em {time.perf_counter() - start_time:.2f} s para {TRACK_SECONDS} s de áudio\n")
+
+    # Janela centrada perto do fim: cruza o ponto de loop
+    playback_frame = len(audio_data) - SAMPLE_RATE // 2
+    print(f"{'Janela (s)':<12}{'Largura':>9}{'Por pixel (µs)':>16}{'Pirâmide (µs)':>15}{'Speedup':>10}")
+    for window_seconds in WINDOW_SECONDS:
+        window_frames = int(window_seconds * SAMPLE_RATE)
+        start_frame = playback_frame - window_frames // 2
+        for width_px in WIDTHS_PX:
+            slices_us = measure_us(lambda: window_min_max(audio_data, start_frame, window_frames, width_px))
+            pyramid_us = measure_us(lambda: peak_pyramid.get_bins(start_frame, window_frames, width_px))
+            print(f"{window_seconds:<12.0f}{width_px:>9}{slices_us:>16.0f}{pyramid_us:>15.0f}{slices_us / pyramid_us:>9.0f}x")
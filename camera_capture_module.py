@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+import cv2
+
+class ThreadedCapture:
+    def __init__(self,
+                 source = 0,
+                 ring_size: int = 3,
+                 pace_fps: float = None,
+                 loop: bool = False):
+        """
+        Captura de câmera em uma thread própria, que sempre entrega o quadro mais novo.
+
+        A thread lê os quadros com cv2.VideoCapture.read direto em um ring de
+        buffers pré-alocados. read() devolve o último quadro completo; quadros
+        que chegaram e foram substituídos por um mais novo antes de serem lidos
+        são descartados e contados. Assim o loop principal nunca fica
+        esperando a câmera enquanto processa o quadro anterior.
+
+        O quadro devolvido por read() continua válido (a thread não escreve
+        nele) até a próxima chamada de read().
+
+        Args:
+            source: Índice da câmera, caminho/URL de vídeo, ou um cv2.VideoCapture já aberto.
+            ring_size (int): Buffers de quadro (mínimo 3: o entregue, o publicado e o em escrita).
+            pace_fps (float, optional): Limita a leitura a esse ritmo. Para arquivos de vídeo,
+                                        o padrão é o FPS do arquivo (simula uma câmera ao vivo).
+            loop (bool): Para arquivos de vídeo, volta ao início no fim do arquivo.
+        """
+        if ring_size < 3:
+            raise ValueError("O ring da captura (ring_size) precisa de pelo menos 3 buffers.")
+
+        self.capture = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.ring_size = ring_size
+        self.loop = loop
+
+        is_file = isinstance(source, str) and os.path.isfile(source)
+        if pace_fps is None and is_file:
+            file_fps = self.capture.get(cv2.CAP_PROP_FPS)
+            pace_fps = file_fps if file_fps and file_fps > 0 else None
+        self.pace_fps = pace_fps
+
+        self._ring = [None] * ring_size
+        self._published_slot = -1 # Slot do último quadro completo
+        self._delivered_slot = -1 # Slot entregue ao consumidor (a thread não escreve nele)
+        self._published_sequence = 0
+        self._delivered_sequence = 0
+        self._condition = threading.Condition()
+
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0 # Capturados e substituídos por um mais novo antes de serem lidos
+        self.read_failures = 0
+        self.delivered_frame_time = 0.0 # time.perf_counter() da captura do último quadro entregue
+        self._published_time = 0.0
+        self._start_time = None
+
+        self._ended = False
+        self._running = False
+        self._thread = None
+
+    # --- Interface compatível com cv2.VideoCapture ---
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def set(self, prop_id, value):
+        return self.capture.set(prop_id, value)
+
+    def get(self, prop_id):
+        return self.capture.get(prop_id)
+
+    def read(self, timeout: float = 1.0):
+        """
+        Retorna (True, quadro) com o quadro mais novo ainda não entregue, esperando
+        no máximo 'timeout' segundos por um. Retorna (False, None) se a captura
+        terminou (fim do arquivo) ou nenhum quadro chegou a tempo.
+        """
+        if not self._running and not self._ended:
+            self.start()
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._published_sequence > self._delivered_sequence or self._ended, timeout):
+                return False, None
+            if self._published_sequence == self._delivered_sequence:
+                return False, None # Terminou sem quadro novo
+
+            self.frames_dropped += self._published_sequence - self._delivered_sequence - 1
+            self._delivered_sequence = self._published_sequence
+            self._delivered_slot = self._published_slot
+            self.delivered_frame_time = self._published_time
+            self.frames_delivered += 1
+            return True, self._ring[self._delivered_slot]
+
+    def release(self):
+        self.stop()
+        self.capture.release()
+
+    # --- Thread de captura ---
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._ended = False
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._capture_loop, name="CameraCapture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _next_write_slot(self):
+        # Qualquer slot que não seja o publicado nem o que está com o consumidor
+        with self._condition:
+            for slot in range(self.ring_size):
+                if slot != self._published_slot and slot != self._delivered_slot:
+                    return slot
+
+    def _capture_loop(self):
+        frame_interval = 1.0 / self.pace_fps if self.pace_fps else 0.0
+        next_frame_time = time.perf_counter()
+
+        while self._running:
+            slot = self._next_write_slot()
+            # Lê direto no buffer do slot (alocado no primeiro quadro ou se a resolução mudar)
+            ok, frame = self.capture.read(self._ring[slot]) if self._ring[slot] is not None else self.capture.read()
+
+            if not ok:
+                if self.loop and self.capture.get(cv2.CAP_PROP_FRAME_COUNT) > 0:
+                    self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.capture.get(cv2.CAP_PROP_FRAME_COUNT) > 0 or not self.capture.isOpened():
+                    break # Fim do arquivo ou câmera desconectada
+                self.read_failures += 1
+                time.sleep(0.005)
+                continue
+
+            self._ring[slot] = frame
+            self.frames_captured += 1
+            with self._condition:
+                self._published_slot = slot
+                self._published_time = time.perf_counter()
+                self._published_sequence += 1
+                self._condition.notify_all()
+
+            if frame_interval:
+                next_frame_time += frame_interval
+                delay = next_frame_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.perf_counter()
+
+        with self._condition:
+            self._ended = True
+            self._running = False
+            self._condition.notify_all()
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário com os contadores da captura: quadros capturados,
+        entregues e descartados, e as taxas de captura e de entrega (FPS).
+        '''
+
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_delivered": self.frames_delivered,
+            "frames_dropped": self.frames_dropped,
+            "read_failures": self.read_failures,
+            "capture_fps": self.frames_captured / elapsed if elapsed > 0 else 0.0,
+            "delivered_fps": self.frames_delivered / elapsed if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,128 @@
+import time
+
+class ControlRateLimiter:
+    def __init__(self,
+                 sinks: dict,
+                 dead_bands = 0.0,
+                 max_rates_hz = 30.0):
+        """
+        Camada de controle entre as saídas dos gestos e quem aplica os valores (sinks).
+
+        O loop de visão chama submit() a cada quadro, com o valor do gesto. O
+        sink (ex.: a chamada COM do volume do sistema ou um setter de efeito)
+        só é chamado quando a mudança é relevante:
+
+        - zona morta: variações menores que 'dead_band' em relação ao último
+          valor escrito são descartadas (ruído das landmarks);
+        - taxa máxima: no máximo 'max_rate_hz' escritas por segundo em cada
+          parâmetro;
+        - o último valor vence: valores que chegam dentro do intervalo mínimo
+          ficam pendentes e só o mais recente é escrito, por flush(), assim que
+          o intervalo termina. O valor final de um gesto nunca se perde.
+
+        Args:
+            sinks (dict): Nome do parâmetro -> função chamada com o novo valor.
+            dead_bands (float | dict): Zona morta (nas unidades do parâmetro), única ou por parâmetro.
+            max_rates_hz (float | dict): Escritas por segundo, única ou por parâmetro (None = sem limite).
+        """
+        self.names = tuple(sinks.keys())
+        self._sinks = [sinks[name] for name in self.names]
+        self._index = {name: index for index, name in enumerate(self.names)}
+
+        self._dead_bands = []
+        self._min_intervals = []
+        for name in self.names:
+            dead_band = dead_bands.get(name, 0.0) if isinstance(dead_bands, dict) else dead_bands
+            max_rate_hz = max_rates_hz.get(name) if isinstance(max_rates_hz, dict) else max_rates_hz
+            if dead_band < 0 or (max_rate_hz is not None and max_rate_hz <= 0):
+                raise ValueError(f"Zona morta e taxa máxima de '{name}' devem ser positivas.")
+            self._dead_bands.append(dead_band)
+            self._min_intervals.append(1.0 / max_rate_hz if max_rate_hz else 0.0)
+
+        num_parameters = len(self.names)
+        self._written_values = [None] * num_parameters # Último valor entregue ao sink
+        self._last_write_times = [float("-inf")] * num_parameters
+        self._pending_values = [None] * num_parameters
+
+        # Contadores por parâmetro
+        self.submitted = [0] * num_parameters
+        self.written = [0] * num_parameters
+        self.suppressed_dead_band = [0] * num_parameters # Dentro da zona morta: descartados
+        self.coalesced = [0] * num_parameters            # Substituídos por um valor mais novo antes de serem escritos
+
+    def submit(self, name, value, now = None):
+        """
+        Envia o valor atual de um parâmetro. Retorna True se o sink foi chamado agora.
+
+        Args:
+            name (str): Nome do parâmetro (uma das chaves de 'sinks').
+            value (float): Novo valor.
+            now (float, optional): Tempo atual (time.perf_counter()); útil para testes e replay.
+        """
+        index = self._index[name]
+        value = float(value)
+        self.submitted[index] += 1
+
+        written_value = self._written_values[index]
+        if written_value is not None and abs(value - written_value) < self._dead_bands[index]:
+            # Voltou para perto do valor aplicado: um pendente deixa de ser necessário
+            if self._pending_values[index] is not None:
+                self._pending_values[index] = None
+                self.coalesced[index] += 1
+            self.suppressed_dead_band[index] += 1
+            return False
+
+        if self._pending_values[index] is not None:
+            self.coalesced[index] += 1 # O pendente anterior é substituído: o último valor vence
+        self._pending_values[index] = value
+        return self._flush_index(index, time.perf_counter() if now is None else now)
+
+    def flush(self, now = None):
+        """
+        Escreve os valores pendentes cujo intervalo mínimo já passou. Chamar uma vez por
+        quadro, mesmo sem mãos na imagem, para que o último valor de cada gesto chegue ao sink.
+        Retorna o número de escritas.
+        """
+        now = time.perf_counter() if now is None else now
+        writes = 0
+        for index in range(len(self.names)):
+            if self._pending_values[index] is not None and self._flush_index(index, now):
+                writes += 1
+        return writes
+
+    def _flush_index(self, index, now):
+        if now - self._last_write_times[index] < self._min_intervals[index]:
+            return False # Ainda dentro do intervalo mínimo: fica pendente
+
+        value = self._pending_values[index]
+        self._pending_values[index] = None
+        self._sinks[index](value)
+        self._written_values[index] = value
+        self._last_write_times[index] = now
+        self.written[index] += 1
+        return True
+
+    def get_value(self, name, default = None):
+        """ Retorna o último valor escrito no sink ('default' se nenhum ainda ou se o parâmetro não tem sink). """
+        index = self._index.get(name)
+        if index is None or self._written_values[index] is None:
+            return default
+        return self._written_values[index]
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário por parâmetro com os valores recebidos, as escritas no
+        sink e as escritas suprimidas (zona morta e valores substituídos).
+        '''
+
+        stats = {}
+        for index, name in enumerate(self.names):
+            submitted = self.submitted[index]
+            stats[name] = {
+                "submitted": submitted,
+                "written": self.written[index],
+                "suppressed_dead_band": self.suppressed_dead_band[index],
+                "coalesced": self.coalesced[index],
+                "suppressed_ratio": 1.0 - self.written[index] / submitted if submitted else 0.0,
+            }
+        return stats
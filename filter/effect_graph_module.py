@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+import numpy as np
+
+class ParallelEffectGraph:
+    def __init__(self,
+                 sample_rate,
+                 channels = 2,
+                 blocksize = 1024,
+                 max_workers = None,
+                 dry_level = 1.0):
+        """
+        Executor de efeitos em ramos paralelos (sends), somados em um mix bus pré-alocado.
+
+        Todos os ramos recebem o mesmo bloco de entrada; cada ramo é uma cadeia
+        serial de plugins. Os ramos rodam em threads persistentes (o pedalboard
+        libera o GIL durante o processamento), com o primeiro ramo na própria
+        thread chamadora. Cada worker é acordado e devolve o bloco por um par de
+        locks pré-alocados, sem Future nem fila por bloco. A saída é
+        dry_level * entrada + a soma de return_level * saída de cada ramo.
+
+        Args:
+            sample_rate (int): Taxa de amostragem dos blocos.
+            channels (int): Canais esperados (os buffers se ajustam se a entrada mudar).
+            blocksize (int): Tamanho esperado do bloco (os buffers crescem se preciso).
+            max_workers (int, optional): Threads de trabalho; por padrão, ramos - 1 limitado aos núcleos.
+            dry_level (float): Ganho do sinal seco no mix bus.
+        """
+        if sample_rate <= 0:
+            raise ValueError("A taxa de amostragem (sample_rate) deve ser positiva.")
+
+        self.sample_rate = sample_rate
+        self.dry_level = dry_level
+        self.max_workers = max_workers
+
+        self.branch_names = []
+        self._branch_plugins = []
+        self.return_levels = np.zeros(0, dtype=np.float32)
+        self.branch_last_s = np.zeros(0, dtype=np.float64)
+        self.branch_worst_s = np.zeros(0, dtype=np.float64)
+
+        # Mix bus e uma saída por ramo, pré-alocados
+        self.mix_bus = np.zeros((blocksize, channels), dtype=np.float32)
+        self._branch_outputs = []
+
+        # Workers persistentes: cada um roda um grupo fixo de ramos (1..N). Os locks são usados
+        # como semáforos binários: 'start' acorda o worker e 'done' devolve o bloco ao chamador.
+        self._worker_threads = []
+        self._worker_branches = []
+        self._worker_start_locks = []
+        self._worker_done_locks = []
+        self._worker_errors = []
+        self._workers_running = False
+        self._current_input = None
+
+    def add_branch(self, name, plugins, return_level = 1.0):
+        """
+        Adiciona um ramo (send) ao grafo. Deve ser chamado antes de processar.
+
+        Args:
+            name (str): Nome do ramo (usado nas métricas e em set_return_level).
+            plugins (list): Plugins do pedalboard (ou callables com a mesma assinatura), em série.
+            return_level (float): Ganho do ramo no mix bus.
+        """
+        self.branch_names.append(name)
+        self._branch_plugins.append(tuple(plugins))
+        self.return_levels = np.append(self.return_levels, np.float32(return_level))
+        self.branch_last_s = np.zeros(len(self.branch_names), dtype=np.float64)
+        self.branch_worst_s = np.zeros(len(self.branch_names), dtype=np.float64)
+        self._branch_outputs.append(np.zeros_like(self.mix_bus))
+
+        # Os workers são recriados com o novo número de ramos no próximo bloco
+        self.close()
+
+    def set_return_level(self, name, return_level):
+        self.return_levels[self.branch_names.index(name)] = return_level
+
+    def _ensure_buffers(self, input_block):
+        if self.mix_bus.shape[0] >= len(input_block) and self.mix_bus.shape[1] == input_block.shape[1]:
+            return
+
+        # Só acontece no primeiro bloco maior que o previsto ou quando os canais da faixa mudam
+        buffer_shape = (max(len(input_block), self.mix_bus.shape[0]), input_block.shape[1])
+        self.mix_bus = np.zeros(buffer_shape, dtype=np.float32)
+        self._branch_outputs = [np.zeros(buffer_shape, dtype=np.float32) for _ in self.branch_names]
+
+    def _run_branch(self, branch_index, input_block):
+        branch_start = time.perf_counter()
+
+        processed_chunk = input_block
+        for plugin in self._branch_plugins[branch_index]:
+            processed_chunk = plugin(processed_chunk, self.sample_rate, reset=False)
+
+        # Ganho de retorno aplicado no buffer do próprio ramo, em paralelo com os outros ramos
+        branch_output = self._branch_outputs[branch_index][: len(input_block)]
+        np.multiply(processed_chunk, self.return_levels[branch_index], out=branch_output)
+
+        branch_duration = time.perf_counter() - branch_start
+        self.branch_last_s[branch_index] = branch_duration
+        if branch_duration > self.branch_worst_s[branch_index]:
+            self.branch_worst_s[branch_index] = branch_duration
+
+    def _start_workers(self, num_branches):
+        num_workers = min(self.max_workers or os.cpu_count() or 1, num_branches - 1)
+        self._workers_running = True
+        for worker_index in range(num_workers):
+            start_lock, done_lock = threading.Lock(), threading.Lock()
+            start_lock.acquire()
+            done_lock.acquire()
+            self._worker_branches.append(tuple(range(1 + worker_index, num_branches, num_workers)))
+            self._worker_start_locks.append(start_lock)
+            self._worker_done_locks.append(done_lock)
+            self._worker_errors.append(None)
+            worker_thread = threading.Thread(target=self._worker_loop, args=(worker_index,),
+                                             name=f"EffectGraph-{worker_index}", daemon=True)
+            self._worker_threads.append(worker_thread)
+            worker_thread.start()
+
+    def _worker_loop(self, worker_index):
+        start_lock = self._worker_start_locks[worker_index]
+        done_lock = self._worker_done_locks[worker_index]
+        branches = self._worker_branches[worker_index]
+        while True:
+            start_lock.acquire()
+            if not self._workers_running:
+                done_lock.release()
+                return
+            try:
+                for branch_index in branches:
+                    self._run_branch(branch_index, self._current_input)
+            except Exception as e:
+                self._worker_errors[worker_index] = e
+            done_lock.release()
+
+    def process_into(self, input_block, out_block):
+        """
+        Processa um bloco float32 (samples, channels) e escreve a mistura em 'out_block'
+        (que pode ser o próprio 'input_block').
+        """
+        num_branches = len(self.branch_names)
+        self._ensure_buffers(input_block)
+
+        if num_branches > 1 and not self._worker_threads:
+            self._start_workers(num_branches)
+
+        # Ramos 1..N nos workers; o ramo 0 roda aqui enquanto isso
+        self._current_input = input_block
+        for start_lock in self._worker_start_locks:
+            start_lock.release()
+        try:
+            if num_branches > 0:
+                self._run_branch(0, input_block)
+        finally:
+            # Espera todos os workers mesmo se o ramo 0 falhar: o próximo bloco reusa os buffers
+            for done_lock in self._worker_done_locks:
+                done_lock.acquire()
+        for worker_index, error in enumerate(self._worker_errors):
+            if error is not None:
+                self._worker_errors[worker_index] = None
+                raise error # Propaga exceções dos ramos
+
+        frames = len(input_block)
+        mix_bus = self.mix_bus[:frames]
+        np.multiply(input_block, self.dry_level, out=mix_bus)
+        for branch_index in range(num_branches):
+            mix_bus += self._branch_outputs[branch_index][:frames]
+
+        np.copyto(out_block, mix_bus)
+        return True
+
+    def close(self):
+        """ Encerra os workers (recriados automaticamente se o grafo voltar a processar). """
+        if not self._worker_threads:
+            return
+        self._workers_running = False
+        for start_lock in self._worker_start_locks:
+            start_lock.release()
+        for worker_thread in self._worker_threads:
+            worker_thread.join()
+        self._worker_threads.clear()
+        self._worker_branches.clear()
+        self._worker_start_locks.clear()
+        self._worker_done_locks.clear()
+        self._worker_errors.clear()
@@ -0,0 +1,59 @@
+import numpy as np
+
+class ParameterMailbox:
+    def __init__(self, initial_values: dict):
+        """
+        Caixa de parâmetros com um escritor (loop de visão) e um leitor (thread de áudio), sem locks.
+
+        Os valores ficam em um array estruturado NumPy com dois slots (double
+        buffer). O escritor sempre grava no slot que não está publicado e só
+        depois avança o contador de publicação; o leitor copia o slot publicado
+        e confere, pelo contador de escritas iniciadas, se o escritor não voltou
+        a esse slot durante a cópia.
+
+        Args:
+            initial_values (dict): Nome -> valor inicial de cada parâmetro (float).
+        """
+        self.names = tuple(initial_values.keys())
+        self.dtype = np.dtype([(name, np.float32) for name in self.names])
+
+        self._slots = np.zeros(2, dtype=self.dtype)
+        for name, value in initial_values.items():
+            self._slots[:][name] = value
+        # Visão (2, n_parâmetros) em float32 dos mesmos dados, para cópias vetorizadas
+        self._slot_values = self._slots.view(np.float32).reshape(2, len(self.names))
+
+        self._published = 0      # Número de escritas publicadas; o slot atual é _published % 2
+        self._writes_started = 0 # Número de escritas iniciadas
+
+    def write(self, **values):
+        """
+        Publica novos valores (apenas o loop de visão chama). Parâmetros não informados mantêm o valor atual.
+        """
+        next_sequence = self._published + 1
+        next_slot = next_sequence % 2
+
+        self._writes_started = next_sequence
+        self._slot_values[next_slot] = self._slot_values[self._published % 2]
+        for name, value in values.items():
+            self._slots[next_slot][name] = value
+
+        self._published = next_sequence
+
+    def read_into(self, out):
+        """
+        Copia os valores publicados para 'out' (float32, um valor por parâmetro, na ordem de 'names').
+        Apenas a thread de áudio chama. Retorna o número de sequência lido.
+        """
+        while True:
+            sequence = self._published
+            out[:] = self._slot_values[sequence % 2]
+            # O escritor só volta a este slot na escrita sequence + 2
+            if self._writes_started < sequence + 2:
+                return sequence
+
+    def get_sequence(self):
+        return self._published
+
+    def get_index(self, name):
+        return self.names.index(name)
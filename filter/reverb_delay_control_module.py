@@ -1,5 +1,8 @@
+import time
 import numpy as np
 from pedalboard import Pedalboard, Reverb, Delay
+from filter.parameter_mailbox_module import ParameterMailbox
+from filter.effect_graph_module import ParallelEffectGraph
 
 class ReverbControl:
     def __init__(self, 
@@ -9,7 +12,9 @@ class ReverbControl:
                  initial_wet_level = 0.0, 
                  initial_delay_seconds = 0.6, 
                  initial_delay_feedback = 0.65, 
-                 initial_delay_mix = 0.0):
+                 initial_delay_mix = 0.0,
+                 ramp_seconds = 0.05,
+                 parallel_sends = False):
         """
         Inicializa o controlador de Reverb e delay.
 
@@ -18,11 +23,20 @@ class ReverbControl:
             initial_room_size (float): Tamanho da sala inicial para o reverb (0.0 a 1.0).
             initial_damping (float): Amortecimento inicial do reverb (0.0 a 1.0).
             initial_wet_level (float): Nível de 'wet' (efeito) inicial (0.0 a 1.0).
+            ramp_seconds (float): Duração da rampa linear até um novo valor de parâmetro.
+            parallel_sends (bool): Se True, reverb e delay viram sends paralelos (cada um 100% wet,
+                                   somados ao sinal seco), processados em threads separadas.
+                                   Os ganhos do mix bus seguem os da cadeia serial: seco
+                                   (1 - wet) * (1 - mix), reverb wet * (1 - mix), delay mix.
+                                   A única diferença é que o delay não repete a cauda do reverb.
+                                   Se False, a cadeia serial original (reverb -> delay).
         """
         if sample_rate <= 0:
             raise ValueError("A taxa de amostragem (sample_rate) deve ser positiva.")
             
         self.sample_rate = sample_rate
+        self.ramp_seconds = max(ramp_seconds, 0.0)
+        self.parallel_sends = parallel_sends
 
         # 1. Efeito de Reverb
         self.reverb_effect = Reverb(
@@ -42,6 +56,61 @@ class ReverbControl:
 
         # O Pedalboard pode conter múltiplos efeitos. Por agora, apenas o reverb.
         self.effects_board = Pedalboard([self.reverb_effect, self.delay_effect])
+
+        # Os setters (loop de visão) só escrevem na caixa de parâmetros; quem mexe nos
+        # objetos do pedalboard é o process(), na thread de áudio, uma vez por bloco.
+        self.parameters = ParameterMailbox({
+            "wet_level": initial_wet_level,
+            "room_size": initial_room_size,
+            "damping": initial_damping,
+            "width": 0.9,
+            "delay_mix": initial_delay_mix,
+            "delay_seconds": initial_delay_seconds,
+            "delay_feedback": initial_delay_feedback,
+        })
+        num_parameters = len(self.parameters.names)
+        self._param_current = np.zeros(num_parameters, dtype=np.float32)
+        self.parameters.read_into(self._param_current)
+        self._param_target = self._param_current.copy()
+        self._param_step = np.zeros(num_parameters, dtype=np.float32)
+        self._ramp_blocks_left = 0
+        self._param_sequence = self.parameters.get_sequence()
+        # O tempo de delay muda em degrau: rampá-lo altera o tamanho da linha de delay a cada
+        # bloco (variação de pitch / zipper), então ele vai direto ao alvo
+        self._param_stepped = np.array([name == "delay_seconds" for name in self.parameters.names])
+        # Valores já escritos nos plugins: só os parâmetros que mudaram são reescritos
+        self._param_written = [None] * num_parameters
+        self._parameter_index = {name: index for index, name in enumerate(self.parameters.names)}
+        # Parâmetros escritos diretamente em um atributo de plugin (wet e mix mexem em vários ganhos)
+        self._plugin_attributes = tuple((self._parameter_index[name], plugin, attribute) for name, plugin, attribute in (
+            ("room_size", self.reverb_effect, "room_size"),
+            ("damping", self.reverb_effect, "damping"),
+            ("width", self.reverb_effect, "width"),
+            ("delay_seconds", self.delay_effect, "delay_seconds"),
+            ("delay_feedback", self.delay_effect, "feedback"),
+        ))
+
+        # Tempos por estágio (mesma ordem do effects_board), pré-alocados para a thread de áudio
+        self.stage_names = ("reverb", "delay")
+        self._stages = (self.reverb_effect, self.delay_effect)
+        self.stage_last_s = np.zeros(len(self.stage_names), dtype=np.float64)
+        self.stage_worst_s = np.zeros(len(self.stage_names), dtype=np.float64)
+
+        # Sends paralelos: o wet do reverb e o mix do delay passam a ser ganhos de retorno no mix bus
+        self.effect_graph = None
+        if parallel_sends:
+            self.effect_graph = ParallelEffectGraph(sample_rate)
+            self.effect_graph.add_branch("reverb", [self.reverb_effect])
+            self.effect_graph.add_branch("delay", [self.delay_effect], return_level=initial_delay_mix)
+            # Os tempos por estágio passam a ser os tempos por ramo (mesma ordem)
+            self.stage_last_s = self.effect_graph.branch_last_s
+            self.stage_worst_s = self.effect_graph.branch_worst_s
+            # Cada ramo entrega só o sinal processado; o seco entra uma vez, pelo mix bus
+            self.reverb_effect.wet_level = 1.0
+            self.reverb_effect.dry_level = 0.0
+            self.delay_effect.mix = 1.0
+        self._write_plugin_parameters()
+
         print(f"Controlador de Efeitos (Reverb, Delay) inicializado. SR: {self.sample_rate} Hz")
 
     def set_wet_level(self, wet_level):
@@ -52,8 +121,7 @@ class ReverbControl:
             wet_level (float): Nível de 'wet' entre 0.0 (totalmente seco) e 1.0 (totalmente molhado).
         """
         wet_level = np.clip(wet_level, 0.0, 1.0) # Garante que o valor esteja entre 0 e 1
-        self.reverb_effect.wet_level = wet_level
-        self.reverb_effect.dry_level = 1.0 - wet_level # Mantém o nível de saída total consistente
+        self.parameters.write(wet_level=wet_level) # O dry_level complementar é aplicado no process()
 
     def update_reverb_parameters(self, room_size=None, damping=None, width=None):
         """
@@ -64,27 +132,93 @@ class ReverbControl:
             damping (float, optional): Amortecimento (0.0 a 1.0).
             width (float, optional): Largura do estéreo do reverb (0.0 a 1.0).
         """
+        values = {}
         if room_size is not None:
-            self.reverb_effect.room_size = np.clip(room_size, 0.0, 1.0)
+            values["room_size"] = np.clip(room_size, 0.0, 1.0)
         if damping is not None:
-            self.reverb_effect.damping = np.clip(damping, 0.0, 1.0)
+            values["damping"] = np.clip(damping, 0.0, 1.0)
         if width is not None:
-            self.reverb_effect.width = np.clip(width, 0.0, 1.0)
+            values["width"] = np.clip(width, 0.0, 1.0)
+        if values:
+            self.parameters.write(**values)
 
     # --- Métodos para Delay ---
     def set_delay_mix(self, mix_level):
         """ Define o nível de 'mix' (quantidade de efeito) do delay. """
         mix_level = np.clip(mix_level, 0.0, 1.0) # O mix do delay geralmente não passa muito de 0.5-0.7 para ser usual
-        self.delay_effect.mix = mix_level
+        self.parameters.write(delay_mix=mix_level)
 
     def update_delay_parameters(self, delay_seconds=None, feedback=None):
         """ Atualiza outros parâmetros do delay. """
+        values = {}
         if delay_seconds is not None:
             # Limites de exemplo para tempo de delay
-            self.delay_effect.delay_seconds = np.clip(delay_seconds, 0.01, 4.0) 
+            values["delay_seconds"] = np.clip(delay_seconds, 0.01, 4.0)
         if feedback is not None:
             # Feedback < 1.0 para evitar auto-oscilação infinita
-            self.delay_effect.feedback = np.clip(feedback, 0.0, 0.95)
+            values["delay_feedback"] = np.clip(feedback, 0.0, 0.95)
+        if values:
+            self.parameters.write(**values)
+
+    def get_applied_sequence(self):
+        """ Sequência da caixa de parâmetros lida pelo último bloco processado (thread de áudio). """
+        return self._param_sequence
+
+    def _apply_parameters(self, block_frames):
+        """
+        Lê a caixa de parâmetros uma vez por bloco e avança a rampa linear até o alvo.
+        Chamado apenas pela thread de áudio, antes de processar o bloco.
+        """
+        sequence = self.parameters.get_sequence()
+        if sequence != self._param_sequence:
+            self._param_sequence = self.parameters.read_into(self._param_target)
+            block_seconds = block_frames / self.sample_rate
+            self._ramp_blocks_left = max(int(round(self.ramp_seconds / block_seconds)), 1) if block_seconds > 0 else 1
+            self._param_step[:] = (self._param_target - self._param_current) / self._ramp_blocks_left
+            # Parâmetros em degrau vão ao alvo já neste bloco
+            self._param_step[self._param_stepped] = 0.0
+            self._param_current[self._param_stepped] = self._param_target[self._param_stepped]
+
+        if self._ramp_blocks_left == 0:
+            return
+
+        self._ramp_blocks_left -= 1
+        if self._ramp_blocks_left == 0:
+            self._param_current[:] = self._param_target # Sem erro acumulado no fim da rampa
+        else:
+            self._param_current += self._param_step
+
+        self._write_plugin_parameters()
+
+    def _write_plugin_parameters(self):
+        """ Escreve nos plugins só os parâmetros cujo valor mudou desde a última escrita. """
+        current = self._param_current.tolist()
+        written = self._param_written
+
+        wet_index = self._parameter_index["wet_level"]
+        mix_index = self._parameter_index["delay_mix"]
+        wet_level, delay_mix = current[wet_index], current[mix_index]
+        wet_changed = wet_level != written[wet_index]
+        mix_changed = delay_mix != written[mix_index]
+        if self.effect_graph is None:
+            if wet_changed:
+                self.reverb_effect.wet_level = wet_level
+                self.reverb_effect.dry_level = 1.0 - wet_level # Mantém o nível de saída total consistente
+            if mix_changed:
+                self.delay_effect.mix = delay_mix
+        elif wet_changed or mix_changed:
+            # Os ganhos reproduzem o equilíbrio seco/molhado da cadeia serial, em que o
+            # mix do delay atenua a saída do reverb (seco incluído) por (1 - mix).
+            self.effect_graph.dry_level = (1.0 - wet_level) * (1.0 - delay_mix)
+            self.effect_graph.set_return_level("reverb", wet_level * (1.0 - delay_mix))
+            self.effect_graph.set_return_level("delay", delay_mix)
+        written[wet_index] = wet_level
+        written[mix_index] = delay_mix
+
+        for index, plugin, attribute in self._plugin_attributes:
+            if current[index] != written[index]:
+                setattr(plugin, attribute, current[index])
+                written[index] = current[index]
 
     def process(self, audio_chunk_input):
         """
@@ -102,8 +236,8 @@ class ReverbControl:
             print("Erro no ReverbControl: Input não é um array NumPy.")
             return audio_chunk_input
 
-        # Garante que o input seja float32, pois pedalboard espera isso
-        audio_chunk = audio_chunk_input.astype(np.float32)
+        # Garante float32 C-contíguo, pois pedalboard espera isso (sem cópia se já estiver assim)
+        audio_chunk = np.ascontiguousarray(audio_chunk_input, dtype=np.float32)
 
         # Pedalboard espera (samples, channels). Se for mono (samples,), converte.
         if audio_chunk.ndim == 1:
@@ -115,24 +249,81 @@ class ReverbControl:
             print("Erro no ReverbControl: Formato de áudio inesperado.")
             return audio_chunk_input # Retorna o original se o formato for inválido
 
+        processed_chunk = np.empty_like(reverb_input)
+        if not self.process_into(reverb_input, processed_chunk):
+            return audio_chunk_input # Retorna o original em caso de erro
+
+        # Se o input original era mono 1D, retorna mono 1D
+        if audio_chunk_input.ndim == 1:
+            return processed_chunk[:, 0] # Converte de volta para (samples,)
+
+        return processed_chunk
+
+    def process_into(self, input_block, out_block):
+        """
+        Processa um bloco em buffers do chamador, sem conversão nem cópia do lado Python.
+
+        'out_block' pode ser o próprio 'input_block' (processamento in-place). As
+        únicas alocações por bloco são os arrays de saída que cada plugin do
+        pedalboard cria internamente (a API dele não aceita buffer de destino).
+
+        Args:
+            input_block (np.ndarray): Entrada float32 C-contígua (samples, channels).
+            out_block (np.ndarray): Saída float32 pré-alocada, mesmo formato da entrada.
+
+        Returns:
+            bool: True se processou; False em caso de erro ('out_block' recebe a entrada sem efeito).
+        """
+        if (input_block.dtype != np.float32 or out_block.dtype != np.float32 or input_block.ndim != 2
+                or input_block.shape != out_block.shape or not input_block.flags.c_contiguous):
+            print("Erro no ReverbControl: process_into espera buffers float32 C-contíguos (samples, channels) do mesmo formato.")
+            return False
+
+        self._apply_parameters(len(input_block))
+
         try:
-            # Processa o áudio. A taxa de amostragem do board já foi definida.
-            # O segundo argumento para board() é a taxa de amostragem DO CHUNK ATUAL,
-            # que deve ser a mesma com a qual o board foi inicializado para evitar reamostragem.
-            processed_chunk = self.effects_board(reverb_input, self.sample_rate)
-            
-            # Se o input era mono (samples,1) e o reverb produziu estéreo (samples,2),
-            # e quisermos manter mono, podemos pegar um canal ou mixar.
-            # No entanto, o efeito Reverb do pedalboard geralmente mantém o número de canais do input.
-            # Se o input for (samples,1), a saída será (samples,1).
-            # Se o input for (samples,2), a saída será (samples,2).
-
-            # Se o input original era mono 1D, retorna mono 1D
-            if audio_chunk_input.ndim == 1 and processed_chunk.ndim == 2 and processed_chunk.shape[1] == 1:
-                return processed_chunk[:, 0] # Converte de volta para (samples,)
-            
-            return processed_chunk
-        
+            if self.effect_graph is not None:
+                return self.effect_graph.process_into(input_block, out_block)
+
+            # Processa o áudio. Os plugins são chamados um a um para medir o tempo de cada estágio.
+            # O segundo argumento é a taxa de amostragem DO CHUNK ATUAL, que deve ser a mesma
+            # com a qual o board foi inicializado para evitar reamostragem.
+            processed_chunk = input_block
+            for stage_index in range(len(self._stages)):
+                stage_start = time.perf_counter()
+                # reset=False: a cauda do reverb e as repetições do delay continuam entre blocos
+                processed_chunk = self._stages[stage_index](processed_chunk, self.sample_rate, reset=False)
+                stage_duration = time.perf_counter() - stage_start
+
+                self.stage_last_s[stage_index] = stage_duration
+                if stage_duration > self.stage_worst_s[stage_index]:
+                    self.stage_worst_s[stage_index] = stage_duration
+
+            # O Reverb e o Delay do pedalboard mantêm o número de canais da entrada
+            np.copyto(out_block, processed_chunk)
+            return True
+
         except Exception as e:
             print(f"Erro inesperado no ReverbControl.process: {e}")
-            return audio_chunk_input # Retorna o original em caso de erro
\ No newline at end of file
+            if out_block is not input_block:
+                np.copyto(out_block, input_block)
+            return False
+
+    def get_stage_times(self):
+        '''
+        Retorna o último e o pior tempo (µs) de cada estágio de efeito.
+        '''
+
+        return {
+            name: {"last_us": last_s * 1e6, "worst_us": worst_s * 1e6}
+            for name, last_s, worst_s in zip(self.stage_names, self.stage_last_s.tolist(), self.stage_worst_s.tolist())
+        }
+
+    def reset_stage_times(self):
+        self.stage_last_s[:] = 0
+        self.stage_worst_s[:] = 0
+
+    def close(self):
+        """ Encerra as threads dos sends paralelos, se houver. """
+        if self.effect_graph is not None:
+            self.effect_graph.close()
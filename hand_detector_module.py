@@ -1,15 +1,73 @@
+import math
+import time
+import operator
+import itertools
 import cv2
 import mediapipe as mp
 import numpy as np
 
+from audio_metrics_module import DurationHistogram
+
+_LANDMARK_XYZ = operator.attrgetter('x', 'y', 'z')
+
 class HandDetector:
+    NUM_LANDMARKS = 21
+    LEFT = 0 # Valores do array de lateralidade (handedness) de find_landmarks()
+    RIGHT = 1
+    MIN_ROI_SIZE_PX = 64 # Menor lado considerado para a caixa das mãos (mãos distantes ganham margem mínima)
+
     def __init__(self, 
                  mode: bool = False, 
                  number_hands: int = 2, 
                  model_complexity: int = 1,
                  min_detection_confidence: float = 0.5,
-                 min_tracking_confidence: float = 0.5):
-        
+                 min_tracking_confidence: float = 0.5,
+                 inference_height: int = None,
+                 adaptive_rate: bool = False,
+                 max_skipped_frames: int = 3,
+                 motion_threshold: float = 0.01,
+                 inference_budget: float = 0.5,
+                 roi_tracking: bool = False,
+                 roi_padding: float = 0.5,
+                 full_detection_interval: int = 15,
+                 max_roi_fraction: float = 0.6):
+        """
+        Detector de mãos com o MediaPipe Hands.
+
+        Args:
+            inference_height (int, optional): Altura (px) da imagem usada na detecção. O quadro é
+                reduzido com um único cv2.resize (mantendo a proporção) em um buffer reutilizado;
+                as landmarks continuam nas coordenadas do quadro original. None (ou uma altura
+                maior que a do quadro) detecta na resolução do quadro.
+            adaptive_rate (bool): Roda o modelo em uma taxa variável. Nos quadros pulados as
+                landmarks são previstas com um modelo de velocidade constante, então
+                find_positions() continua entregando um quadro de landmarks por frame.
+            max_skipped_frames (int): Máximo de quadros previstos seguidos entre duas detecções.
+            motion_threshold (float): Deslocamento por quadro (coordenadas normalizadas, 0 a 1)
+                a partir do qual o modelo roda em todo quadro. Mãos mais lentas permitem pular
+                proporcionalmente mais quadros.
+            inference_budget (float): Fração máxima do tempo de cada quadro gasta no modelo;
+                se o modelo for mais caro, quadros são pulados mesmo com as mãos em movimento.
+            roi_tracking (bool): Com mãos rastreadas, detecta só em um recorte em volta delas (a união
+                das caixas das landmarks, com margem), na mesma escala da detecção no quadro inteiro.
+                Se alguma mão sumir do recorte, a detecção é refeita no quadro inteiro no mesmo quadro.
+                Os recortes (de tamanho e posição variáveis) vão para uma segunda instância do
+                Hands em modo imagem estática, sem estado de rastreamento entre quadros.
+            roi_padding (float): Margem de cada lado do recorte, em frações do maior lado da caixa das mãos.
+            full_detection_interval (int): A cada quantas detecções uma roda no quadro inteiro (para
+                encontrar mãos que entraram no quadro).
+            max_roi_fraction (float): Fração máxima da área do quadro para usar o recorte (mãos muito
+                afastadas cobrem quase o quadro inteiro).
+        """
+        if inference_height is not None and inference_height <= 0:
+            raise ValueError("A altura de inferência (inference_height) deve ser positiva.")
+        if max_skipped_frames < 0 or motion_threshold <= 0 or not 0 < inference_budget <= 1:
+            raise ValueError("Parâmetros da taxa adaptativa inválidos (max_skipped_frames >= 0, "
+                             "motion_threshold > 0, 0 < inference_budget <= 1).")
+        if roi_padding < 0 or full_detection_interval < 1 or not 0 < max_roi_fraction <= 1:
+            raise ValueError("Parâmetros do rastreamento por recorte inválidos (roi_padding >= 0, "
+                             "full_detection_interval >= 1, 0 < max_roi_fraction <= 1).")
+
         # Parametros de inicialização do Hands mediapipe
         self.mode = mode
         self.number_hands = number_hands
@@ -29,15 +87,266 @@ class HandDetector:
         self.mp_draw = mp.solutions.drawing_utils
         self.results = None
 
+        # Landmarks do quadro atual em arrays pré-alocados (preenchidos a cada detecção ou previsão)
+        self.num_hands = 0
+        self._normalized_points = np.zeros((number_hands, self.NUM_LANDMARKS, 3), dtype=np.float32)
+        self._handedness = np.zeros(number_hands, dtype=np.int8)
+        self._scores = np.zeros(number_hands, dtype=np.float32)
+        self._landmarks_px = np.zeros((number_hands, self.NUM_LANDMARKS, 3), dtype=np.float32)
+        self._pixel_scale = np.zeros(3, dtype=np.float32)
+
+        # Resolução de inferência e buffers reutilizados (recriados só se o tamanho do quadro mudar)
+        self.inference_height = inference_height
+        self.inference_size = None # (largura, altura) usada na última detecção
+        self._rgb_storage = np.empty(0, dtype=np.uint8)
+        self._small_storage = np.empty(0, dtype=np.uint8)
+
+        # Rastreamento por recorte (ROI) em volta das mãos já encontradas
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.full_detection_interval = full_detection_interval
+        self.max_roi_fraction = max_roi_fraction
+        # O modo de vídeo do Hands reaproveita a região da mão do quadro anterior, o que só vale
+        # para imagens do mesmo tamanho: recortes usam uma instância própria em modo imagem estática
+        self.roi_hands = None
+        if roi_tracking:
+            self.roi_hands = self.mp_hands.Hands(True,
+                                                 self.number_hands,
+                                                 self.complexity,
+                                                 self.min_detection_confidence,
+                                                 self.min_tracking_confidence)
+        self._detections_since_full = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        self.tracking_losses = 0
+        self._inference_pixels = 0
+        self._full_frame_pixels = 0
+
+        # Taxa de inferência adaptativa e previsão das landmarks (coordenadas normalizadas)
+        self.adaptive_rate = adaptive_rate
+        self.max_skipped_frames = max_skipped_frames
+        self.motion_threshold = motion_threshold
+        self.inference_budget = inference_budget
+        self._detected_points = None # (mãos, 21, 3) da última detecção
+        self._velocity = None        # Deslocamento por quadro, mesmo formato
+        self._velocity_known = False
+        self._frames_since_detection = 0
+        self._last_frame_time = None
+        self._frame_time_ema = 0.0
+        self._inference_time_ema = 0.0
+
+        self.inference_metrics = DurationHistogram(1 / 30) # Tempo do modelo (orçamento de um quadro a 30 FPS)
+        self.frames = 0
+        self.predicted_frames = 0
+        self._prediction_errors = 0
+        self._prediction_error_sum_px = 0.0
+        self._prediction_error_worst_px = 0.0
+
+    def _full_inference_size(self, height, width):
+        # Tamanho da imagem de inferência para o quadro inteiro (mantendo a proporção)
+        if self.inference_height is None or self.inference_height >= height:
+            return (width, height)
+        return (max(1, round(width * self.inference_height / height)), self.inference_height)
+
+    def _prepare_input(self, img: np.ndarray, inference_size):
+        # Imagem RGB no tamanho de inferência, escrita em views contíguas de buffers reutilizados
+        # (os recortes do modo ROI mudam de tamanho a cada quadro; os buffers só crescem)
+        width, height = inference_size
+        needed = width * height * 3
+        if self._rgb_storage.size < needed:
+            self._rgb_storage = np.empty(needed, dtype=np.uint8)
+            self._small_storage = np.empty(needed, dtype=np.uint8)
+        rgb = self._rgb_storage[:needed].reshape(height, width, 3)
+
+        source = img
+        if (img.shape[1], img.shape[0]) != inference_size:
+            source = self._small_storage[:needed].reshape(height, width, 3)
+            # INTER_AREA: a média dos pixels evita o aliasing da redução
+            cv2.resize(img, inference_size, dst=source, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=rgb)
+        return rgb
+
+    def _tracking_crop(self, img_shape):
+        """
+        Recorte (x0, y0, x1, y1), em pixels do quadro, em volta das mãos rastreadas:
+        a união das caixas das landmarks atuais, com margem. Retorna None quando a
+        detecção deve rodar no quadro inteiro.
+        """
+        if self.num_hands == 0:
+            return None # Rastreamento perdido: procura as mãos no quadro inteiro
+        if self._detections_since_full + 1 >= self.full_detection_interval:
+            return None # Re-detecção periódica (mãos novas entrando no quadro)
+
+        height, width = img_shape[:2]
+        points = self._normalized_points[: self.num_hands, :, :2]
+        x_min, y_min = points.min(axis=(0, 1)) * (width, height)
+        x_max, y_max = points.max(axis=(0, 1)) * (width, height)
+        padding = max(x_max - x_min, y_max - y_min, self.MIN_ROI_SIZE_PX) * self.roi_padding
+
+        x0, y0 = max(int(x_min - padding), 0), max(int(y_min - padding), 0)
+        x1, y1 = min(int(x_max + padding) + 1, width), min(int(y_max + padding) + 1, height)
+        if x0 >= x1 or y0 >= y1 or (x1 - x0) * (y1 - y0) > self.max_roi_fraction * width * height:
+            return None # Recorte vazio ou grande demais: o quadro inteiro custa quase o mesmo
+        return (x0, y0, x1, y1)
+
+    def _detect(self, img: np.ndarray, crop = None):
+        # Roda o MediaPipe no quadro inteiro ou em um recorte; landmarks sempre normalizadas pelo quadro inteiro
+        height, width = img.shape[:2]
+        full_size = self._full_inference_size(height, width)
+        if crop is None:
+            source, inference_size = img, full_size
+        else:
+            x0, y0, x1, y1 = crop
+            source = img[y0:y1, x0:x1]
+            # Mesma escala (pixels de inferência por pixel do quadro) da detecção no quadro inteiro
+            scale = full_size[1] / height
+            inference_size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+
+        img_rgb = self._prepare_input(source, inference_size)
+        self.inference_size = inference_size
+        self._inference_pixels += inference_size[0] * inference_size[1]
+        results = (self.hands if crop is None else self.roi_hands).process(img_rgb)
+
+        if crop is not None and results.multi_hand_landmarks:
+            # Coordenadas do recorte -> coordenadas normalizadas do quadro inteiro
+            crop_width, crop_height = x1 - x0, y1 - y0
+            for hand_landmarks in results.multi_hand_landmarks:
+                for lm in hand_landmarks.landmark:
+                    lm.x = (x0 + lm.x * crop_width) / width
+                    lm.y = (y0 + lm.y * crop_height) / height
+                    lm.z = lm.z * crop_width / width
+        return results
+
+    def _inference_interval(self):
+        # Quadros entre duas detecções: limitado pelo movimento das mãos e pelo orçamento de CPU
+        max_interval = self.max_skipped_frames + 1
+        if not self._velocity_known:
+            motion_interval = 1 # Mão recém-detectada: a velocidade ainda não foi medida
+        else:
+            speed = float(np.abs(self._velocity[..., :2]).max())
+            motion_interval = max_interval if speed == 0.0 else int(self.motion_threshold / speed)
+
+        budget_interval = 1
+        if self._frame_time_ema > 0.0:
+            budget_interval = math.ceil(self._inference_time_ema / (self.inference_budget * self._frame_time_ema))
+        return min(max(motion_interval, budget_interval, 1), max_interval)
+
+    def _should_predict(self):
+        # Sem mãos rastreadas o modelo precisa rodar para encontrá-las
+        if not self.adaptive_rate or self._detected_points is None:
+            return False
+        return self._frames_since_detection + 1 < self._inference_interval()
+
+    def _load_results(self):
+        # Copia as landmarks normalizadas, a lateralidade e a confiança da detecção para os arrays
+        hands = self.results.multi_hand_landmarks or ()
+        self.num_hands = min(len(hands), self.number_hands)
+        values_per_hand = self.NUM_LANDMARKS * 3
+        for hand_idx in range(self.num_hands):
+            # np.fromiter lê os campos dos protobufs sem montar listas intermediárias
+            coordinates = itertools.chain.from_iterable(map(_LANDMARK_XYZ, hands[hand_idx].landmark))
+            self._normalized_points[hand_idx].reshape(-1)[:] = np.fromiter(coordinates, np.float32, values_per_hand)
+            classification = self.results.multi_handedness[hand_idx].classification[0]
+            self._handedness[hand_idx] = self.RIGHT if classification.label == "Right" else self.LEFT
+            self._scores[hand_idx] = classification.score
+
+    def _predict_landmarks(self, update_results):
+        # Velocidade constante a partir da última detecção, escrita direto no array das landmarks
+        self._frames_since_detection += 1
+        points = self._normalized_points[: self.num_hands]
+        np.multiply(self._velocity, self._frames_since_detection, out=points)
+        points += self._detected_points
+        if update_results:
+            # O desenho do MediaPipe lê os resultados, não o array
+            for hand_landmarks, hand_points in zip(self.results.multi_hand_landmarks, points.tolist()):
+                for lm, (x, y, z) in zip(hand_landmarks.landmark, hand_points):
+                    lm.x, lm.y, lm.z = x, y, z
+
+    def _update_tracking(self, img_shape):
+        # Nova detecção: mede o erro da previsão (se houve quadros previstos) e atualiza a velocidade
+        if self.num_hands == 0:
+            self._detected_points = self._velocity = None
+            return
+
+        points = self._normalized_points[: self.num_hands].copy()
+        frames_elapsed = self._frames_since_detection + 1
+        previous = self._detected_points
+
+        if previous is not None and previous.shape == points.shape:
+            if len(points) == 2:
+                # O MediaPipe pode trocar a ordem das mãos: pareia pelo pulso mais próximo
+                kept = np.abs(points[:, 0, :2] - previous[:, 0, :2]).sum()
+                swapped = np.abs(points[:, 0, :2] - previous[::-1, 0, :2]).sum()
+                if swapped < kept:
+                    previous = previous[::-1]
+                    self._velocity = self._velocity[::-1]
+
+            if frames_elapsed > 1:
+                height, width = img_shape[:2]
+                predicted = previous + self._velocity * frames_elapsed
+                error_px = float(np.hypot((points[..., 0] - predicted[..., 0]) * width,
+                                          (points[..., 1] - predicted[..., 1]) * height).mean())
+                self._prediction_errors += 1
+                self._prediction_error_sum_px += error_px
+                self._prediction_error_worst_px = max(self._prediction_error_worst_px, error_px)
+
+            self._velocity = (points - previous) / frames_elapsed
+            self._velocity_known = True
+        else:
+            self._velocity = np.zeros_like(points)
+            self._velocity_known = False
+
+        self._detected_points = points
+        self._frames_since_detection = 0
+
     def find_hands(self, 
                     img: np.ndarray, 
                    draw_hands: bool = True):
-        
-        # Converte a imagem para RGB
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
-        # Faz a detecção das mãos --> Retorna um objeto com as landmarks (listas)
-        self.results = self.hands.process(img_rgb)
+        frame_time = time.perf_counter()
+        if self._last_frame_time is not None:
+            frame_interval = frame_time - self._last_frame_time
+            if self._frame_time_ema == 0.0:
+                self._frame_time_ema = frame_interval
+            else:
+                self._frame_time_ema += 0.1 * (frame_interval - self._frame_time_ema)
+        self._last_frame_time = frame_time
+        self.frames += 1
+
+        if self._should_predict():
+            # Quadro pulado: landmarks previstas, sem rodar o modelo
+            self._predict_landmarks(update_results=draw_hands)
+            self.predicted_frames += 1
+        else:
+            inference_start = time.perf_counter()
+            crop = self._tracking_crop(img.shape) if self.roi_tracking else None
+            tracked_hands = self.num_hands
+
+            # Faz a detecção das mãos --> Retorna um objeto com as landmarks (listas)
+            results = self._detect(img, crop) if crop is not None else None
+            if results is not None and len(results.multi_hand_landmarks or ()) >= tracked_hands:
+                self.roi_detections += 1
+                self._detections_since_full += 1
+            else:
+                if crop is not None:
+                    self.tracking_losses += 1 # Alguma mão saiu do recorte: refaz no quadro inteiro
+                results = self._detect(img)
+                self.full_detections += 1
+                self._detections_since_full = 0
+            self.results = results
+            self._load_results()
+            full_width, full_height = self._full_inference_size(*img.shape[:2])
+            self._full_frame_pixels += full_width * full_height
+
+            inference_time = time.perf_counter() - inference_start
+            self.inference_metrics.record(inference_time)
+            if self._inference_time_ema == 0.0:
+                self._inference_time_ema = inference_time
+            else:
+                self._inference_time_ema += 0.1 * (inference_time - self._inference_time_ema)
+
+            if self.adaptive_rate:
+                self._update_tracking(img.shape)
 
         # Verifica se alguma mão foi detectada
         if self.results.multi_hand_landmarks:
@@ -49,25 +358,64 @@ class HandDetector:
                                                 self.mp_hands.HAND_CONNECTIONS)
         return img
     
+    def find_landmarks(self,
+                       img: np.ndarray,
+                       draw_points: bool = False):
+        """
+        Landmarks do quadro atual em arrays, sem listas Python.
+
+        Retorna (landmarks, handedness, scores): landmarks é um array float32
+        (mãos, 21, 3) com x, y e z em pixels do quadro (z na escala de x),
+        handedness um array int8 (HandDetector.LEFT / RIGHT) e scores a confiança
+        da lateralidade. São views de buffers pré-alocados, válidas até a próxima
+        chamada de find_hands().
+        """
+        # As landmarks são normalizadas (0 a 1): mapeiam direto para o quadro original,
+        # seja qual for a resolução de inferência ou o recorte usado
+        height, width = img.shape[:2]
+        self._pixel_scale[:] = (width, height, width)
+        landmarks = self._landmarks_px[: self.num_hands]
+        np.multiply(self._normalized_points[: self.num_hands], self._pixel_scale, out=landmarks)
+
+        if draw_points:
+            for center_x, center_y in landmarks[..., :2].astype(np.int32).reshape(-1, 2).tolist():
+                cv2.circle(img, (center_x, center_y), 5, (255, 0, 0), cv2.FILLED)
+
+        return landmarks, self._handedness[: self.num_hands], self._scores[: self.num_hands]
+
     def find_positions(self, 
                       img: np.ndarray,
                       draw_points: bool = True):
-        
-        all_hands_landmarks = []
-
-        if self.results and self.results.multi_hand_landmarks:
-            for hand_idx, hand_landmarks in enumerate(self.results.multi_hand_landmarks):
-                hand_landmark_list = []
-                height, width, _ = img.shape
+        """
+        Formato antigo (compatibilidade): uma lista com um dicionário por mão, com
+        "landmarks" como listas [id, x, y] em pixels inteiros. Prefira find_landmarks().
+        """
+        landmarks, _, _ = self.find_landmarks(img, draw_points)
 
-                for id, lm in enumerate(hand_landmarks.landmark):
-                    center_x = int(lm.x * width)
-                    center_y = int(lm.y * height)
-
-                    hand_landmark_list.append([id, center_x, center_y])
+        all_hands_landmarks = []
+        for hand_idx, hand_points in enumerate(landmarks[..., :2].astype(np.int32).tolist()):
+            hand_landmark_list = [[id, center_x, center_y] for id, (center_x, center_y) in enumerate(hand_points)]
+            all_hands_landmarks.append({"id": hand_idx, "landmarks": hand_landmark_list, "handedness": self.results.multi_handedness[hand_idx]})
+        return all_hands_landmarks
 
-                    if draw_points:
-                        cv2.circle(img, (center_x, center_y), 5, (255, 0, 0), cv2.FILLED)
+    def get_stats(self):
+        '''
+        Retorna um dicionário com o tempo do modelo, quantos quadros foram previstos
+        (sem rodar o modelo), o erro das previsões, em pixels do quadro, medido
+        na detecção seguinte, e o uso do rastreamento por recorte.
+        '''
 
-                all_hands_landmarks.append({"id": hand_idx, "landmarks": hand_landmark_list, "handedness": self.results.multi_handedness[hand_idx]})
-        return all_hands_landmarks
\ No newline at end of file
+        summary = self.inference_metrics.get_summary()
+        summary["frames"] = self.frames
+        summary["predicted_frames"] = self.predicted_frames
+        summary["skip_ratio"] = self.predicted_frames / self.frames if self.frames else 0.0
+        summary["prediction_error_mean_px"] = (self._prediction_error_sum_px / self._prediction_errors
+                                               if self._prediction_errors else 0.0)
+        summary["prediction_error_worst_px"] = self._prediction_error_worst_px
+        summary["full_detections"] = self.full_detections
+        summary["roi_detections"] = self.roi_detections
+        summary["tracking_losses"] = self.tracking_losses
+        # Pixels processados pelo modelo em relação a sempre detectar no quadro inteiro
+        summary["inference_pixel_ratio"] = (self._inference_pixels / self._full_frame_pixels
+                                            if self._full_frame_pixels else 0.0)
+        return summary
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sounddevice as sd
+
+from audio_engine_module import AudioEngine
+
+class LatencyCalibrator:
+    def __init__(self,
+                 sample_rate: int,
+                 channels: int = 2,
+                 config_path: str = None,
+                 blocksizes = (128, 256, 512, 1024, 2048),
+                 latencies = ('low', 'high'),
+                 lookaheads_ms = (20, 40, 80),
+                 trial_seconds: float = 3.0,
+                 warmup_seconds: float = 0.5,
+                 max_utilisation: float = 0.5):
+        """
+        Calibra o tamanho de bloco e a latência do stream de saída para o dispositivo atual.
+
+        Para cada combinação (do menor bloco para o maior, latência 'low' antes
+        de 'high', menor lookahead antes do maior) o motor toca a faixa com os
+        efeitos reais por alguns segundos, com a saída silenciada. A primeira
+        configuração sem xruns e com folga de CPU (pior renderização abaixo de
+        'max_utilisation' do bloco) é escolhida e salva em JSON, por dispositivo
+        e taxa, com o lookahead e a latência total (render-ahead + stream).
+
+        Args:
+            sample_rate (int): Taxa do stream (taxa nativa do dispositivo).
+            channels (int): Canais do stream.
+            config_path (str, optional): Arquivo JSON com as calibrações salvas.
+            blocksizes (tuple): Tamanhos de bloco testados.
+            latencies (tuple): Valores de 'latency' do sd.OutputStream testados.
+            lookaheads_ms (tuple): Render-ahead do AudioEngine testado, em ms (arredondado para
+                                   blocos com AudioEngine.lookahead_blocks_for).
+            trial_seconds (float): Duração de cada teste.
+            warmup_seconds (float): Início de cada teste ignorado (o stream ainda está estabilizando).
+            max_utilisation (float): Fração máxima do bloco que a renderização pode usar.
+        """
+        if sample_rate <= 0:
+            raise ValueError("A taxa de amostragem (sample_rate) deve ser positiva.")
+        if not blocksizes or not latencies or not lookaheads_ms:
+            raise ValueError("É preciso pelo menos um tamanho de bloco, uma latência e um lookahead para calibrar.")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.config_path = config_path or os.path.join(os.path.expanduser("~"), ".cache", "audio_manipulator", "latency.json")
+        self.blocksizes = sorted(blocksizes)
+        self.latencies = latencies
+        self.lookaheads_ms = sorted(lookaheads_ms)
+        self.trial_seconds = trial_seconds
+        self.warmup_seconds = warmup_seconds
+        self.max_utilisation = max_utilisation
+
+    def get_device_key(self):
+        """ Identifica o dispositivo de saída padrão: nome, host API e taxa. """
+        try:
+            device = sd.query_devices(kind='output')
+            hostapi_name = sd.query_hostapis(device['hostapi'])['name']
+            return f"{device['name']}|{hostapi_name}|{self.sample_rate}"
+        except Exception as e:
+            print(f"Não foi possível identificar o dispositivo de saída: {e}")
+            return f"default|{self.sample_rate}"
+
+    def _read_config_file(self):
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as config_file:
+                return json.load(config_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler as calibrações em '{self.config_path}': {e}")
+            return {}
+
+    def get_lookahead_blocks(self, blocksize):
+        """ Lookaheads testados para um bloco, em blocos, sem repetição (blocos grandes arredondam para o mesmo). """
+        return sorted({AudioEngine.lookahead_blocks_for(lookahead_ms, self.sample_rate, blocksize)
+                       for lookahead_ms in self.lookaheads_ms})
+
+    def load(self):
+        """ Retorna a calibração salva do dispositivo atual (dict com 'blocksize', 'latency' e 'lookahead_blocks'), ou None. """
+        return self._read_config_file().get(self.get_device_key())
+
+    def save(self, result):
+        configs = self._read_config_file()
+        configs[self.get_device_key()] = result
+
+        try:
+            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+            temp_path = self.config_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as config_file:
+                json.dump(configs, config_file, indent=2)
+            os.replace(temp_path, self.config_path)
+            return True
+        except OSError as e:
+            print(f"Erro ao salvar a calibração em '{self.config_path}': {e}")
+            return False
+
+    def run_trial(self, blocksize, latency, lookahead_blocks, audio_data, track_sample_rate, effects_controller = None):
+        """
+        Toca a faixa (silenciada) com um bloco, uma latência e um lookahead e retorna as métricas do teste.
+        """
+        engine = AudioEngine(self.sample_rate,
+                             channels=self.channels,
+                             blocksize=blocksize,
+                             lookahead_blocks=lookahead_blocks,
+                             effects_controller=effects_controller)
+        engine.set_track(audio_data, sample_rate=track_sample_rate)
+
+        def muted_callback(outdata, frames, time_info, status):
+            engine.callback(outdata, frames, time_info, status)
+            outdata.fill(0)
+
+        engine.start()
+        try:
+            stream = sd.OutputStream(samplerate=self.sample_rate,
+                                     channels=self.channels,
+                                     callback=muted_callback,
+                                     dtype='float32',
+                                     blocksize=blocksize,
+                                     latency=latency)
+        except Exception as e:
+            engine.stop()
+            print(f"Configuração indisponível (bloco {blocksize}, latência {latency}): {e}")
+            return None
+
+        with stream:
+            time.sleep(self.warmup_seconds)
+            engine.metrics.reset()
+            ring_underflows_start = engine.underflow_count
+            time.sleep(self.trial_seconds)
+            stream_latency = stream.latency
+        engine.stop()
+
+        metrics = engine.get_metrics()
+        xruns = metrics["output_underflows"] + engine.underflow_count - ring_underflows_start
+        lookahead_s = lookahead_blocks * blocksize / self.sample_rate
+        return {
+            "blocksize": blocksize,
+            "latency": latency,
+            "lookahead_blocks": lookahead_blocks,
+            "stream_latency_s": stream_latency,
+            "lookahead_s": lookahead_s,
+            "total_latency_s": lookahead_s + stream_latency, # Gesto -> saída: render-ahead + buffer do stream
+            "xruns": xruns,
+            "xrun_rate": xruns / self.trial_seconds,
+            "render_worst_utilisation": metrics["render"]["worst_utilisation"],
+            "callback_p99_us": metrics["callback"]["p99_us"],
+        }
+
+    def calibrate(self, audio_data, track_sample_rate, effects_controller = None):
+        """
+        Testa as configurações e salva a menor estável. Se nenhuma for estável,
+        salva o maior bloco com a latência mais alta.
+
+        Returns:
+            dict: A configuração escolhida, com as métricas do teste.
+        """
+        num_configs = sum(len(self.get_lookahead_blocks(blocksize)) for blocksize in self.blocksizes) * len(self.latencies)
+        print(f"Calibrando o stream de saída ({num_configs} configurações no máximo)...")
+
+        last_result = None
+        for blocksize in self.blocksizes:
+            for latency in self.latencies:
+                for lookahead_blocks in self.get_lookahead_blocks(blocksize):
+                    result = self.run_trial(blocksize, latency, lookahead_blocks, audio_data, track_sample_rate, effects_controller)
+                    if result is None:
+                        break # O stream não abre com este bloco e latência, qualquer que seja o lookahead
+
+                    last_result = result
+                    stable = result["xruns"] == 0 and result["render_worst_utilisation"] < self.max_utilisation
+                    print(f"  bloco {blocksize:>5}, latência {str(latency):>5}, lookahead {lookahead_blocks} blocos: "
+                          f"{result['xruns']} xruns, pior renderização {result['render_worst_utilisation'] * 100:.0f}% do bloco, "
+                          f"latência total {result['total_latency_s'] * 1000:.0f} ms{' -> estável' if stable else ''}")
+                    if stable:
+                        self.save(result)
+                        return result
+
+        fallback = {"blocksize": self.blocksizes[-1], "latency": self.latencies[-1],
+                    "lookahead_blocks": self.get_lookahead_blocks(self.blocksizes[-1])[-1]}
+        if last_result is not None:
+            fallback.update({key: value for key, value in last_result.items() if key not in fallback})
+        print(f"Nenhuma configuração estável; usando bloco {fallback['blocksize']}, latência {fallback['latency']} "
+              f"e lookahead de {fallback['lookahead_blocks']} blocos.")
+        self.save(fallback)
+        return fallback
+
+    def load_or_calibrate(self, audio_data, track_sample_rate, effects_controller = None, force = False):
+        """ Usa a calibração salva deste dispositivo ou, se não houver (ou 'force'), calibra agora. """
+        if not force:
+            saved_result = self.load()
+            if saved_result is not None:
+                print(f"Calibração salva: bloco {saved_result['blocksize']}, latência {saved_result['latency']}, "
+                      f"lookahead {saved_result.get('lookahead_blocks', '?')} blocos.")
+                return saved_result
+
+        return self.calibrate(audio_data, track_sample_rate, effects_controller)
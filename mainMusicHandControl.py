@@ -8,8 +8,18 @@ import sounddevice as sd
 # Importando classes de módulos
 from hand_detector_module import HandDetector
 from volume_control_module import SystemVolumeControl
-from audio_control_module import AudioControl
+from audio_control_module import AudioControl, StreamingAudioData
+from waveform_renderer_module import WaveformRenderer, SpectrumRenderer
+from spectrum_analyser_module import SpectrumAnalyser
+from overlay_compositor_module import TextSpriteCache, OverlayPanel
+from camera_capture_module import ThreadedCapture
+from control_rate_module import ControlRateLimiter
 from filter.reverb_delay_control_module import ReverbControl # Classe que agora lida com Reverb e Delay
+from audio_engine_module import AudioEngine
+from pcm_cache_module import PcmDiskCache
+from latency_calibration_module import LatencyCalibrator
+from audio_backend_module import create_output_backend
+from automation_module import AutomationRecorder
 
 # --- Variáveis Globais para Reprodução de Áudio e Efeitos ---
 current_playback_frame = 0
@@ -17,8 +27,31 @@ playback_active = False
 audio_data_global = None
 sample_rate_global = 0
 playback_stream = None
+audio_engine_global = None
+retired_audio_data = [] # Leitores em streaming de faixas substituídas, fechados quando o motor as solta
+
+# --- Configurações do Motor de Áudio ---
+AUDIO_BLOCKSIZE = 1024
+AUDIO_LOOKAHEAD_MS = 40 # Render-ahead à frente do callback (somado à latência do dispositivo entre gesto e som)
+AUDIO_CHANNELS = 2 # O stream fica aberto durante toda a sessão; o motor ajusta os canais de cada faixa
+AUDIO_CALIBRATE = False # Mede blocos/latências neste dispositivo e salva a menor configuração estável
+LATENCY_CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "audio_manipulator", "latency.json")
+AUDIO_BACKEND = 'sounddevice' # 'null' (descarta) ou 'wav' (grava em AUDIO_BACKEND_WAV_PATH) rodam sem placa de som
+AUDIO_BACKEND_WAV_PATH = "sessao.wav"
+AUDIO_STREAMING = False # Lê o arquivo em streaming, com memória constante (útil para sets longos)
+AUDIO_STORAGE = 'auto' # PCM inteiro em memória quando não perde resolução ('auto', 'float32', 'int16' ou 'int24')
+
+# --- Configurações do Cache de PCM em Disco ---
+PCM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "audio_manipulator", "pcm")
+PCM_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024 # 4 GB
+
+# --- Gravação de Automação ---
+# Ex.: "sessions/performance.npz" grava os gestos para replay/bounce com automation_module.py
+AUTOMATION_RECORD_PATH = None
+automation_recorder = None
 
 # Efeitos
+EFFECTS_PARALLEL_SENDS = False # Reverb e delay como sends paralelos em threads separadas (em vez de em série)
 effects_controller_global = None
 reverb_wet_level_gesture = 0.0
 delay_mix_gesture = 0.0
@@ -30,65 +63,43 @@ WAVEFORM_COLOR = (255, 255, 255)
 WAVEFORM_CENTER_LINE_COLOR = (255, 255, 255)
 WAVEFORM_LINE_THICKNESS = 1
 
+# --- Configurações da Câmera ---
+CAMERA_SOURCE = 0 # Índice da câmera, ou o caminho de um vídeo para testar sem webcam
+HAND_INFERENCE_HEIGHT = 720 # Altura da imagem usada na detecção das mãos (None = resolução da câmera)
+HAND_ADAPTIVE_RATE = True # Pula a detecção com as mãos paradas e prevê as landmarks nos quadros pulados
+HAND_ROI_TRACKING = False # Detecta só em um recorte em volta das mãos (quadro inteiro periodicamente); o recorte
+                          # refaz a detecção da palma a cada quadro: ligue só se benchmark_hand_inference.py mostrar ganho
+
+# --- Configurações da Camada de Controle ---
+# Os gestos só chegam ao volume do sistema (chamada COM) e aos efeitos quando a mudança é relevante
+CONTROL_VOLUME_DEAD_BAND = 1.0 # Pontos percentuais
+CONTROL_VOLUME_MAX_RATE_HZ = 20
+CONTROL_EFFECTS_DEAD_BAND = 0.01
+CONTROL_EFFECTS_MAX_RATE_HZ = 30
+
+# --- Configurações do HUD ---
+HUD_FPS_REFRESH_S = 0.5 # Intervalo de atualização do FPS mostrado
+
+# --- Configurações do Analisador de Espectro ---
+SPECTRUM_ENABLED = True # FFT em uma thread própria sobre os blocos que o AudioEngine está tocando
+SPECTRUM_FFT_SIZE = 2048
+SPECTRUM_BANDS = 48
+SPECTRUM_UPDATE_HZ = 30
+SPECTRUM_WIDTH_PX = 480
+SPECTRUM_HEIGHT_PX = 100
+SPECTRUM_COLOR = (0, 200, 255)
+spectrum_analyser = None
+
 troca = True
 tempo_inicial_em_segundos = time.time() + 100000
 aux = True
 
 # --- Função de Callback para reprodução e efeitos de áudio ---
+# A leitura da faixa, os efeitos e o ajuste de canais rodam na thread produtora
+# do AudioEngine; o callback do PortAudio apenas copia o próximo bloco pronto.
 def audio_playback_callback(outdata, frames, time_info, status):
-    global current_playback_frame, playback_active, audio_data_global, sample_rate_global
-    global effects_controller_global # pitch_semitones removido daqui
-
-    if status:
-        if status.output_underflow: print("Alerta: Output underflow no stream de áudio!")
-        if status.output_overflow: print("Alerta: Output overflow no stream de áudio!")
-        # print(f"Status do stream de áudio: {status}") 
-
-    if playback_active and audio_data_global is not None and sample_rate_global > 0:
-        remaining_frames_in_song = len(audio_data_global) - current_playback_frame
-        frames_to_process_from_song = min(frames, remaining_frames_in_song)
-
-        if frames_to_process_from_song > 0:
-            original_chunk = audio_data_global[current_playback_frame : current_playback_frame + frames_to_process_from_song]
-            processed_chunk = original_chunk.astype(np.float32)
-
-            if effects_controller_global is not None:
-                try:
-                    processed_chunk = effects_controller_global.process(processed_chunk)
-                except Exception as e:
-                    print(f"Erro no processamento de efeitos: {e}")
-            
-            actual_processed_frames = len(processed_chunk)
-            frames_to_fill_in_outdata = min(actual_processed_frames, frames)
-
-            if frames_to_fill_in_outdata > 0:
-                chunk_to_output = processed_chunk[:frames_to_fill_in_outdata]
-                if chunk_to_output.ndim == 1 and outdata.ndim == 2 and outdata.shape[1] == 2:
-                    chunk_to_output = np.tile(chunk_to_output[:, np.newaxis], (1, 2))
-                elif chunk_to_output.ndim == 2 and chunk_to_output.shape[1] == 2 and outdata.ndim == 1:
-                    chunk_to_output = chunk_to_output[:, 0]
-                elif chunk_to_output.ndim == 2 and chunk_to_output.shape[1] == 1 and outdata.ndim == 1:
-                    chunk_to_output = chunk_to_output[:,0]
-
-                try:
-                    if chunk_to_output.shape[0] <= outdata.shape[0] and \
-                       (chunk_to_output.ndim == outdata.ndim and \
-                       (chunk_to_output.ndim == 1 or chunk_to_output.shape[1] == outdata.shape[1])):
-                        outdata[:chunk_to_output.shape[0]] = chunk_to_output
-                    else:
-                        outdata[:frames_to_fill_in_outdata] = 0 
-                except ValueError:
-                    outdata[:frames_to_fill_in_outdata] = 0
-            
-            if frames_to_fill_in_outdata < frames:
-                outdata[frames_to_fill_in_outdata:] = 0
-            
-            current_playback_frame += frames_to_process_from_song
-            if current_playback_frame >= len(audio_data_global):
-                current_playback_frame = 0 
-        else:
-            outdata[:] = 0
-            current_playback_frame = 0
+    if audio_engine_global is not None:
+        audio_engine_global.callback(outdata, frames, time_info, status)
     else:
         outdata[:] = 0
 
@@ -96,34 +107,81 @@ if __name__ == '__main__':
 
     # --- CARREGAMENTO DO ÁUDIO ---
     audio_controller = AudioControl()
+    pcm_cache = PcmDiskCache(PCM_CACHE_DIR, PCM_CACHE_MAX_BYTES)
     audio_file_path = input("Digite o caminho para o seu arquivo de áudio (ex: sua_musica.wav): ")
     
-    audio_loaded_successfully = audio_controller.load_audio(audio_file_path)
+    audio_loaded_successfully = audio_controller.load_audio(audio_file_path, streaming=AUDIO_STREAMING, storage=AUDIO_STORAGE, pcm_cache=pcm_cache)
     if audio_loaded_successfully:
         print(f"Áudio '{os.path.basename(audio_file_path)}' carregado e pronto para uso.")
         audio_data_global = audio_controller.audio_data
         sample_rate_global = audio_controller.sample_rate
+
+        # O stream abre uma única vez na taxa nativa do dispositivo; faixas em
+        # outras taxas são reamostradas pelo AudioEngine
+        try:
+            device_sample_rate = int(sd.query_devices(kind='output')['default_samplerate'])
+        except Exception as e:
+            print(f"Não foi possível consultar o dispositivo de saída: {e}")
+            device_sample_rate = sample_rate_global
         
         try:
-            effects_controller_global = ReverbControl(sample_rate_global) 
+            effects_controller_global = ReverbControl(device_sample_rate, parallel_sends=EFFECTS_PARALLEL_SENDS)
             print("Controlador de Efeitos (Reverb & Delay) global inicializado.")
         except Exception as e:
             print(f"Erro ao inicializar Controlador de Efeitos: {e}")
             effects_controller_global = None
         
+        # Bloco, latência e lookahead: calibração salva deste dispositivo (ou nova, com AUDIO_CALIBRATE)
+        audio_blocksize, audio_latency = AUDIO_BLOCKSIZE, None
+        latency_calibrator = LatencyCalibrator(device_sample_rate, AUDIO_CHANNELS, LATENCY_CONFIG_PATH,
+                                               lookaheads_ms=(AUDIO_LOOKAHEAD_MS / 2, AUDIO_LOOKAHEAD_MS, AUDIO_LOOKAHEAD_MS * 2))
+        if AUDIO_CALIBRATE:
+            stream_config = latency_calibrator.load_or_calibrate(audio_data_global, sample_rate_global, effects_controller_global, force=True)
+        else:
+            stream_config = latency_calibrator.load()
+        if stream_config:
+            audio_blocksize, audio_latency = stream_config["blocksize"], stream_config["latency"]
+        audio_lookahead_blocks = AudioEngine.lookahead_blocks_for(AUDIO_LOOKAHEAD_MS, device_sample_rate, audio_blocksize)
+        if stream_config and "lookahead_blocks" in stream_config: # Calibrações antigas não salvaram o lookahead
+            audio_lookahead_blocks = stream_config["lookahead_blocks"]
+
         playback_active = True
 
         try:
-            sd.default.channels = audio_controller.num_channels
-            playback_stream = sd.OutputStream(
-                samplerate=sample_rate_global,
-                channels=audio_controller.num_channels,
-                callback=audio_playback_callback, 
-                dtype=audio_controller.audio_data.dtype,
-                blocksize=1024 
-            )
+            audio_engine_global = AudioEngine(device_sample_rate,
+                                              channels=AUDIO_CHANNELS,
+                                              blocksize=audio_blocksize,
+                                              lookahead_blocks=audio_lookahead_blocks,
+                                              effects_controller=effects_controller_global)
+            audio_engine_global.set_track(audio_data_global, sample_rate=sample_rate_global, peak_pyramid=audio_controller.peak_pyramid)
+            # O analisador entra antes do start(): o primeiro bloco renderizado já é o primeiro
+            # frame do seu histórico, alinhado com get_output_frame()
+            if SPECTRUM_ENABLED:
+                spectrum_analyser = SpectrumAnalyser(device_sample_rate, AUDIO_CHANNELS, SPECTRUM_FFT_SIZE,
+                                                     SPECTRUM_BANDS, update_hz=SPECTRUM_UPDATE_HZ)
+                audio_engine_global.analyser = spectrum_analyser
+                spectrum_analyser.start(audio_engine_global.get_output_frame)
+            audio_engine_global.start()
+
+            if AUTOMATION_RECORD_PATH:
+                # Bloco, rampa e topologia dos efeitos vão junto: o replay precisa deles para a mesma rampa
+                automation_recorder = AutomationRecorder(device_sample_rate,
+                                                         blocksize=audio_blocksize,
+                                                         ramp_seconds=effects_controller_global.ramp_seconds if effects_controller_global else 0.05,
+                                                         parallel_sends=EFFECTS_PARALLEL_SENDS)
+                automation_recorder.mark_track(audio_file_path)
+
+            sd.default.channels = AUDIO_CHANNELS
+            playback_stream = create_output_backend(AUDIO_BACKEND,
+                                                    device_sample_rate,
+                                                    AUDIO_CHANNELS,
+                                                    audio_blocksize,
+                                                    audio_playback_callback,
+                                                    latency=audio_latency,
+                                                    output_path=AUDIO_BACKEND_WAV_PATH,
+                                                    realtime=True)
             playback_stream.start()
-            print(f"Stream de áudio iniciado a {sample_rate_global} Hz, {audio_controller.num_channels} canal(is).")
+            print(f"Stream de áudio iniciado a {device_sample_rate} Hz, {AUDIO_CHANNELS} canal(is), bloco {audio_blocksize}.")
         except Exception as e:
             print(f"Falha ao iniciar o stream de áudio: {e}")
             playback_active = False
@@ -134,7 +192,8 @@ if __name__ == '__main__':
 
     # --- CONFIGURAÇÃO DA CÂMERA ---
     wCam, hCam = 1920, 1080
-    capture = cv2.VideoCapture(0)
+    # Captura em thread própria: o loop sempre recebe o quadro mais novo (os antigos são descartados)
+    capture = ThreadedCapture(CAMERA_SOURCE)
     if not capture.isOpened():
         print("Erro ao abrir a câmera.")
         if playback_stream: playback_stream.close()
@@ -144,13 +203,37 @@ if __name__ == '__main__':
     wCam_actual = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
     hCam_actual = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
     print(f"Resolução da câmera: {wCam_actual}x{hCam_actual}")
+    capture.start()
 
     previousTime = 0
-    detector = HandDetector(number_hands=2, min_detection_confidence=0.7)
+    detector = HandDetector(number_hands=2, min_detection_confidence=0.7, inference_height=HAND_INFERENCE_HEIGHT,
+                            adaptive_rate=HAND_ADAPTIVE_RATE, roi_tracking=HAND_ROI_TRACKING)
+    waveform_renderer = WaveformRenderer(WAVEFORM_HEIGHT_PX, WAVEFORM_COLOR, WAVEFORM_LINE_THICKNESS, WAVEFORM_CENTER_LINE_COLOR)
+    if spectrum_analyser:
+        spectrum_renderer = SpectrumRenderer(spectrum_analyser.num_bands, SPECTRUM_COLOR)
+        spectrum_levels = np.zeros(spectrum_analyser.num_bands, dtype=np.float32)
+    overlay_sprites = TextSpriteCache(cv2.FONT_HERSHEY_SIMPLEX)
+    hud_panel = OverlayPanel(overlay_sprites)
+    hud_fps = 0.0; hud_frames = 0; hud_fps_time = time.time()
     volume_controller = SystemVolumeControl()
     if volume_controller.volume is None:
         print("Falha ao inicializar SystemVolumeControl.")
 
+    # Gestos -> sinks com zona morta, taxa máxima por parâmetro e o último valor vencendo
+    control_sinks = {}
+    if volume_controller.volume:
+        control_sinks["volume"] = volume_controller.set_volume_level
+    if effects_controller_global:
+        control_sinks["reverb_wet"] = effects_controller_global.set_wet_level
+        control_sinks["delay_mix"] = effects_controller_global.set_delay_mix
+    control_rate = ControlRateLimiter(control_sinks,
+                                      dead_bands={"volume": CONTROL_VOLUME_DEAD_BAND,
+                                                  "reverb_wet": CONTROL_EFFECTS_DEAD_BAND,
+                                                  "delay_mix": CONTROL_EFFECTS_DEAD_BAND},
+                                      max_rates_hz={"volume": CONTROL_VOLUME_MAX_RATE_HZ,
+                                                    "reverb_wet": CONTROL_EFFECTS_MAX_RATE_HZ,
+                                                    "delay_mix": CONTROL_EFFECTS_MAX_RATE_HZ})
+
     # Faixas para gestos
     HAND_DIST_MIN_FINGERS = 30
     HAND_DIST_MAX_FINGERS_EFFECTS = 220 
@@ -175,174 +258,173 @@ if __name__ == '__main__':
         img = cv2.flip(img, 1)
         
         img = detector.find_hands(img, draw_hands=True)
-        detected_hands_data = detector.find_positions(img, draw_points=False)
-
-        if detected_hands_data:
-            if len(detected_hands_data) == 1:
-                hand_data = detected_hands_data[0]
-                landmarks = hand_data.get("landmarks")
-                if landmarks and len(landmarks) > 8:
-                    x1, y1 = landmarks[4][1], landmarks[4][2]
-                    x2, y2 = landmarks[8][1], landmarks[8][2]
-                    cv2.circle(img, (x1, y1), 10, (120, 255, 0), cv2.FILLED)
-                    cv2.circle(img, (x2, y2), 10, (0, 120, 255), cv2.FILLED)
-                    cv2.line(img, (x1, y1), (x2, y2), (200, 200, 200), 2)
-                    length_one_hand = math.hypot(x2 - x1, y2 - y1)
-                    if volume_controller.volume: 
-                         volume_percentage_display = volume_controller.set_volume_percentage(
-                             length_one_hand, HAND_DIST_MIN_FINGERS, HAND_DIST_MAX_FINGERS_EFFECTS
-                         )
-                    if length_one_hand < HAND_DIST_MIN_FINGERS:
-                        cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        # Landmarks em pixels, (mãos, 21, 3), em um array pré-alocado
+        hand_points, hand_sides, hand_scores = detector.find_landmarks(img)
+        num_hands = len(hand_points)
+
+        if num_hands:
+            # Distância polegar-indicador de todas as mãos com uma chamada
+            pinch_lengths = np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 8, :2], axis=1)
+            # Pontas do polegar e do indicador em pixels inteiros, para o desenho
+            fingertips = hand_points[:, (4, 8), :2].astype(np.int32).tolist()
+
+            if num_hands == 1:
+                (x1, y1), (x2, y2) = fingertips[0]
+                cv2.circle(img, (x1, y1), 10, (120, 255, 0), cv2.FILLED)
+                cv2.circle(img, (x2, y2), 10, (0, 120, 255), cv2.FILLED)
+                cv2.line(img, (x1, y1), (x2, y2), (200, 200, 200), 2)
+                length_one_hand = pinch_lengths[0]
+                if volume_controller.volume: 
+                     volume_percentage_display = volume_controller.get_volume_percentage(length_one_hand, HAND_DIST_MIN_FINGERS, HAND_DIST_MAX_FINGERS_EFFECTS)
+                     control_rate.submit("volume", volume_percentage_display)
+                if length_one_hand < HAND_DIST_MIN_FINGERS:
+                    cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
                 
-            elif len(detected_hands_data) == 2:
-                landmarks1 = detected_hands_data[0].get("landmarks") 
-                landmarks2 = detected_hands_data[1].get("landmarks") 
-                
-                if (landmarks1 and len(landmarks1) > 8) and (landmarks2 and len(landmarks2) > 8):
-                    h1_thumb_x, h1_thumb_y = landmarks1[4][1], landmarks1[4][2]
-                    h1_index_x, h1_index_y = landmarks1[8][1], landmarks1[8][2]
-                    h1cx_vol = (h1_thumb_x + h1_index_x) // 2 
-                    h1cy_vol = (h1_thumb_y + h1_index_y) // 2
-
-                    h2_thumb_x, h2_thumb_y = landmarks2[4][1], landmarks2[4][2]
-                    h2_index_x, h2_index_y = landmarks2[8][1], landmarks2[8][2]
-                    h2cx_vol = (h2_thumb_x + h2_index_x) // 2
-                    h2cy_vol = (h2_thumb_y + h2_index_y) // 2
-
-                    # --- LÓGICA DE VOLUME COM DUAS MÃOS ---
-                    # A linha de conexão das mãos para volume agora será substituída pela waveform
-                    # cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (255, 255, 255), 3) # <<< LINHA REMOVIDA/SUBSTITUÍDA
-                    length_volume_two_hands = math.hypot(h2cx_vol - h1cx_vol, h2cy_vol - h1cy_vol)
-                    if volume_controller.volume:
-                        volume_percentage_display = volume_controller.set_volume_percentage(length_volume_two_hands, VOL_DIST_MIN_TWO_HANDS, VOL_DIST_MAX_TWO_HANDS)
-                    # O feedback visual para o volume (linha amarela quando perto) pode ser mantido ou adaptado
-                    if length_volume_two_hands < VOL_DIST_MIN_TWO_HANDS:
-                         cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (0, 255, 255), 2) # Linha de feedback mais fina
-
-                    # --- DESENHAR A FORMA DE ONDA DINAMICAMENTE ENTRE AS MÃOS ---
-                    if audio_loaded_successfully and playback_active and audio_data_global is not None and sample_rate_global > 0 and audio_controller.num_channels is not None:
+            elif num_hands == 2:
+                (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y) = fingertips[0]
+                h1cx_vol = (h1_thumb_x + h1_index_x) // 2 
+                h1cy_vol = (h1_thumb_y + h1_index_y) // 2
+
+                (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y) = fingertips[1]
+                h2cx_vol = (h2_thumb_x + h2_index_x) // 2
+                h2cy_vol = (h2_thumb_y + h2_index_y) // 2
+
+                # --- LÓGICA DE VOLUME COM DUAS MÃOS ---
+                # A linha de conexão das mãos para volume agora será substituída pela waveform
+                # cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (255, 255, 255), 3) # <<< LINHA REMOVIDA/SUBSTITUÍDA
+                length_volume_two_hands = math.hypot(h2cx_vol - h1cx_vol, h2cy_vol - h1cy_vol)
+                if volume_controller.volume:
+                    volume_percentage_display = volume_controller.get_volume_percentage(length_volume_two_hands, VOL_DIST_MIN_TWO_HANDS, VOL_DIST_MAX_TWO_HANDS)
+                    control_rate.submit("volume", volume_percentage_display)
+                # O feedback visual para o volume (linha amarela quando perto) pode ser mantido ou adaptado
+                if length_volume_two_hands < VOL_DIST_MIN_TWO_HANDS:
+                     cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (0, 255, 255), 2) # Linha de feedback mais fina
+
+                # --- DESENHAR A FORMA DE ONDA DINAMICAMENTE ENTRE AS MÃOS ---
+                # Picos da faixa que o AudioEngine está tocando (a troca é aplicada na fronteira de um bloco)
+                peak_pyramid = audio_engine_global.get_peak_pyramid() if audio_engine_global else None
+                if audio_loaded_successfully and playback_active and peak_pyramid is not None:
                         
-                        # Define a área da waveform dinamicamente
-                        wave_x_start = min(h1cx_vol, h2cx_vol)
-                        wave_x_end = max(h1cx_vol, h2cx_vol)
-                        dynamic_waveform_width_px = wave_x_end - wave_x_start
+                    # Define a área da waveform dinamicamente
+                    wave_x_start = min(h1cx_vol, h2cx_vol)
+                    wave_x_end = max(h1cx_vol, h2cx_vol)
+                    dynamic_waveform_width_px = wave_x_end - wave_x_start
                         
-                        # Posição Y central da waveform (média das posições Y das mãos)
-                        dynamic_y_center = (h1cy_vol + h2cy_vol) // 2
+                    # Posição Y central da waveform (média das posições Y das mãos)
+                    dynamic_y_center = (h1cy_vol + h2cy_vol) // 2
                         
-                        if dynamic_waveform_width_px > 10: # Só desenha se houver largura mínima
-                            window_samples = int(WAVEFORM_WINDOW_DURATION_S * sample_rate_global)
-                            center_offset_audio = window_samples // 2
-                            start_sample_abs_audio = current_playback_frame - center_offset_audio
+                    if dynamic_waveform_width_px > 10: # Só desenha se houver largura mínima
+                        current_playback_frame = audio_engine_global.get_playback_frame()
+                        window_samples = int(WAVEFORM_WINDOW_DURATION_S * peak_pyramid.sample_rate)
+                        center_offset_audio = window_samples // 2
+                        start_sample_abs_audio = current_playback_frame - center_offset_audio
                             
-                            audio_segment_shape = (window_samples, audio_data_global.shape[1]) if audio_data_global.ndim > 1 else (window_samples,)
-                            audio_segment_raw = np.zeros(audio_segment_shape, dtype=audio_data_global.dtype)
+                        # Um min/max por pixel, direto do nível certo da pirâmide (volta ao início no loop)
+                        column_mins, column_maxs = peak_pyramid.get_bins(start_sample_abs_audio, window_samples, dynamic_waveform_width_px)
 
-                            for i in range(window_samples):
-                                sample_to_get = (start_sample_abs_audio + i) % len(audio_data_global)
-                                audio_segment_raw[i] = audio_data_global[sample_to_get]
-                            
-                            if audio_controller.num_channels > 1:
-                                waveform_display_data = np.mean(audio_segment_raw, axis=1)
-                            else:
-                                waveform_display_data = audio_segment_raw
-
-                            samples_per_pixel_dynamic = len(waveform_display_data) / dynamic_waveform_width_px
-
-                            for x_local in range(dynamic_waveform_width_px):
-                                s_start = int(x_local * samples_per_pixel_dynamic)
-                                s_end = int((x_local + 1) * samples_per_pixel_dynamic)
-                                s_end = min(s_end, len(waveform_display_data))
-
-                                if s_start < s_end:
-                                    sample_slice = waveform_display_data[s_start:s_end]
-                                    min_val, max_val = np.min(sample_slice), np.max(sample_slice)
-                                    
-                                    # Mapeia para a altura dinâmica
-                                    y_draw_min = int(dynamic_y_center - max_val * (WAVEFORM_HEIGHT_PX / 2))
-                                    y_draw_max = int(dynamic_y_center - min_val * (WAVEFORM_HEIGHT_PX / 2))
-                                    
-                                    draw_x_coord = wave_x_start + x_local
-                                    cv2.line(img, (draw_x_coord, y_draw_min), 
-                                             (draw_x_coord, y_draw_max), 
-                                             WAVEFORM_COLOR, WAVEFORM_LINE_THICKNESS)
-                            # Linha central dinâmica
-                            cv2.line(img, (wave_x_start, dynamic_y_center), 
-                                     (wave_x_end, dynamic_y_center), 
-                                     WAVEFORM_CENTER_LINE_COLOR, 1)
+                        # Todas as colunas (e a linha central) em uma chamada ao OpenCV
+                        waveform_renderer.draw(img, wave_x_start, dynamic_y_center, column_mins, column_maxs)
                     
-                    # --- Controles de Reverb e Delay (mantidos) ---
-                    lengthReverb = math.hypot(h1_index_x - h1_thumb_x, h1_index_y - h1_thumb_y)
-                    cv2.line(img, (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y), (255, 0, 0), 3) 
-                    if audio_loaded_successfully and effects_controller_global:
-                        reverb_wet_level_gesture=np.interp(lengthReverb,[HAND_DIST_MIN_FINGERS,HAND_DIST_MAX_FINGERS_EFFECTS],[REVERB_MIN_WET,REVERB_MAX_WET])
-                        effects_controller_global.set_wet_level(np.clip(reverb_wet_level_gesture,REVERB_MIN_WET,REVERB_MAX_WET));reverb_display=reverb_wet_level_gesture
+                # --- Controles de Reverb e Delay (mantidos) ---
+                lengthReverb = pinch_lengths[0]
+                cv2.line(img, (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y), (255, 0, 0), 3) 
+                if audio_loaded_successfully and effects_controller_global:
+                    reverb_wet_level_gesture=np.interp(lengthReverb,[HAND_DIST_MIN_FINGERS,HAND_DIST_MAX_FINGERS_EFFECTS],[REVERB_MIN_WET,REVERB_MAX_WET])
+                    control_rate.submit("reverb_wet", np.clip(reverb_wet_level_gesture,REVERB_MIN_WET,REVERB_MAX_WET));reverb_display=reverb_wet_level_gesture
                     
-                    lengthDelayControl = math.hypot(h2_index_x - h2_thumb_x, h2_index_y - h2_thumb_y) 
-                    cv2.line(img, (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y), (255, 165, 0), 3) 
-                    if audio_loaded_successfully and effects_controller_global:
-                        delay_mix_gesture=np.interp(lengthDelayControl,[HAND_DIST_MIN_FINGERS,HAND_DIST_MAX_FINGERS_EFFECTS],[DELAY_MIN_MIX,DELAY_MAX_MIX])
-                        effects_controller_global.set_delay_mix(np.clip(delay_mix_gesture,DELAY_MIN_MIX,DELAY_MAX_MIX));delay_display=delay_mix_gesture
-
-                    # print(f"h1_thumb_y: {h1_thumb_y} > h1_index_y: {h1_index_y}")
-                    if h2_index_y > h2_thumb_y:
-                        while troca:
-                            if playback_stream: print("Parando áudio..."); playback_stream.stop(); playback_stream.close(); print("Áudio parado.")
-                            tempo_inicial_em_segundos = time.time()
-                            troca = False
-
-                    if (time.time() - tempo_inicial_em_segundos >= 1) and aux:
-                        aux = False
-                        audio_loaded_successfully = audio_controller.load_audio("music/Addicted.wav")
-                        if audio_loaded_successfully:
-                            print(f"Áudio '{os.path.basename(audio_file_path)}' carregado e pronto para uso.")
-                            audio_data_global = audio_controller.audio_data
-                            sample_rate_global = audio_controller.sample_rate
-                            
-                            try:
-                                effects_controller_global = ReverbControl(sample_rate_global) 
-                                print("Controlador de Efeitos (Reverb & Delay) global inicializado.")
-                            except Exception as e:
-                                print(f"Erro ao inicializar Controlador de Efeitos: {e}")
-                                effects_controller_global = None
-                            
-                            playback_active = True
-
-                            try:
-                                sd.default.channels = audio_controller.num_channels
-                                playback_stream = sd.OutputStream(
-                                    samplerate=sample_rate_global,
-                                    channels=audio_controller.num_channels,
-                                    callback=audio_playback_callback, 
-                                    dtype=audio_controller.audio_data.dtype,
-                                    blocksize=1024 
-                                )
-                                playback_stream.start()
-                                print(f"Stream de áudio iniciado a {sample_rate_global} Hz, {audio_controller.num_channels} canal(is).")
-                            except Exception as e:
-                                print(f"Falha ao iniciar o stream de áudio: {e}")
-                                playback_active = False
-                                audio_loaded_successfully = False
-                        else:
-                            print(f"Falha ao carregar áudio. Funcionalidades de áudio desativadas.")
+                lengthDelayControl = pinch_lengths[1]
+                cv2.line(img, (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y), (255, 165, 0), 3) 
+                if audio_loaded_successfully and effects_controller_global:
+                    delay_mix_gesture=np.interp(lengthDelayControl,[HAND_DIST_MIN_FINGERS,HAND_DIST_MAX_FINGERS_EFFECTS],[DELAY_MIN_MIX,DELAY_MAX_MIX])
+                    control_rate.submit("delay_mix", np.clip(delay_mix_gesture,DELAY_MIN_MIX,DELAY_MAX_MIX));delay_display=delay_mix_gesture
+
+                # print(f"h1_thumb_y: {h1_thumb_y} > h1_index_y: {h1_index_y}")
+                if h2_index_y > h2_thumb_y:
+                    while troca:
+                        # O stream continua aberto: a nova faixa entra no AudioEngine
+                        tempo_inicial_em_segundos = time.time()
+                        troca = False
+
+                if (time.time() - tempo_inicial_em_segundos >= 1) and aux:
+                    aux = False
+                    previous_audio_data = audio_controller.audio_data
+                    audio_loaded_successfully = audio_controller.load_audio("music/Addicted.wav", streaming=AUDIO_STREAMING, storage=AUDIO_STORAGE, pcm_cache=pcm_cache)
+                    if isinstance(previous_audio_data, StreamingAudioData) and previous_audio_data is not audio_controller.audio_data:
+                        # O motor ainda pode estar lendo a faixa anterior: fechada só depois da troca
+                        retired_audio_data.append(previous_audio_data)
+                    if audio_loaded_successfully:
+                        print(f"Áudio '{os.path.basename(audio_controller.filepath)}' carregado e pronto para uso.")
+                        audio_data_global = audio_controller.audio_data
+                        sample_rate_global = audio_controller.sample_rate
+                        playback_active = True
+
+                        if audio_engine_global:
+                            audio_engine_global.set_track(audio_data_global, sample_rate=sample_rate_global, peak_pyramid=audio_controller.peak_pyramid)
+                        if automation_recorder:
+                            automation_recorder.mark_track(audio_controller.filepath)
+                    else:
+                        print(f"Falha ao carregar áudio. Funcionalidades de áudio desativadas.")
                         
             else: # Se nenhuma mão for detectada, não desenha a waveform dinâmica
                 pass
 
+        # Fecha os leitores de faixas que o motor já não usa mais
+        for old_audio_data in retired_audio_data[:]:
+            if not (audio_engine_global and audio_engine_global.is_using_track(old_audio_data)):
+                old_audio_data.close()
+                retired_audio_data.remove(old_audio_data)
+
+        # Valores que ficaram pendentes pela taxa máxima (o último de cada gesto sempre chega ao sink)
+        control_rate.flush()
+
+        # Grava os valores entregues aos sinks (não os valores crus dos gestos). A posição das
+        # mudanças de efeito é corrigida depois para o bloco em que o motor as aplicou.
+        if automation_recorder and audio_engine_global:
+            automation_recorder.record(audio_engine_global.get_render_position(),
+                                       control_rate.get_value("reverb_wet", np.nan),
+                                       control_rate.get_value("delay_mix", np.nan),
+                                       control_rate.get_value("volume", np.nan),
+                                       track_start=audio_engine_global.get_track_start(),
+                                       parameter_sequence=effects_controller_global.parameters.get_sequence() if effects_controller_global else None)
+            automation_recorder.resolve_positions(audio_engine_global.get_parameter_position)
+
         # --- EXIBIÇÕES DE TEXTO NA TELA ---
         currentTime = time.time()
         deltaTime = currentTime - previousTime
         fps = 1 / deltaTime if deltaTime > 0 else 0
         previousTime = currentTime
         
-        font_face = cv2.FONT_HERSHEY_SIMPLEX; font_scale = 0.7; font_thickness = 1
+        font_scale = 0.7; font_thickness = 1
         text_y_start = 30; text_y_offset = 30
 
-        cv2.putText(img,f"FPS: {int(fps)}",(30,text_y_start),font_face,font_scale,(0,255,0),font_thickness)
-        cv2.putText(img,f"Vol: {int(volume_percentage_display)}%",(30,text_y_start+text_y_offset),font_face,font_scale,(255,100,100),font_thickness)
-        cv2.putText(img,f"Reverb: {reverb_display:.2f}",(30,text_y_start+2*text_y_offset),font_face,font_scale,(100,100,255),font_thickness)
-        cv2.putText(img,f"Delay Mix: {delay_display:.2f}",(30,text_y_start+3*text_y_offset),font_face,font_scale,(255,165,0),font_thickness)
+        # FPS médio atualizado a cada HUD_FPS_REFRESH_S (o texto do HUD só muda quando algum valor muda)
+        hud_frames += 1
+        if currentTime - hud_fps_time >= HUD_FPS_REFRESH_S:
+            hud_fps = hud_frames / (currentTime - hud_fps_time)
+            hud_frames = 0; hud_fps_time = currentTime
+
+        hud_items = [(f"FPS: {int(hud_fps)}",(30,text_y_start),font_scale,(0,255,0),font_thickness),
+                     (f"Vol: {int(volume_percentage_display)}%",(30,text_y_start+text_y_offset),font_scale,(255,100,100),font_thickness),
+                     (f"Reverb: {reverb_display:.2f}",(30,text_y_start+2*text_y_offset),font_scale,(100,100,255),font_thickness),
+                     (f"Delay Mix: {delay_display:.2f}",(30,text_y_start+3*text_y_offset),font_scale,(255,165,0),font_thickness)]
+
+        if spectrum_analyser:
+            # Último espectro completo publicado pela thread do analisador (não espera a FFT)
+            spectrum_analyser.read_into(spectrum_levels)
+            spectrum_renderer.draw(img, 30, img.shape[0] - SPECTRUM_HEIGHT_PX - 30, SPECTRUM_WIDTH_PX, SPECTRUM_HEIGHT_PX, spectrum_levels)
+
+        if audio_engine_global:
+            # Métricas lidas da thread da interface; o callback só grava em arrays pré-alocados
+            audio_metrics = audio_engine_global.get_metrics()
+            audio_xruns = audio_metrics["output_underflows"] + audio_metrics["ring_underflows"]
+            audio_hud_text = f"Audio: {audio_metrics['render']['worst_utilisation']*100:.0f}% bloco, xruns: {audio_xruns}"
+            if "spectrum" in audio_metrics:
+                audio_hud_text += f", FFT p99: {audio_metrics['spectrum']['p99_us']:.0f} us"
+            hud_items.append((audio_hud_text,(30, text_y_start+4*text_y_offset),font_scale,(200,200,200),font_thickness))
+
+        # Sprites de texto em cache, compostos em uma camada; só os itens cujo texto mudou são refeitos
+        hud_panel.set_items(hud_items)
+        hud_panel.draw(img)
 
         print(f"FPS: {fps}\nVol: {volume_percentage_display}\nReverb: {reverb_display}\nDelay: {delay_display}\n")
 
@@ -354,5 +436,17 @@ if __name__ == '__main__':
     # --- FINALIZAÇÃO ---
     print("Encerrando...")
     if playback_stream: print("Parando áudio..."); playback_stream.stop(); playback_stream.close(); print("Áudio parado.")
+    if spectrum_analyser: spectrum_analyser.stop()
+    if audio_engine_global: audio_engine_global.stop()
+    if effects_controller_global: effects_controller_global.close()
+    if audio_engine_global: print(f"Métricas de áudio: {audio_engine_global.get_metrics()}")
+    if automation_recorder:
+        if audio_engine_global: automation_recorder.resolve_positions(audio_engine_global.get_parameter_position)
+        automation_recorder.save(AUTOMATION_RECORD_PATH)
+    audio_controller.close()
+    for old_audio_data in retired_audio_data: old_audio_data.close()
+    print(f"Captura da câmera: {capture.get_stats()}")
+    print(f"Detecção das mãos: {detector.get_stats()}")
+    print(f"Camada de controle: {control_rate.get_stats()}")
     if capture.isOpened(): capture.release()
     cv2.destroyAllWindows(); print("Recursos liberados.")
\ No newline at end of file
@@ -0,0 +1,188 @@
+import json
+import time
+import argparse
+import numpy as np
+import soundfile as sf
+
+class ParameterTimeline:
+    # Parâmetro da linha do tempo -> como aplicá-lo no ReverbControl
+    PARAMETER_SETTERS = {
+        "wet_level": lambda effects, value: effects.set_wet_level(value),
+        "delay_mix": lambda effects, value: effects.set_delay_mix(value),
+        "delay_seconds": lambda effects, value: effects.update_delay_parameters(delay_seconds=value),
+        "delay_feedback": lambda effects, value: effects.update_delay_parameters(feedback=value),
+        "room_size": lambda effects, value: effects.update_reverb_parameters(room_size=value),
+        "damping": lambda effects, value: effects.update_reverb_parameters(damping=value),
+        "width": lambda effects, value: effects.update_reverb_parameters(width=value),
+    }
+
+    def __init__(self):
+        """
+        Automação de parâmetros de efeito ao longo do tempo (keyframes com interpolação linear).
+        Antes do primeiro e depois do último keyframe o valor fica constante.
+        """
+        self._keyframes = {} # nome -> (tempos em segundos, valores)
+
+    def add_keyframes(self, name, times_s, values):
+        """
+        Args:
+            name (str): Um dos parâmetros em PARAMETER_SETTERS.
+            times_s (list): Tempos dos keyframes em segundos (crescentes).
+            values (list): Valor do parâmetro em cada keyframe.
+        """
+        if name not in self.PARAMETER_SETTERS:
+            raise ValueError(f"Parâmetro de automação desconhecido: '{name}'.")
+
+        times_s = np.asarray(times_s, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if times_s.ndim != 1 or len(times_s) == 0 or times_s.shape != values.shape:
+            raise ValueError(f"Keyframes inválidos para '{name}'.")
+        if np.any(np.diff(times_s) < 0):
+            raise ValueError(f"Os tempos dos keyframes de '{name}' devem ser crescentes.")
+
+        self._keyframes[name] = (times_s, values)
+
+    @classmethod
+    def from_json(cls, filepath):
+        """
+        Lê uma linha do tempo em JSON no formato {"wet_level": [[0.0, 0.0], [10.0, 0.6]], ...},
+        com pares [tempo_em_segundos, valor].
+        """
+        with open(filepath, 'r', encoding='utf-8') as timeline_file:
+            data = json.load(timeline_file)
+
+        timeline = cls()
+        for name, keyframes in data.items():
+            keyframes = np.asarray(keyframes, dtype=np.float64).reshape(-1, 2)
+            timeline.add_keyframes(name, keyframes[:, 0], keyframes[:, 1])
+        return timeline
+
+    def get_values(self, time_s):
+        """ Retorna {nome: valor} de todos os parâmetros automatizados no instante 'time_s'. """
+        return {name: float(np.interp(time_s, times_s, values)) for name, (times_s, values) in self._keyframes.items()}
+
+    def apply(self, effects_controller, time_s):
+        """ Escreve no controlador de efeitos os valores de todos os parâmetros no instante 'time_s'. """
+        for name, value in self.get_values(time_s).items():
+            self.PARAMETER_SETTERS[name](effects_controller, value)
+
+    def get_duration(self):
+        return max((times_s[-1] for times_s, _ in self._keyframes.values()), default=0.0)
+
+class OfflineRenderer:
+    def __init__(self,
+                 control_block_frames: int = 1024,
+                 read_block_frames: int = 65536,
+                 ramp_seconds: float = 0.0):
+        """
+        Renderização offline (sem câmera e sem dispositivo de áudio) de uma faixa
+        pelo ReverbControl, com automação de parâmetros, o mais rápido que a CPU permitir.
+
+        O arquivo é lido e gravado em blocos de 'read_block_frames' (memória
+        constante, qualquer duração); cada bloco é processado em sub-blocos de
+        'control_block_frames', e a automação é aplicada no início de cada sub-bloco.
+
+        Args:
+            control_block_frames (int): Resolução da automação (frames por sub-bloco de efeito).
+            read_block_frames (int): Frames lidos/gravados por vez no disco.
+            ramp_seconds (float): Rampa do ReverbControl; 0.0 aplica a automação exatamente no sub-bloco.
+        """
+        if control_block_frames <= 0 or read_block_frames < control_block_frames:
+            raise ValueError("Os blocos devem ser positivos e read_block_frames >= control_block_frames.")
+
+        self.control_block_frames = control_block_frames
+        self.read_block_frames = read_block_frames
+        self.ramp_seconds = ramp_seconds
+
+    def render(self, input_path, output_path, timeline = None, effects_controller = None,
+               tail_seconds: float = 0.0, subtype: str = 'FLOAT'):
+        """
+        Processa 'input_path' e grava o resultado em WAV em 'output_path'.
+
+        Args:
+            input_path (str): Arquivo de áudio de entrada.
+            output_path (str): Arquivo WAV de saída.
+            timeline (ParameterTimeline, optional): Automação dos parâmetros de efeito.
+            effects_controller (ReverbControl, optional): Controlador a usar; se None, um novo é
+                                                         criado na taxa do arquivo de entrada.
+            tail_seconds (float): Silêncio processado depois do fim, para a cauda do reverb/delay.
+            subtype (str): Subtipo do WAV de saída ('FLOAT', 'PCM_24', 'PCM_16').
+
+        Returns:
+            dict: Estatísticas da renderização, ou None se falhar.
+        """
+        try:
+            source = sf.SoundFile(input_path)
+        except (RuntimeError, OSError) as e:
+            print(f"Erro ao abrir '{input_path}' para renderização: {e}")
+            return None
+
+        with source:
+            sample_rate = source.samplerate
+            channels = source.channels
+
+            if effects_controller is None:
+                # Import local: o pedalboard só é necessário quando há renderização
+                from filter.reverb_delay_control_module import ReverbControl
+                effects_controller = ReverbControl(sample_rate, ramp_seconds=self.ramp_seconds)
+            elif effects_controller.sample_rate != sample_rate:
+                print(f"Erro: o controlador de efeitos está a {effects_controller.sample_rate} Hz e o arquivo a {sample_rate} Hz.")
+                return None
+
+            # Buffer de leitura alocado uma vez: a memória não depende da duração da faixa
+            read_buffer = np.zeros((self.read_block_frames, channels), dtype=np.float32)
+            tail_frames_left = int(max(tail_seconds, 0.0) * sample_rate)
+            position = 0
+
+            start_time = time.perf_counter()
+            try:
+                with sf.SoundFile(output_path, 'w', samplerate=sample_rate, channels=channels,
+                                  subtype=subtype, format='WAV') as destination:
+                    while True:
+                        frames_read = len(source.read(self.read_block_frames, dtype='float32', always_2d=True, out=read_buffer))
+                        if frames_read == 0:
+                            # Fim da faixa: processa silêncio enquanto houver cauda a renderizar
+                            frames_read = min(tail_frames_left, self.read_block_frames)
+                            if frames_read == 0:
+                                break
+                            read_buffer[:frames_read] = 0
+                            tail_frames_left -= frames_read
+
+                        for block_start in range(0, frames_read, self.control_block_frames):
+                            block = read_buffer[block_start : min(block_start + self.control_block_frames, frames_read)]
+                            if timeline is not None:
+                                timeline.apply(effects_controller, position / sample_rate)
+
+                            destination.write(effects_controller.process(block))
+                            position += len(block)
+
+            except (RuntimeError, OSError) as e:
+                print(f"Erro ao gravar '{output_path}': {e}")
+                return None
+
+            elapsed = time.perf_counter() - start_time
+
+        rendered_seconds = position / sample_rate
+        stats = {
+            "frames": position,
+            "seconds": rendered_seconds,
+            "elapsed": elapsed,
+            "realtime_factor": rendered_seconds / elapsed if elapsed > 0 else float('inf'),
+        }
+        print(f"Renderizado '{output_path}': {rendered_seconds:.1f} s de áudio em {elapsed:.2f} s ({stats['realtime_factor']:.1f}x tempo real).")
+        return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Renderiza uma faixa com reverb/delay automatizados, sem câmera nem dispositivo de áudio.")
+    parser.add_argument("input", help="Arquivo de áudio de entrada")
+    parser.add_argument("output", help="Arquivo WAV de saída")
+    parser.add_argument("--timeline", help="Linha do tempo em JSON: {\"wet_level\": [[tempo_s, valor], ...], ...}")
+    parser.add_argument("--block", type=int, default=1024, help="Frames por sub-bloco de efeito (resolução da automação)")
+    parser.add_argument("--tail", type=float, default=0.0, help="Segundos de cauda renderizados depois do fim")
+    parser.add_argument("--subtype", default='FLOAT', help="Subtipo do WAV de saída (FLOAT, PCM_24, PCM_16)")
+    args = parser.parse_args()
+
+    renderer = OfflineRenderer(control_block_frames=args.block, read_block_frames=max(65536, args.block))
+    timeline = ParameterTimeline.from_json(args.timeline) if args.timeline else None
+    if renderer.render(args.input, args.output, timeline, tail_seconds=args.tail, subtype=args.subtype) is None:
+        raise SystemExit(1)
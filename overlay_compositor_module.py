@@ -0,0 +1,230 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+class TextSpriteCache:
+    def __init__(self, font_face = cv2.FONT_HERSHEY_SIMPLEX, max_sprites: int = 512, line_type = cv2.LINE_AA):
+        """
+        Cache LRU de textos pré-renderizados (sprites) para o overlay.
+
+        Cada sprite é só a máscara alfa (uint8, replicada nos 3 canais para a
+        aritmética do OpenCV) do texto, indexada por (texto, escala,
+        espessura): a cor é aplicada na composição, então o mesmo sprite serve
+        para qualquer cor. cv2.putText só roda na primeira vez que um texto aparece.
+
+        Args:
+            font_face (int): Fonte do OpenCV usada em todos os textos.
+            max_sprites (int): Número máximo de sprites guardados.
+            line_type (int): Tipo de linha do cv2.putText (LINE_AA dá bordas suaves no alfa).
+        """
+        if max_sprites <= 0:
+            raise ValueError("O número máximo de sprites (max_sprites) deve ser positivo.")
+
+        self.font_face = font_face
+        self.max_sprites = max_sprites
+        self.line_type = line_type
+        self._sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font_scale, thickness = 1):
+        """
+        Retorna (alfa, dx, dy): a máscara do texto e o deslocamento do seu canto
+        superior esquerdo em relação à origem do cv2.putText (início da linha de base).
+        """
+        key = (text, font_scale, thickness)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        (text_width, text_height), baseline = cv2.getTextSize(text, self.font_face, font_scale, thickness)
+        padding = thickness + 1
+        alpha = np.zeros((text_height + baseline + 2 * padding, text_width + 2 * padding), dtype=np.uint8)
+        cv2.putText(alpha, text, (padding, padding + text_height), self.font_face, font_scale, 255, thickness, self.line_type)
+
+        sprite = (cv2.merge([alpha] * 3), -padding, -(padding + text_height))
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário com o uso do cache de sprites.
+        '''
+
+        return {
+            "sprites": len(self._sprites),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+class OverlayPanel:
+    def __init__(self, sprite_cache: TextSpriteCache):
+        """
+        Grupo de textos do overlay (HUD, lista de músicas) composto em uma camada única.
+
+        set_items() recebe todos os textos do grupo a cada quadro. Cada item tem
+        o seu lugar na camada (cor pré-multiplicada pelo alfa): quando só alguns
+        textos mudam (ex.: o contador de FPS), apenas os retângulos desses itens
+        são refeitos. A camada inteira só é refeita quando o número de itens muda
+        ou um item sai dos limites dela. draw() mistura a camada no quadro com uma
+        operação vetorizada sobre um único recorte (ROI), então o custo por
+        quadro não depende de quantos itens o grupo tem.
+
+        Args:
+            sprite_cache (TextSpriteCache): Cache de sprites (pode ser compartilhado entre painéis).
+        """
+        self.sprite_cache = sprite_cache
+        self.renders = 0         # Quantas vezes a camada inteira foi refeita
+        self.partial_renders = 0 # Quantas vezes só os itens alterados foram refeitos
+
+        self._items = None
+        self._placed = [] # (alfa, x, y, cor) de cada item, na ordem de 'items'
+        self._x = 0
+        self._y = 0
+        self._layer_alpha = np.zeros((0, 0, 3), dtype=np.uint8)
+        self._inverse_alpha = np.zeros((0, 0, 3), dtype=np.uint8)
+        self._premultiplied = np.zeros((0, 0, 3), dtype=np.uint8)
+        self._blend = np.zeros((0, 0, 3), dtype=np.uint8)
+        # Um plano por cor BGR, que cresce conforme os sprites: o cv2.multiply entre dois
+        # arrays é bem mais rápido que com um escalar de cor
+        self._color_planes = {}
+
+    def set_items(self, items):
+        """
+        Define os textos do painel.
+
+        Args:
+            items (list): Tuplas (texto, (x, y), escala, cor BGR, espessura), com (x, y) como no cv2.putText.
+        """
+        items = tuple(items)
+        if items == self._items:
+            return
+
+        previous_items = self._items
+        self._items = items
+        if previous_items is None or len(previous_items) != len(items):
+            self._placed = [self._place_item(item) for item in items]
+            self._render_layer()
+            return
+
+        # Só os itens alterados buscam um novo sprite; o retângulo sujo de cada um cobre
+        # onde ele estava e onde ele está agora
+        dirty_rects = []
+        layer_changed = False
+        for index, (previous_item, item) in enumerate(zip(previous_items, items)):
+            if previous_item == item:
+                continue
+            old_x0, old_y0, old_x1, old_y1 = self._get_rect(self._placed[index])
+            self._placed[index] = self._place_item(item)
+            new_rect = self._get_rect(self._placed[index])
+            layer_changed = layer_changed or not self._layer_contains(new_rect)
+            dirty_rects.append((min(old_x0, new_rect[0]), min(old_y0, new_rect[1]),
+                                max(old_x1, new_rect[2]), max(old_y1, new_rect[3])))
+
+        if layer_changed:
+            self._render_layer() # Um item cresceu ou saiu dos limites da camada
+            return
+
+        self.partial_renders += 1
+        for rect in dirty_rects:
+            self._render_region(*rect)
+
+    def _place_item(self, item):
+        text, (x, y), font_scale, color, thickness = item
+        alpha, dx, dy = self.sprite_cache.get(text, font_scale, thickness)
+        return alpha, x + dx, y + dy, color
+
+    @staticmethod
+    def _get_rect(placed_item):
+        alpha, left, top, _ = placed_item
+        return left, top, left + alpha.shape[1], top + alpha.shape[0]
+
+    def _layer_contains(self, rect):
+        layer_height, layer_width = self._layer_alpha.shape[:2]
+        x0, y0, x1, y1 = rect
+        return x0 >= self._x and y0 >= self._y and x1 <= self._x + layer_width and y1 <= self._y + layer_height
+
+    def _render_layer(self):
+        self.renders += 1
+        if not self._placed:
+            self._layer_alpha = np.zeros((0, 0, 3), dtype=np.uint8)
+            self._inverse_alpha = self._layer_alpha
+            return
+
+        # A camada cobre a união dos sprites
+        rects = [self._get_rect(placed_item) for placed_item in self._placed]
+        x0 = min(rect[0] for rect in rects)
+        y0 = min(rect[1] for rect in rects)
+        x1 = max(rect[2] for rect in rects)
+        y1 = max(rect[3] for rect in rects)
+        self._x, self._y = x0, y0
+
+        self._layer_alpha = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        self._premultiplied = np.zeros_like(self._layer_alpha)
+        self._inverse_alpha = np.zeros_like(self._layer_alpha)
+        if self._blend.shape != self._layer_alpha.shape:
+            self._blend = np.zeros_like(self._layer_alpha)
+        self._render_region(x0, y0, x1, y1)
+
+    def _render_region(self, x0, y0, x1, y1):
+        """ Refaz alfa e cor pré-multiplicada da camada dentro de um retângulo (coordenadas do quadro). """
+        layer_height, layer_width = self._layer_alpha.shape[:2]
+        x0, y0 = max(x0, self._x), max(y0, self._y)
+        x1, y1 = min(x1, self._x + layer_width), min(y1, self._y + layer_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        region = (slice(y0 - self._y, y1 - self._y), slice(x0 - self._x, x1 - self._x))
+        layer_alpha = self._layer_alpha[region]
+        premultiplied = self._premultiplied[region]
+        layer_alpha[:] = 0
+        premultiplied[:] = 0
+
+        # Todos os itens que tocam o retângulo (vizinhos sobrepostos incluídos), com a aritmética uint8 (SIMD) do OpenCV
+        for alpha, left, top, color in self._placed:
+            item_x0, item_y0 = max(x0, left), max(y0, top)
+            item_x1, item_y1 = min(x1, left + alpha.shape[1]), min(y1, top + alpha.shape[0])
+            if item_x0 >= item_x1 or item_y0 >= item_y1:
+                continue
+            item_alpha = alpha[item_y0 - top : item_y1 - top, item_x0 - left : item_x1 - left]
+            target = (slice(item_y0 - y0, item_y1 - y0), slice(item_x0 - x0, item_x1 - x0))
+            cv2.max(layer_alpha[target], item_alpha, dst=layer_alpha[target])
+            color_plane = self._get_color_plane(color, item_alpha.shape)
+            cv2.max(premultiplied[target], cv2.multiply(item_alpha, color_plane, scale=1 / 255), dst=premultiplied[target])
+
+        cv2.bitwise_not(layer_alpha, dst=self._inverse_alpha[region]) # 255 - alfa
+
+    def _get_color_plane(self, color, shape):
+        color_plane = self._color_planes.get(color)
+        if color_plane is None or color_plane.shape[0] < shape[0] or color_plane.shape[1] < shape[1]:
+            plane_shape = (max(shape[0], 0 if color_plane is None else color_plane.shape[0]),
+                           max(shape[1], 0 if color_plane is None else color_plane.shape[1]), 3)
+            color_plane = np.empty(plane_shape, dtype=np.uint8)
+            color_plane[:] = color
+            self._color_planes[color] = color_plane
+        return color_plane[: shape[0], : shape[1]]
+
+    def draw(self, img):
+        """ Mistura a camada no quadro BGR (no lugar): quadro * (1 - alfa) + cor * alfa. """
+        layer_height, layer_width = self._inverse_alpha.shape[:2]
+        if layer_height == 0:
+            return
+
+        # Recorte da camada que cai dentro do quadro
+        img_height, img_width = img.shape[:2]
+        x0, y0 = max(self._x, 0), max(self._y, 0)
+        x1, y1 = min(self._x + layer_width, img_width), min(self._y + layer_height, img_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        layer_region = (slice(y0 - self._y, y1 - self._y), slice(x0 - self._x, x1 - self._x))
+        roi = img[y0:y1, x0:x1]
+        blend = self._blend[layer_region]
+        cv2.multiply(roi, self._inverse_alpha[layer_region], dst=blend, scale=1 / 255)
+        # Escreve direto no recorte do quadro (o dst é uma view de img)
+        cv2.add(blend, self._premultiplied[layer_region], dst=roi)
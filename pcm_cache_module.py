@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+
+class PcmDiskCache:
+    def __init__(self, cache_dir, max_bytes: int = 4 * 1024 * 1024 * 1024):
+        """
+        Cache em disco de PCM já decodificado, em arquivos .npy crus.
+
+        Cada entrada é identificada pelo caminho, tamanho e data de modificação
+        do arquivo de origem, mais o formato de armazenamento. Na releitura o
+        .npy é aberto com np.load(mmap_mode='r'): nada é decodificado e as
+        páginas só são lidas do disco quando o áudio chega nelas.
+
+        Args:
+            cache_dir (str): Diretório do cache (criado se não existir).
+            max_bytes (int): Tamanho máximo do cache; as entradas menos usadas são removidas.
+        """
+        if max_bytes <= 0:
+            raise ValueError("O limite do cache (max_bytes) deve ser positivo.")
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock() # Prefetch e carregamento em segundo plano podem gravar juntos
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_key(self, filepath, storage):
+        stat = os.stat(filepath)
+        identity = f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}|{storage}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _entry_paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, filepath, storage):
+        """
+        Retorna (pcm, sample_rate) mapeado em memória se a entrada existir, senão None.
+
+        Args:
+            filepath (str): Arquivo de áudio de origem.
+            storage (str): Formato das amostras ('float32', 'int16', 'int24', ...).
+        """
+        try:
+            npy_path, meta_path = self._entry_paths(self._entry_key(filepath, storage))
+            if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+                self.misses += 1
+                return None
+
+            with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                metadata = json.load(meta_file)
+            pcm = np.load(npy_path, mmap_mode='r')
+
+            # Marca como usada recentemente para a remoção LRU
+            os.utime(npy_path)
+            self.hits += 1
+            return pcm, metadata["sample_rate"]
+
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao ler o cache de PCM para '{filepath}': {e}")
+            self.misses += 1
+            return None
+
+    def store(self, filepath, storage, pcm, sample_rate):
+        """
+        Grava o PCM decodificado no cache e remove as entradas menos usadas se passar do limite.
+        """
+        if pcm.nbytes > self.max_bytes:
+            return False
+
+        try:
+            npy_path, meta_path = self._entry_paths(self._entry_key(filepath, storage))
+            with self._lock:
+                # Grava em arquivo temporário e renomeia, para nunca deixar um .npy pela metade
+                temp_path = f"{npy_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as npy_file:
+                    np.save(npy_file, np.ascontiguousarray(pcm))
+                os.replace(temp_path, npy_path)
+
+                with open(meta_path, 'w', encoding='utf-8') as meta_file:
+                    json.dump({"source": os.path.abspath(filepath), "storage": storage, "sample_rate": sample_rate}, meta_file)
+
+                self._evict(keep_path=npy_path)
+            return True
+
+        except OSError as e:
+            print(f"Erro ao gravar o cache de PCM para '{filepath}': {e}")
+            return False
+
+    def _evict(self, keep_path):
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".npy"):
+                path = os.path.join(self.cache_dir, filename)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+
+            try:
+                os.remove(path)
+                os.remove(path[: -len(".npy")] + ".json")
+            except OSError:
+                pass # No Windows o arquivo pode estar mapeado por outra faixa ainda tocando
+            else:
+                total_bytes -= size
+                self.evictions += 1
+
+    def get_size_bytes(self):
+        return sum(os.path.getsize(os.path.join(self.cache_dir, f)) for f in os.listdir(self.cache_dir) if f.endswith(".npy"))
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário com os contadores do cache em disco.
+        '''
+
+        return {
+            "cache_dir": self.cache_dir,
+            "bytes": self.get_size_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
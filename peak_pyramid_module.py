@@ -0,0 +1,144 @@
+import numpy as np
+import soundfile as sf
+
+class PeakPyramid:
+    def __init__(self, level_mins, level_maxs, base_bin_frames, num_frames, sample_rate):
+        """
+        Pirâmide de picos (min/max) de uma faixa para desenhar a waveform.
+
+        O nível k guarda o mínimo e o máximo (da média dos canais) de cada bin
+        de base_bin_frames * 2^k frames. Cada consulta escolhe o nível cujo bin
+        cabe em uma coluna de pixel e combina no máximo alguns bins por coluna,
+        então o custo depende só da largura em pixels, não da janela de tempo.
+        Use from_audio_data ou from_file para construir.
+
+        Args:
+            level_mins (list): Um array float32 de mínimos por nível.
+            level_maxs (list): Um array float32 de máximos por nível.
+            base_bin_frames (int): Frames por bin no nível 0 (potência de 2).
+            num_frames (int): Frames da faixa.
+            sample_rate (int): Taxa de amostragem da faixa.
+        """
+        self.level_mins = level_mins
+        self.level_maxs = level_maxs
+        self.base_bin_frames = base_bin_frames
+        self.num_frames = num_frames
+        self.sample_rate = sample_rate
+        self.nbytes = sum(level.nbytes for level in level_mins) + sum(level.nbytes for level in level_maxs)
+
+    @classmethod
+    def from_audio_data(cls, audio_data, sample_rate, base_bin_frames: int = 32, read_block_frames: int = 1 << 18):
+        """
+        Constrói a pirâmide a partir do áudio já carregado (np.ndarray, CompactAudioData ou PCM mapeado),
+        convertendo um bloco de cada vez.
+        """
+        num_frames = len(audio_data)
+        num_channels = 1 if audio_data.ndim == 1 else audio_data.shape[1]
+        block = np.zeros((read_block_frames, num_channels), dtype=np.float32)
+
+        def read_blocks():
+            for start in range(0, num_frames, read_block_frames):
+                frames = min(read_block_frames, num_frames - start)
+                if hasattr(audio_data, 'read_into'):
+                    audio_data.read_into(start, block[:frames])
+                else:
+                    source = audio_data[start : start + frames]
+                    np.copyto(block[:frames], source[:, np.newaxis] if source.ndim == 1 else source, casting='unsafe')
+                yield block[:frames]
+
+        return cls._from_blocks(read_blocks(), num_frames, sample_rate, base_bin_frames)
+
+    @classmethod
+    def from_file(cls, filepath, base_bin_frames: int = 32, read_block_frames: int = 1 << 18):
+        """ Constrói a pirâmide lendo o arquivo em blocos (para faixas abertas em streaming). """
+        with sf.SoundFile(filepath) as sound_file:
+            num_frames = sound_file.frames
+            blocks = sound_file.blocks(blocksize=read_block_frames, dtype='float32', always_2d=True)
+            return cls._from_blocks(blocks, num_frames, sound_file.samplerate, base_bin_frames)
+
+    @classmethod
+    def _from_blocks(cls, blocks, num_frames, sample_rate, base_bin_frames):
+        if base_bin_frames <= 0 or base_bin_frames & (base_bin_frames - 1):
+            raise ValueError("base_bin_frames deve ser uma potência de 2.")
+
+        num_bins = max((num_frames + base_bin_frames - 1) // base_bin_frames, 1)
+        level_min = np.zeros(num_bins, dtype=np.float32)
+        level_max = np.zeros(num_bins, dtype=np.float32)
+
+        # Nível 0: redução vetorizada de cada bloco (os blocos têm múltiplos de base_bin_frames, exceto o último)
+        filled_bins = 0
+        for block in blocks:
+            mono = block.mean(axis=1, dtype=np.float32)
+            partial_frames = len(mono) % base_bin_frames
+            if partial_frames:
+                # Completa o último bin repetindo a última amostra (não puxa o pico para zero)
+                mono = np.concatenate([mono, np.full(base_bin_frames - partial_frames, mono[-1], dtype=np.float32)])
+
+            bins = mono.reshape(-1, base_bin_frames)
+            block_bins = min(len(bins), num_bins - filled_bins)
+            np.min(bins[:block_bins], axis=1, out=level_min[filled_bins : filled_bins + block_bins])
+            np.max(bins[:block_bins], axis=1, out=level_max[filled_bins : filled_bins + block_bins])
+            filled_bins += block_bins
+
+        level_mins = [level_min]
+        level_maxs = [level_max]
+
+        # Níveis seguintes: cada bin combina dois bins do nível anterior
+        while len(level_mins[-1]) > 1:
+            previous_min = level_mins[-1]
+            previous_max = level_maxs[-1]
+            if len(previous_min) % 2:
+                previous_min = np.append(previous_min, previous_min[-1])
+                previous_max = np.append(previous_max, previous_max[-1])
+            level_mins.append(np.minimum(previous_min[0::2], previous_min[1::2]))
+            level_maxs.append(np.maximum(previous_max[0::2], previous_max[1::2]))
+
+        return cls(level_mins, level_maxs, base_bin_frames, num_frames, sample_rate)
+
+    def get_bins(self, start_frame, frames, num_bins):
+        """
+        Retorna (mínimos, máximos) float32 de 'num_bins' colunas cobrindo 'frames'
+        frames a partir de 'start_frame'. A janela volta ao início da faixa
+        (loop), inclusive para 'start_frame' negativo.
+        """
+        if num_bins <= 0 or frames <= 0 or self.num_frames == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        # Maior nível cujo bin ainda cabe em uma coluna
+        frames_per_column = frames / num_bins
+        level = int(np.clip(np.floor(np.log2(max(frames_per_column / self.base_bin_frames, 1.0))), 0, len(self.level_mins) - 1))
+        bin_frames = self.base_bin_frames << level
+        level_min = self.level_mins[level]
+        level_max = self.level_maxs[level]
+
+        # Cada coluna vira até dois intervalos sem loop na faixa: [início, fim da faixa) e [0, resto).
+        # O último bin de cada nível pode ser parcial, então o loop não cai em uma fronteira de bin.
+        edges = start_frame + np.arange(num_bins + 1) * frames_per_column
+        column_start = np.mod(edges[:-1], self.num_frames)
+        column_end = column_start + (edges[1:] - edges[:-1])
+        level_bins = len(level_min)
+
+        first_bin = np.floor(column_start / bin_frames).astype(np.int64)
+        end_bin = np.ceil(np.minimum(column_end, self.num_frames) / bin_frames).astype(np.int64)
+        wrapped_end_bin = np.ceil(np.maximum(column_end - self.num_frames, 0.0) / bin_frames).astype(np.int64)
+
+        # Coluna maior que a faixa: cobre a faixa inteira
+        full_track = column_end - column_start >= self.num_frames
+        first_bin[full_track] = 0
+        end_bin[full_track] = level_bins
+        wrapped_end_bin[full_track] = 0
+        end_bin = np.maximum(end_bin, first_bin + 1)
+
+        # Matriz (coluna, bin): primeiro os bins do trecho até o fim da faixa, depois os do trecho após o loop
+        head_width = int((end_bin - first_bin).max())
+        wrapped_width = int(wrapped_end_bin.max())
+        head_indices = first_bin[:, np.newaxis] + np.arange(head_width)[np.newaxis, :]
+        wrapped_indices = np.broadcast_to(np.arange(wrapped_width), (num_bins, wrapped_width))
+        bin_indices = np.concatenate([head_indices, wrapped_indices], axis=1)
+        valid = np.concatenate([head_indices < end_bin[:, np.newaxis],
+                                wrapped_indices < wrapped_end_bin[:, np.newaxis]], axis=1)
+        np.minimum(bin_indices, level_bins - 1, out=bin_indices)
+
+        column_min = np.where(valid, level_min[bin_indices], np.inf).min(axis=1).astype(np.float32)
+        column_max = np.where(valid, level_max[bin_indices], -np.inf).max(axis=1).astype(np.float32)
+        return column_min, column_max
@@ -0,0 +1,126 @@
+import math
+import numpy as np
+
+class PolyphaseResampler:
+    def __init__(self,
+                 input_rate: int,
+                 output_rate: int,
+                 channels: int = 2,
+                 taps_per_phase: int = 32,
+                 rolloff: float = 0.94,
+                 kaiser_beta: float = 8.0):
+        """
+        Reamostrador polifásico em streaming (fator racional L/M), vetorizado em NumPy.
+
+        Guarda o histórico de entrada e a fase entre chamadas, então blocos
+        consecutivos produzem o mesmo resultado que reamostrar o sinal inteiro.
+
+        Args:
+            input_rate (int): Taxa de amostragem da faixa.
+            output_rate (int): Taxa de amostragem do dispositivo.
+            channels (int): Número de canais.
+            taps_per_phase (int): Coeficientes por fase (qualidade x custo).
+            rolloff (float): Frequência de corte relativa à menor Nyquist (0.0 a 1.0).
+            kaiser_beta (float): Parâmetro da janela de Kaiser (atenuação da banda de rejeição).
+        """
+        if input_rate <= 0 or output_rate <= 0:
+            raise ValueError("As taxas de amostragem devem ser positivas.")
+
+        divisor = math.gcd(int(input_rate), int(output_rate))
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.up = self.output_rate // divisor   # L
+        self.down = self.input_rate // divisor  # M
+        self.channels = channels
+        self.taps = taps_per_phase
+
+        # Filtro protótipo (sinc janelado) na taxa intermediária L * input_rate
+        filter_length = self.taps * self.up
+        cutoff = 0.5 * rolloff / max(self.up, self.down) # Em ciclos por amostra da taxa intermediária
+        n = np.arange(filter_length) - (filter_length - 1) / 2.0
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(filter_length, kaiser_beta)
+        prototype *= self.up / prototype.sum() # Ganho DC = L (compensa os zeros inseridos)
+
+        # Banco polifásico: bank[p, k] = h[p + k*L], multiplicando x[base - k]
+        self.bank = prototype.reshape(self.taps, self.up).T.astype(np.float32).copy()
+
+        # Histórico de 'taps' frames: a próxima saída pode depender do frame anterior ao bloco
+        self._history = np.zeros((self.taps, channels), dtype=np.float32)
+        # Janela de trabalho em layout (canais, frames): a coleta por índice fica contígua por canal
+        self._work = np.zeros((channels, 0), dtype=np.float32)
+        self._tap_offsets = np.arange(self.taps)
+        # Buffers de índices e coeficientes por tamanho de saída, alocados na primeira chamada
+        self._output_frames = 0
+        self._allocate_output_buffers(0)
+        # Posição da próxima saída na taxa intermediária, relativa ao início do próximo bloco de entrada
+        self._next_position = 0
+
+    def _allocate_output_buffers(self, output_frames):
+        self._output_frames = output_frames
+        self._output_offsets = np.arange(output_frames, dtype=np.int64) * self.down
+        self._positions = np.zeros(output_frames, dtype=np.int64)
+        self._base = np.zeros(output_frames, dtype=np.int64)
+        self._phase = np.zeros(output_frames, dtype=np.int64)
+        self._tap_indices = np.zeros((output_frames, self.taps), dtype=np.int64)
+        # Deslocamentos dos taps já expandidos: subtração sem broadcast (que alocaria buffers do iterador)
+        self._tap_grid = np.tile(self._tap_offsets, (output_frames, 1))
+        self._coefficients = np.zeros((output_frames, self.taps), dtype=np.float32)
+        self._gathered = np.zeros((output_frames, self.taps), dtype=np.float32)
+        self._channel_out = np.zeros(output_frames, dtype=np.float32)
+
+    def get_input_frames_needed(self, output_frames):
+        """ Quantos frames de entrada o próximo process_into precisa para produzir 'output_frames'. """
+        last_position = self._next_position + (output_frames - 1) * self.down
+        return max(last_position // self.up + 1, 0)
+
+    def get_max_input_frames(self, output_frames):
+        """ Limite superior de get_input_frames_needed, para pré-alocar buffers de entrada. """
+        return (self.up - 1 + (output_frames - 1) * self.down) // self.up + 1
+
+    def process_into(self, input_block, out):
+        """
+        Reamostra 'input_block' produzindo exatamente len(out) frames em 'out'.
+        'input_block' deve ter get_input_frames_needed(len(out)) frames.
+
+        Args:
+            input_block (np.ndarray): Entrada float32 (frames, channels).
+            out (np.ndarray): Saída float32 (frames, channels).
+        """
+        input_frames = len(input_block)
+        output_frames = len(out)
+
+        # Janela de trabalho: histórico seguido da entrada nova
+        work_frames = self.taps + input_frames
+        if self._work.shape[1] < work_frames:
+            self._work = np.zeros((self.channels, work_frames), dtype=np.float32)
+        work = self._work[:, :work_frames]
+        work[:, : self.taps] = self._history.T
+        work[:, self.taps :] = input_block.T
+
+        if output_frames != self._output_frames:
+            self._allocate_output_buffers(output_frames)
+
+        # Tudo escrito em buffers pré-alocados: nenhuma alocação por bloco em regime
+        positions = self._positions
+        np.add(self._output_offsets, self._next_position, out=positions)
+        base = self._base
+        np.floor_divide(positions, self.up, out=base)
+        base += self.taps # Índice em 'work' do frame x[base]
+        np.remainder(positions, self.up, out=self._phase)
+
+        # Índices (saídas, taps) e coeficientes da fase de cada saída, compartilhados pelos canais
+        self._tap_indices[:] = base[:, np.newaxis]
+        np.subtract(self._tap_indices, self._tap_grid, out=self._tap_indices)
+        # mode='clip': os índices são sempre válidos, e o modo padrão ('raise') copia 'out' para um buffer temporário
+        np.take(self.bank, self._phase, axis=0, out=self._coefficients, mode='clip')
+        for channel in range(self.channels):
+            np.take(work[channel], self._tap_indices, out=self._gathered, mode='clip')
+            np.einsum('nt,nt->n', self._gathered, self._coefficients, out=self._channel_out)
+            out[:, channel] = self._channel_out
+
+        self._history[:] = work[:, work_frames - self.taps :].T
+        self._next_position += output_frames * self.down - input_frames * self.up
+
+    def reset(self):
+        self._history[:] = 0
+        self._next_position = 0
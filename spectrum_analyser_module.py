@@ -0,0 +1,239 @@
+import time
+import threading
+import numpy as np
+
+from audio_metrics_module import DurationHistogram
+
+# np.fft.rfft só aceita 'out' a partir do NumPy 2.0 (o mediapipe ainda pode exigir o 1.x)
+RFFT_ACCEPTS_OUT = int(np.__version__.split('.')[0]) >= 2
+
+class SpectrumAnalyser:
+    def __init__(self,
+                 sample_rate: int,
+                 channels: int = 2,
+                 fft_size: int = 2048,
+                 num_bands: int = 48,
+                 min_freq: float = 30.0,
+                 max_freq: float = 16000.0,
+                 update_hz: float = 30.0,
+                 history_frames: int = 1 << 16,
+                 floor_db: float = -80.0):
+        """
+        Analisador de espectro em bandas logarítmicas, calculado em uma thread própria.
+
+        A thread produtora do AudioEngine copia cada bloco renderizado para um
+        histórico circular (push_block). A thread do analisador, 'update_hz'
+        vezes por segundo, pega os últimos 'fft_size' frames que estão sendo
+        tocados, aplica a janela de Hann e a rFFT e reduz o espectro a
+        'num_bands' níveis (0.0 a 1.0, escala em dB). Todos os buffers são
+        alocados aqui.
+
+        O resultado é publicado como no ParameterMailbox: dois slots e
+        contadores de sequência, então a interface lê o último quadro completo
+        (read_into) sem locks e sem esperar a FFT.
+
+        Args:
+            sample_rate (int): Taxa do áudio analisado (a do stream).
+            channels (int): Canais dos blocos recebidos (somados em mono na análise).
+            fft_size (int): Frames por análise.
+            num_bands (int): Número máximo de bandas (bandas estreitas demais nas
+                             frequências baixas são unidas).
+            min_freq (float): Frequência inicial da primeira banda, em Hz.
+            max_freq (float): Frequência final da última banda, em Hz.
+            update_hz (float): Análises por segundo.
+            history_frames (int): Tamanho do histórico circular (deve cobrir o lookahead do motor).
+            floor_db (float): Nível (dBFS) mostrado como 0.0.
+        """
+        if sample_rate <= 0 or fft_size <= 0 or update_hz <= 0:
+            raise ValueError("A taxa de amostragem, o tamanho da FFT e a taxa de atualização devem ser positivos.")
+        if history_frames < 2 * fft_size:
+            raise ValueError("O histórico (history_frames) deve ter pelo menos o dobro do tamanho da FFT.")
+        if not 0 < min_freq < max_freq:
+            raise ValueError("As frequências das bandas devem satisfazer 0 < min_freq < max_freq.")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.fft_size = fft_size
+        self.update_interval = 1.0 / update_hz
+        self.floor_db = floor_db
+
+        # Histórico circular dos blocos renderizados (escrito só pela thread produtora do motor)
+        self._history = np.zeros((history_frames, channels), dtype=np.float32)
+        self._frames_written = 0
+        self._max_block_frames = 0
+
+        # Buffers da análise (usados só pela thread do analisador)
+        num_bins = fft_size // 2 + 1
+        self._frames = np.zeros((fft_size, channels), dtype=np.float32)
+        self._mono = np.zeros(fft_size, dtype=np.float32)
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._spectrum = np.zeros(num_bins, dtype=np.complex64)
+        self._power = np.zeros(num_bins, dtype=np.float32)
+        # Potência de um seno de amplitude 1.0 (em todos os canais) com esta janela = 0 dBFS
+        self._power_scale = np.float32(1.0 / (channels * self._window.sum() / 2) ** 2)
+
+        # Bandas: bin inicial de cada banda em escala logarítmica, sem bandas vazias
+        band_edges_hz = np.geomspace(min_freq, min(max_freq, sample_rate / 2), num_bands + 1)
+        band_edge_bins = np.clip(np.ceil(band_edges_hz * fft_size / sample_rate).astype(np.int64), 1, num_bins - 1)
+        self._band_starts = np.unique(band_edge_bins[:-1])
+        self._band_end_bin = max(int(band_edge_bins[-1]), int(self._band_starts[-1]) + 1)
+        self.num_bands = len(self._band_starts)
+        self._band_power = np.zeros(self.num_bands, dtype=np.float32)
+        band_end_bins = np.append(self._band_starts[1:], self._band_end_bin)
+        self.band_center_hz = np.sqrt(self._band_starts * band_end_bins) * sample_rate / fft_size
+
+        # Publicação dos níveis (double buffer com contadores de sequência)
+        self._levels = np.zeros((2, self.num_bands), dtype=np.float32)
+        self._published = 0
+        self._writes_started = 0
+
+        self.metrics = DurationHistogram(self.update_interval)
+        self.analyses = 0
+        self.skipped_updates = 0 # Atualizações sem áudio suficiente ou com o histórico sobrescrito durante a cópia
+
+        self._position_source = None
+        self._running = False
+        self._thread = None
+
+    # --- Lado da thread produtora do motor ---
+    def push_block(self, block):
+        """ Copia um bloco renderizado (frames, channels) para o histórico. Não aloca. """
+        frames = len(block)
+        history_frames = len(self._history)
+        start = self._frames_written % history_frames
+        first_part = min(frames, history_frames - start)
+
+        self._history[start : start + first_part] = block[:first_part]
+        if first_part < frames:
+            self._history[: frames - first_part] = block[first_part:]
+
+        if frames > self._max_block_frames:
+            self._max_block_frames = frames
+        # Publica depois da cópia
+        self._frames_written += frames
+
+    # --- Thread do analisador ---
+    def start(self, position_source = None):
+        """
+        Inicia a thread do analisador.
+
+        Args:
+            position_source (callable, optional): Retorna o frame do stream que está sendo
+                tocado agora (ex.: AudioEngine.get_output_frame). Sem ele, analisa os
+                últimos frames renderizados, que estão adiantados pelo lookahead.
+        """
+        if self._running:
+            return
+
+        self._position_source = position_source
+        self._running = True
+        self._thread = threading.Thread(target=self._analysis_loop, name="SpectrumAnalyser", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _analysis_loop(self):
+        next_update = time.perf_counter()
+        while self._running:
+            next_update += self.update_interval
+            delay = next_update - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_update = time.perf_counter() # Atrasado: não tenta compensar as análises perdidas
+
+            analysis_start = time.perf_counter()
+            if self.analyse_latest():
+                self.metrics.record(time.perf_counter() - analysis_start)
+
+    def analyse_latest(self):
+        """
+        Analisa os 'fft_size' frames que terminam na posição tocada e publica os níveis.
+        Retorna False (sem publicar) se não houver áudio suficiente ou se o histórico
+        foi sobrescrito durante a cópia.
+        """
+        frames_written = self._frames_written
+        end_frame = frames_written
+        if self._position_source is not None:
+            end_frame = min(self._position_source(), frames_written)
+
+        start_frame = end_frame - self.fft_size
+        history_frames = len(self._history)
+        # A janela precisa estar inteira no histórico, longe do próximo bloco que a produtora vai escrever
+        if start_frame < 0 or frames_written - start_frame > history_frames - self._max_block_frames:
+            self.skipped_updates += 1
+            return False
+
+        start = start_frame % history_frames
+        first_part = min(self.fft_size, history_frames - start)
+        self._frames[:first_part] = self._history[start : start + first_part]
+        if first_part < self.fft_size:
+            self._frames[first_part:] = self._history[: self.fft_size - first_part]
+
+        # A produtora pode ter avançado durante a cópia
+        if self._frames_written - start_frame > history_frames - self._max_block_frames:
+            self.skipped_updates += 1
+            return False
+
+        self._compute_levels()
+        self.analyses += 1
+        return True
+
+    def _compute_levels(self):
+        # Soma dos canais coluna a coluna (np.mean com axis aloca um buffer temporário)
+        mono = self._mono
+        np.copyto(mono, self._frames[:, 0])
+        for channel in range(1, self.channels):
+            mono += self._frames[:, channel]
+        mono *= self._window
+        if RFFT_ACCEPTS_OUT:
+            # A rFFT escreve no buffer reutilizado (só a área de trabalho interna do pocketfft é temporária)
+            np.fft.rfft(mono, out=self._spectrum)
+        else:
+            self._spectrum[:] = np.fft.rfft(mono)
+
+        # Potência por bin, máximo de cada banda e conversão para dB normalizados (0.0 a 1.0)
+        power = self._power
+        np.abs(self._spectrum, out=power)
+        np.square(power, out=power)
+        power *= self._power_scale
+        band_power = self._band_power
+        np.maximum.reduceat(power[: self._band_end_bin], self._band_starts, out=band_power)
+        np.maximum(band_power, 1e-12, out=band_power)
+        np.log10(band_power, out=band_power)
+        band_power *= 10.0
+        band_power -= self.floor_db
+        band_power /= -self.floor_db
+        np.clip(band_power, 0.0, 1.0, out=band_power)
+
+        next_sequence = self._published + 1
+        self._writes_started = next_sequence
+        self._levels[next_sequence % 2] = band_power
+        self._published = next_sequence
+
+    # --- Lado da interface ---
+    def read_into(self, out):
+        """
+        Copia os níveis do último quadro completo para 'out' (float32, num_bands).
+        Retorna o número de sequência lido (0 = nenhuma análise ainda).
+        """
+        while True:
+            sequence = self._published
+            out[:] = self._levels[sequence % 2]
+            # O analisador só volta a este slot na publicação sequence + 2
+            if self._writes_started < sequence + 2:
+                return sequence
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário com o custo e a contagem das análises.
+        '''
+
+        summary = self.metrics.get_summary()
+        summary["analyses"] = self.analyses
+        summary["skipped_updates"] = self.skipped_updates
+        return summary
@@ -0,0 +1,186 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from audio_control_module import AudioControl
+
+class TrackCache:
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Cache LRU de faixas decodificadas, limitado pelo total de bytes (não pelo número de faixas).
+
+        Args:
+            max_bytes (int): Limite de memória do cache em bytes. Faixas mapeadas do cache de
+                             PCM em disco (np.memmap) não contam: as páginas são do SO, que as
+                             descarta sob pressão de memória; elas aparecem em 'mapped_bytes'.
+        """
+        if max_bytes <= 0:
+            raise ValueError("O limite do cache (max_bytes) deve ser positivo.")
+
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.mapped_bytes = 0
+
+        self._entries = OrderedDict() # filepath -> AudioControl (mais recente no fim)
+        self._lock = threading.Lock()
+
+        # Contadores para ajustar o tamanho do cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _is_mapped(audio_data):
+        # CompactAudioData guarda o PCM em 'pcm'; o float32 do cache em disco é o próprio memmap
+        return isinstance(getattr(audio_data, 'pcm', audio_data), np.memmap)
+
+    @classmethod
+    def _entry_bytes(cls, audio_controller):
+        """ Bytes residentes da faixa: as amostras (se não forem mapeadas) mais os picos. """
+        if audio_controller.audio_data is None:
+            return 0
+        peak_bytes = audio_controller.peak_pyramid.nbytes if audio_controller.peak_pyramid is not None else 0
+        sample_bytes = 0 if cls._is_mapped(audio_controller.audio_data) else audio_controller.audio_data.nbytes
+        return sample_bytes + peak_bytes
+
+    @classmethod
+    def _entry_mapped_bytes(cls, audio_controller):
+        audio_data = audio_controller.audio_data
+        return audio_data.nbytes if audio_data is not None and cls._is_mapped(audio_data) else 0
+
+    def get(self, filepath):
+        """
+        Retorna o AudioControl da faixa se estiver no cache (marcando-a como a mais recente), senão None.
+        """
+        with self._lock:
+            audio_controller = self._entries.get(filepath)
+            if audio_controller is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(filepath)
+            self.hits += 1
+            return audio_controller
+
+    def contains(self, filepath):
+        """ Verifica se a faixa está no cache sem alterar os contadores nem a ordem LRU. """
+        with self._lock:
+            return filepath in self._entries
+
+    def put(self, filepath, audio_controller):
+        """
+        Adiciona uma faixa decodificada ao cache, removendo as menos usadas até caber no limite.
+        Faixas maiores que o limite inteiro não são guardadas.
+        """
+        entry_bytes = self._entry_bytes(audio_controller)
+        if audio_controller.audio_data is None or entry_bytes > self.max_bytes:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(filepath, None)
+            if previous is not None:
+                self.current_bytes -= self._entry_bytes(previous)
+                self.mapped_bytes -= self._entry_mapped_bytes(previous)
+
+            while self._entries and self.current_bytes + entry_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._entry_bytes(evicted)
+                self.mapped_bytes -= self._entry_mapped_bytes(evicted)
+                self.evictions += 1
+
+            self._entries[filepath] = audio_controller
+            self.current_bytes += entry_bytes
+            self.mapped_bytes += self._entry_mapped_bytes(audio_controller)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.mapped_bytes = 0
+
+    def get_stats(self):
+        '''
+        Retorna um dicionário com os contadores do cache.
+        '''
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "tracks": len(self._entries),
+                "bytes": self.current_bytes,
+                "mapped_bytes": self.mapped_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            }
+
+class TrackPrefetcher:
+    def __init__(self, track_cache: TrackCache, neighbours: int = 2, **load_options):
+        """
+        Decodifica em segundo plano as faixas vizinhas da seleção atual e as guarda no TrackCache.
+
+        Args:
+            track_cache (TrackCache): Cache onde as faixas decodificadas são guardadas.
+            neighbours (int): Quantas faixas antes e depois da selecionada são pré-carregadas.
+            **load_options: Repassados para AudioControl.load_audio (ex.: storage, pcm_cache).
+        """
+        self.track_cache = track_cache
+        self.neighbours = neighbours
+        self.load_options = load_options
+
+        self._wanted = [] # Substituída inteira a cada nova seleção (sob _wanted_lock)
+        self._wanted_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        self.loaded_count = 0
+
+        self._worker_thread = threading.Thread(target=self._worker_loop, name="TrackPrefetcher", daemon=True)
+        self._worker_thread.start()
+
+    def prefetch_around(self, music_files, selected_index):
+        """
+        Agenda a decodificação da faixa selecionada e das vizinhas (mais próximas primeiro).
+        Pedidos anteriores ainda não atendidos são descartados.
+        """
+        wanted = [music_files[selected_index]]
+        for distance in range(1, self.neighbours + 1):
+            for index in (selected_index + distance, selected_index - distance):
+                if 0 <= index < len(music_files):
+                    wanted.append(music_files[index])
+
+        with self._wanted_lock:
+            self._wanted = wanted
+        self._wake.set()
+
+    def _worker_loop(self):
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+
+            while self._running:
+                # Sempre relê a lista: a seleção pode ter mudado durante a última decodificação
+                with self._wanted_lock:
+                    wanted = self._wanted
+                filepath = next((path for path in wanted if not self.track_cache.contains(path)), None)
+                if filepath is None:
+                    break
+
+                audio_controller = AudioControl()
+                if audio_controller.load_audio(filepath, **self.load_options) and self.track_cache.put(filepath, audio_controller):
+                    self.loaded_count += 1
+                else:
+                    # Falhou ou não cabe no cache: não tenta de novo até a próxima seleção
+                    print(f"Prefetch: '{os.path.basename(filepath)}' não foi para o cache")
+                    with self._wanted_lock:
+                        # Uma seleção nova feita durante a decodificação não é sobrescrita
+                        if self._wanted is wanted:
+                            self._wanted = [path for path in wanted if path != filepath]
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self._worker_thread.join(timeout=1.0)
@@ -11,6 +11,16 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from hand_detector_module import HandDetector
 from volume_control_module import SystemVolumeControl
 from audio_control_module import AudioControl
+from waveform_renderer_module import WaveformRenderer, SpectrumRenderer
+from spectrum_analyser_module import SpectrumAnalyser
+from overlay_compositor_module import TextSpriteCache, OverlayPanel
+from camera_capture_module import ThreadedCapture
+from control_rate_module import ControlRateLimiter
+from audio_engine_module import AudioEngine
+from track_cache_module import TrackCache, TrackPrefetcher
+from pcm_cache_module import PcmDiskCache
+from latency_calibration_module import LatencyCalibrator
+from audio_backend_module import create_output_backend
 
 # --- Variáveis Globais para Reprodução de Áudio ---
 current_playback_frame = 0
@@ -18,6 +28,27 @@ playback_active = False
 audio_data_global = None
 sample_rate_global = 0
 playback_stream = None
+audio_engine_global = None
+
+# --- Configurações do Motor de Áudio ---
+AUDIO_BLOCKSIZE = 1024
+AUDIO_LOOKAHEAD_MS = 40 # Render-ahead à frente do callback (somado à latência do dispositivo entre gesto e som)
+AUDIO_CHANNELS = 2 # O stream fica aberto durante toda a sessão; o motor ajusta os canais de cada faixa
+AUDIO_CALIBRATE = False # Mede blocos/latências neste dispositivo e salva a menor configuração estável
+LATENCY_CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "audio_manipulator", "latency.json")
+AUDIO_BACKEND = 'sounddevice' # 'null' (descarta) ou 'wav' (grava em AUDIO_BACKEND_WAV_PATH) rodam sem placa de som
+AUDIO_BACKEND_WAV_PATH = "sessao.wav"
+TRACK_CROSSFADE_S = 1.5 # Duração do crossfade ao trocar de música (0.0 = troca seca)
+AUDIO_STORAGE = 'auto' # PCM inteiro em memória quando não perde resolução ('auto', 'float32', 'int16' ou 'int24')
+
+# --- Configurações do Cache de Faixas ---
+TRACK_CACHE_MAX_BYTES = 1024 * 1024 * 1024 # Limite de memória das faixas decodificadas (1 GB)
+PREFETCH_NEIGHBOURS = 2 # Faixas antes/depois da seleção decodificadas em segundo plano
+track_cache = TrackCache(TRACK_CACHE_MAX_BYTES)
+
+# --- Configurações do Cache de PCM em Disco ---
+PCM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "audio_manipulator", "pcm")
+PCM_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024 # 4 GB
 
 # --- Configurações da Forma de Onda (Waveform) ---
 WAVEFORM_HEIGHT_PX = 120 
@@ -26,65 +57,53 @@ WAVEFORM_COLOR = (255, 255, 255)
 WAVEFORM_CENTER_LINE_COLOR = (255, 255, 255)
 WAVEFORM_LINE_THICKNESS = 1
 
+# --- Configurações da Câmera ---
+CAMERA_SOURCE = 0 # Índice da câmera, ou o caminho de um vídeo para testar sem webcam
+HAND_INFERENCE_HEIGHT = 720 # Altura da imagem usada na detecção das mãos (None = resolução da câmera)
+HAND_ADAPTIVE_RATE = True # Pula a detecção com as mãos paradas e prevê as landmarks nos quadros pulados
+HAND_ROI_TRACKING = False # Detecta só em um recorte em volta das mãos (quadro inteiro periodicamente); o recorte
+                          # refaz a detecção da palma a cada quadro: ligue só se benchmark_hand_inference.py mostrar ganho
+
+# --- Configurações da Camada de Controle ---
+# Os gestos só chegam ao volume do sistema (chamada COM) e aos efeitos quando a mudança é relevante
+CONTROL_VOLUME_DEAD_BAND = 1.0 # Pontos percentuais
+CONTROL_VOLUME_MAX_RATE_HZ = 20
+
+# --- Configurações do HUD ---
+HUD_FPS_REFRESH_S = 0.5 # Intervalo de atualização do FPS mostrado
+
+# --- Configurações do Analisador de Espectro ---
+SPECTRUM_ENABLED = True # FFT em uma thread própria sobre os blocos que o AudioEngine está tocando
+SPECTRUM_FFT_SIZE = 2048
+SPECTRUM_BANDS = 48
+SPECTRUM_UPDATE_HZ = 30
+SPECTRUM_WIDTH_PX = 480
+SPECTRUM_HEIGHT_PX = 100
+SPECTRUM_COLOR = (0, 200, 255)
+spectrum_analyser = None
+
 # --- Função de Callback para reprodução de áudio ---
+# A leitura da faixa e o ajuste de canais rodam na thread produtora do
+# AudioEngine; o callback do PortAudio apenas copia o próximo bloco pronto.
 def audio_playback_callback(outdata, frames, time_info, status):
-    global current_playback_frame, playback_active, audio_data_global, sample_rate_global
-
-    if status:
-        if status.output_underflow: print("Alerta: Output underflow no stream de áudio!")
-        if status.output_overflow: print("Alerta: Output overflow no stream de áudio!")
-        # print(f"Status do stream de áudio: {status}") 
-
-    if playback_active and audio_data_global is not None and sample_rate_global > 0:
-        remaining_frames_in_song = len(audio_data_global) - current_playback_frame
-        frames_to_process_from_song = min(frames, remaining_frames_in_song)
-
-        if frames_to_process_from_song > 0:
-            original_chunk = audio_data_global[current_playback_frame : current_playback_frame + frames_to_process_from_song]
-            processed_chunk = original_chunk.astype(np.float32)
-            
-            # Bloco de efeitos removido pois 'effects_controller_global' não era utilizado.
-            
-            actual_processed_frames = len(processed_chunk)
-            frames_to_fill_in_outdata = min(actual_processed_frames, frames)
-
-            if frames_to_fill_in_outdata > 0:
-                chunk_to_output = processed_chunk[:frames_to_fill_in_outdata]
-                
-                # Ajuste de canais (mono para estéreo ou vice-versa)
-                if chunk_to_output.ndim == 1 and outdata.ndim == 2 and outdata.shape[1] == 2:
-                    chunk_to_output = np.tile(chunk_to_output[:, np.newaxis], (1, 2))
-                elif chunk_to_output.ndim == 2 and chunk_to_output.shape[1] == 2 and outdata.ndim == 1:
-                    chunk_to_output = chunk_to_output[:, 0]
-                elif chunk_to_output.ndim == 2 and chunk_to_output.shape[1] == 1 and outdata.ndim == 1:
-                    chunk_to_output = chunk_to_output[:,0]
-
-                try:
-                    if chunk_to_output.shape[0] <= outdata.shape[0] and \
-                       (chunk_to_output.ndim == outdata.ndim and \
-                       (chunk_to_output.ndim == 1 or chunk_to_output.shape[1] == outdata.shape[1])):
-                        outdata[:chunk_to_output.shape[0]] = chunk_to_output
-                    else:
-                        outdata[:frames_to_fill_in_outdata] = 0 
-                except ValueError:
-                    outdata[:frames_to_fill_in_outdata] = 0
-            
-            if frames_to_fill_in_outdata < frames:
-                outdata[frames_to_fill_in_outdata:] = 0
-            
-            current_playback_frame += frames_to_process_from_song
-            if current_playback_frame >= len(audio_data_global):
-                current_playback_frame = 0 # Loop da música
-        else:
-            outdata[:] = 0
-            current_playback_frame = 0
+    if audio_engine_global is not None:
+        audio_engine_global.callback(outdata, frames, time_info, status)
     else:
         outdata[:] = 0
 
+def on_track_loaded(filepath, audio_controller):
+    # Chamado pela thread de carregamento do AudioEngine
+    if audio_controller is not None:
+        track_cache.put(filepath, audio_controller)
+        print(f"Tocando: {os.path.basename(filepath)}")
+    else:
+        print(f"Falha ao carregar {filepath}")
+
 if __name__ == '__main__':
 
     # --- CARREGAMENTO DO ÁUDIO ---
     audio_controller = AudioControl()
+    pcm_cache = PcmDiskCache(PCM_CACHE_DIR, PCM_CACHE_MAX_BYTES)
     
     # audio_file_path = input("Digite o caminho para o seu arquivo de áudio (ex: sua_musica.wav): ")
     MUSIC_DIR = "music"
@@ -99,28 +118,67 @@ if __name__ == '__main__':
         exit()
 
     print(f"Músicas encontradas: {len(music_files)}")
+    music_display_names = [os.path.basename(music_file) for music_file in music_files] # Nomes da lista, calculados uma vez
 
     audio_file_path = music_files[0] 
-    audio_loaded_successfully = audio_controller.load_audio(audio_file_path)
+    audio_loaded_successfully = audio_controller.load_audio(audio_file_path, storage=AUDIO_STORAGE, pcm_cache=pcm_cache)
 
     if audio_loaded_successfully:
         print(f"Áudio '{os.path.basename(audio_file_path)}' carregado e pronto para uso.")
         audio_data_global = audio_controller.audio_data
         sample_rate_global = audio_controller.sample_rate
+        track_cache.put(audio_file_path, audio_controller)
                 
         playback_active = True
 
+        # O stream abre uma única vez na taxa nativa do dispositivo; faixas em
+        # outras taxas são reamostradas pelo AudioEngine
         try:
-            sd.default.channels = audio_controller.num_channels
-            playback_stream = sd.OutputStream(
-                samplerate=sample_rate_global,
-                channels=audio_controller.num_channels,
-                callback=audio_playback_callback, 
-                dtype=audio_controller.audio_data.dtype,
-                blocksize=1024 
-            )
+            device_sample_rate = int(sd.query_devices(kind='output')['default_samplerate'])
+        except Exception as e:
+            print(f"Não foi possível consultar o dispositivo de saída: {e}")
+            device_sample_rate = sample_rate_global
+
+        # Bloco, latência e lookahead: calibração salva deste dispositivo (ou nova, com AUDIO_CALIBRATE)
+        audio_blocksize, audio_latency = AUDIO_BLOCKSIZE, None
+        latency_calibrator = LatencyCalibrator(device_sample_rate, AUDIO_CHANNELS, LATENCY_CONFIG_PATH,
+                                               lookaheads_ms=(AUDIO_LOOKAHEAD_MS / 2, AUDIO_LOOKAHEAD_MS, AUDIO_LOOKAHEAD_MS * 2))
+        if AUDIO_CALIBRATE:
+            stream_config = latency_calibrator.load_or_calibrate(audio_data_global, sample_rate_global, None, force=True)
+        else:
+            stream_config = latency_calibrator.load()
+        if stream_config:
+            audio_blocksize, audio_latency = stream_config["blocksize"], stream_config["latency"]
+        audio_lookahead_blocks = AudioEngine.lookahead_blocks_for(AUDIO_LOOKAHEAD_MS, device_sample_rate, audio_blocksize)
+        if stream_config and "lookahead_blocks" in stream_config: # Calibrações antigas não salvaram o lookahead
+            audio_lookahead_blocks = stream_config["lookahead_blocks"]
+
+        try:
+            audio_engine_global = AudioEngine(device_sample_rate,
+                                              channels=AUDIO_CHANNELS,
+                                              blocksize=audio_blocksize,
+                                              lookahead_blocks=audio_lookahead_blocks)
+            audio_engine_global.set_track(audio_data_global, sample_rate=sample_rate_global, peak_pyramid=audio_controller.peak_pyramid)
+            # O analisador entra antes do start(): o primeiro bloco renderizado já é o primeiro
+            # frame do seu histórico, alinhado com get_output_frame()
+            if SPECTRUM_ENABLED:
+                spectrum_analyser = SpectrumAnalyser(device_sample_rate, AUDIO_CHANNELS, SPECTRUM_FFT_SIZE,
+                                                     SPECTRUM_BANDS, update_hz=SPECTRUM_UPDATE_HZ)
+                audio_engine_global.analyser = spectrum_analyser
+                spectrum_analyser.start(audio_engine_global.get_output_frame)
+            audio_engine_global.start()
+
+            sd.default.channels = AUDIO_CHANNELS
+            playback_stream = create_output_backend(AUDIO_BACKEND,
+                                                    device_sample_rate,
+                                                    AUDIO_CHANNELS,
+                                                    audio_blocksize,
+                                                    audio_playback_callback,
+                                                    latency=audio_latency,
+                                                    output_path=AUDIO_BACKEND_WAV_PATH,
+                                                    realtime=True)
             playback_stream.start()
-            print(f"Stream de áudio iniciado a {sample_rate_global} Hz, {audio_controller.num_channels} canal(is).")
+            print(f"Stream de áudio iniciado a {device_sample_rate} Hz, {AUDIO_CHANNELS} canal(is), bloco {audio_blocksize}.")
         except Exception as e:
             print(f"Falha ao iniciar o stream de áudio: {e}")
             playback_active = False
@@ -131,7 +189,8 @@ if __name__ == '__main__':
 
     # --- CONFIGURAÇÃO DA CÂMERA ---
     wCam, hCam = 1920, 1080
-    capture = cv2.VideoCapture(0)
+    # Captura em thread própria: o loop sempre recebe o quadro mais novo (os antigos são descartados)
+    capture = ThreadedCapture(CAMERA_SOURCE)
     if not capture.isOpened():
         print("Erro ao abrir a câmera.")
         if playback_stream: playback_stream.close()
@@ -141,13 +200,29 @@ if __name__ == '__main__':
     wCam_actual = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
     hCam_actual = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
     print(f"Resolução da câmera: {wCam_actual}x{hCam_actual}")
+    capture.start()
 
     previousTime = 0
-    detector = HandDetector(number_hands=2, min_detection_confidence=0.7)
+    detector = HandDetector(number_hands=2, min_detection_confidence=0.7, inference_height=HAND_INFERENCE_HEIGHT,
+                            adaptive_rate=HAND_ADAPTIVE_RATE, roi_tracking=HAND_ROI_TRACKING)
+    waveform_renderer = WaveformRenderer(WAVEFORM_HEIGHT_PX, WAVEFORM_COLOR, WAVEFORM_LINE_THICKNESS, WAVEFORM_CENTER_LINE_COLOR)
+    if spectrum_analyser:
+        spectrum_renderer = SpectrumRenderer(spectrum_analyser.num_bands, SPECTRUM_COLOR)
+        spectrum_levels = np.zeros(spectrum_analyser.num_bands, dtype=np.float32)
+    overlay_sprites = TextSpriteCache(cv2.FONT_HERSHEY_SIMPLEX)
+    hud_panel = OverlayPanel(overlay_sprites)
+    list_panel = OverlayPanel(overlay_sprites)
+    hud_fps = 0.0; hud_frames = 0; hud_fps_time = time.time()
     volume_controller = SystemVolumeControl()
     if volume_controller.volume is None:
         print("Falha ao inicializar SystemVolumeControl.")
 
+    # Gestos -> sinks com zona morta, taxa máxima por parâmetro e o último valor vencendo
+    control_sinks = {}
+    if volume_controller.volume:
+        control_sinks["volume"] = volume_controller.set_volume_level
+    control_rate = ControlRateLimiter(control_sinks, dead_bands=CONTROL_VOLUME_DEAD_BAND, max_rates_hz=CONTROL_VOLUME_MAX_RATE_HZ)
+
     # Faixas para gestos
     VOL_DIST_MIN_ONE_HAND = 30
     VOL_DIST_MAX_ONE_HAND = 80 # Renomeado de HAND_DIST_MAX_FINGERS_EFFECTS
@@ -159,8 +234,12 @@ if __name__ == '__main__':
     app_mode = 'playback' # Modos: 'playback' ou 'selection'
     
     selected_song_index = 0 # Inicia na primeira música
+    prefetched_song_index = -1 # Última seleção para a qual o prefetch foi agendado
+    track_prefetcher = TrackPrefetcher(track_cache, neighbours=PREFETCH_NEIGHBOURS,
+                                       storage=AUDIO_STORAGE, pcm_cache=pcm_cache)
     current_playing_index = 0 # Para saber qual está tocando
     selection_cooldown = 0
+    pending_song = None # Seleção feita durante um carregamento: entra quando ele terminar (a última vence)
     SELECTION_COOLDOWN_TIME = 1.0 # 1 segundo de cooldown para "clicar"
 
     # --- Variáveis de Navegação (Scroll) ---
@@ -194,7 +273,30 @@ if __name__ == '__main__':
         img = cv2.flip(img, 1)
         
         img = detector.find_hands(img, draw_hands=True)
-        detected_hands_data = detector.find_positions(img, draw_points=False)
+        # Landmarks em pixels, (mãos, 21, 3), em um array pré-alocado
+        hand_points, hand_sides, hand_scores = detector.find_landmarks(img)
+        num_hands = len(hand_points)
+        if num_hands:
+            # Distância polegar-indicador de todas as mãos com uma chamada
+            pinch_lengths = np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 8, :2], axis=1)
+            # Pontas do polegar e do indicador em pixels inteiros, para o desenho
+            fingertips = hand_points[:, (4, 8), :2].astype(np.int32).tolist()
+
+        # Seleção que esperava o carregamento anterior terminar
+        if pending_song is not None and audio_engine_global and not audio_engine_global.is_loading():
+            cached_track = track_cache.get(pending_song)
+            if cached_track is not None:
+                audio_engine_global.set_track(cached_track.audio_data, crossfade_seconds=TRACK_CROSSFADE_S,
+                                              sample_rate=cached_track.sample_rate,
+                                              peak_pyramid=cached_track.peak_pyramid)
+            else:
+                audio_engine_global.load_track_async(pending_song,
+                                                     crossfade_seconds=TRACK_CROSSFADE_S,
+                                                     on_loaded=on_track_loaded,
+                                                     storage=AUDIO_STORAGE,
+                                                     pcm_cache=pcm_cache)
+            audio_file_path = pending_song
+            pending_song = None
 
         # ======= CONTROLE DE TECLAS =======
         key = cv2.waitKey(1) & 0xFF
@@ -211,23 +313,17 @@ if __name__ == '__main__':
 
         gesture_detected = False
         # Só checa o gesto se o cooldown tiver passado
-        if detected_hands_data and (currentTime - mode_toggle_cooldown > MODE_TOGGLE_COOLDOWN_TIME):
-            for hand_data in detected_hands_data: # Checa em CADA mão
-                landmarks = hand_data.get("landmarks")
-                
-                # Precisa de todos os 21 landmarks para checar o mindinho (índice 20)
-                if landmarks and len(landmarks) > 20: 
-                    x_thumb, y_thumb = landmarks[4][1], landmarks[4][2]
-                    x_pinky, y_pinky = landmarks[20][1], landmarks[20][2]
-
-                    length = math.hypot(x_pinky - x_thumb, y_pinky - y_thumb)
-
-                    if length < MODE_TOGGLE_THRESHOLD:
-                        # Feedback visual da troca de modo
-                        cv2.line(img, (x_thumb, y_thumb), (x_pinky, y_pinky), (255, 0, 255), 4)
-                        
-                        gesture_detected = True
-                        break # Encontrou o gesto, para o loop de mãos
+        if num_hands and (currentTime - mode_toggle_cooldown > MODE_TOGGLE_COOLDOWN_TIME):
+            # Distância polegar-mindinho de CADA mão com uma chamada
+            toggle_lengths = np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 20, :2], axis=1)
+            for hand_idx in range(num_hands):
+                if toggle_lengths[hand_idx] < MODE_TOGGLE_THRESHOLD:
+                    # Feedback visual da troca de modo
+                    (x_thumb, y_thumb), (x_pinky, y_pinky) = hand_points[hand_idx, (4, 20), :2].astype(np.int32).tolist()
+                    cv2.line(img, (x_thumb, y_thumb), (x_pinky, y_pinky), (255, 0, 255), 4)
+
+                    gesture_detected = True
+                    break # Encontrou o gesto, para o loop de mãos
 
         # Se o gesto foi detectado E o cooldown passou:
         if gesture_detected:
@@ -242,67 +338,19 @@ if __name__ == '__main__':
                 app_mode = 'playback'
                 print("Modo: Playback/Controle")
 
-        # --- Lógica de Modos ---
-        # (O seu 'if app_mode == 'selection':' começa logo abaixo)
-        font_face = cv2.FONT_HERSHEY_SIMPLEX
-
-        if app_mode == 'selection':
-            y_prev = LIST_Y_CENTER - LIST_ITEM_HEIGHT
-            y_curr = LIST_Y_CENTER
-            y_next = LIST_Y_CENTER + LIST_ITEM_HEIGHT
-
-            # Desenha "Anterior" (se existir)
-            if selected_song_index > 0:
-                prev_song_name = os.path.basename(music_files[selected_song_index - 1])
-                cv2.putText(img, prev_song_name, (LIST_X_START, y_prev), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
-                
-            # Desenha "Anterior" (se existir)
-            if selected_song_index > 1:
-                prev_song_name = os.path.basename(music_files[selected_song_index - 2])
-                cv2.putText(img, prev_song_name, (LIST_X_START, y_prev -25), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
-
-            # Desenha "Atual" (Sempre existe)
-            curr_song_name = os.path.basename(music_files[selected_song_index])
-            
-            # Decide a cor: Verde se for a que está tocando, Amarela se for só a selecionada
-            color_current = LIST_COLOR_PLAYING if selected_song_index == current_playing_index else LIST_COLOR_CURRENT
-            
-            # Adiciona indicadores de seleção
-            cv2.putText(img, f"> {curr_song_name} <", (LIST_X_START, y_curr), font_face, 
-                        LIST_FONT_SCALE_CURRENT, color_current, LIST_FONT_THICKNESS_CURRENT)
-
-            # Desenha "Próxima" (se existir)
-            if selected_song_index < len(music_files) - 1:
-                next_song_name = os.path.basename(music_files[selected_song_index + 1])
-                cv2.putText(img, next_song_name, (LIST_X_START, y_next), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
-                
-            if selected_song_index < len(music_files) - 2:
-                next_song_name = os.path.basename(music_files[selected_song_index + 2])
-                cv2.putText(img, next_song_name, (LIST_X_START, y_next + 25), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
-
         gesture_detected = False
         # Só checa o gesto se o cooldown tiver passado
-        if detected_hands_data and (currentTime - mode_toggle_cooldown > MODE_TOGGLE_COOLDOWN_TIME):
-            for hand_data in detected_hands_data: # Checa em CADA mão
-                landmarks = hand_data.get("landmarks")
-                
-                # Precisa de todos os 21 landmarks para checar o mindinho (índice 20)
-                if landmarks and len(landmarks) > 20: 
-                    x_thumb, y_thumb = landmarks[4][1], landmarks[4][2]
-                    x_pinky, y_pinky = landmarks[20][1], landmarks[20][2]
-
-                    length = math.hypot(x_pinky - x_thumb, y_pinky - y_thumb)
-
-                    if length < MODE_TOGGLE_THRESHOLD:
-                        # Feedback visual da troca de modo
-                        cv2.line(img, (x_thumb, y_thumb), (x_pinky, y_pinky), (255, 0, 255), 4)
-                        
-                        gesture_detected = True
-                        break # Encontrou o gesto, para o loop de mãos
+        if num_hands and (currentTime - mode_toggle_cooldown > MODE_TOGGLE_COOLDOWN_TIME):
+            # Distância polegar-mindinho de CADA mão com uma chamada
+            toggle_lengths = np.linalg.norm(hand_points[:, 4, :2] - hand_points[:, 20, :2], axis=1)
+            for hand_idx in range(num_hands):
+                if toggle_lengths[hand_idx] < MODE_TOGGLE_THRESHOLD:
+                    # Feedback visual da troca de modo
+                    (x_thumb, y_thumb), (x_pinky, y_pinky) = hand_points[hand_idx, (4, 20), :2].astype(np.int32).tolist()
+                    cv2.line(img, (x_thumb, y_thumb), (x_pinky, y_pinky), (255, 0, 255), 4)
+
+                    gesture_detected = True
+                    break # Encontrou o gesto, para o loop de mãos
 
         # Se o gesto foi detectado E o cooldown passou:
         if gesture_detected:
@@ -319,232 +367,200 @@ if __name__ == '__main__':
 
         # --- Lógica de Modos ---
         # (O seu 'if app_mode == 'selection':' começa logo abaixo)
-        font_face = cv2.FONT_HERSHEY_SIMPLEX
         
         if app_mode == 'selection':
             # --- MODO DE SELEÇÃO DE MÚSICA (Mão 1 = Scroll, Mão 2 = Click) ---
+
+            # Decodifica em segundo plano as vizinhas da seleção para a troca ser instantânea
+            if selected_song_index != prefetched_song_index:
+                track_prefetcher.prefetch_around(music_files, selected_song_index)
+                prefetched_song_index = selected_song_index
             
-            # 1. Desenhar a Lista (Anterior, Atual, Próxima)
-            # (Esta parte da UI não muda)
+            # 1. Desenhar a Lista (duas anteriores, atual, duas próximas)
+            # Os nomes vêm de music_display_names (calculados uma vez) e a lista inteira é
+            # uma camada de sprites em cache, refeita só quando a seleção muda
             y_prev = LIST_Y_CENTER - LIST_ITEM_HEIGHT
             y_curr = LIST_Y_CENTER
             y_next = LIST_Y_CENTER + LIST_ITEM_HEIGHT
 
+            list_items = []
+            if selected_song_index > 1:
+                list_items.append((music_display_names[selected_song_index - 2], (LIST_X_START, y_prev - 25),
+                                   LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT))
             if selected_song_index > 0:
-                prev_song_name = os.path.basename(music_files[selected_song_index - 1])
-                cv2.putText(img, prev_song_name, (LIST_X_START, y_prev), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
+                list_items.append((music_display_names[selected_song_index - 1], (LIST_X_START, y_prev),
+                                   LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT))
 
-            curr_song_name = os.path.basename(music_files[selected_song_index])
+            # Verde se for a que está tocando, amarela se for só a selecionada
             color_current = LIST_COLOR_PLAYING if selected_song_index == current_playing_index else LIST_COLOR_CURRENT
-            cv2.putText(img, f"> {curr_song_name} <", (LIST_X_START, y_curr), font_face, 
-                        LIST_FONT_SCALE_CURRENT, color_current, LIST_FONT_THICKNESS_CURRENT)
+            list_items.append((f"> {music_display_names[selected_song_index]} <", (LIST_X_START, y_curr),
+                               LIST_FONT_SCALE_CURRENT, color_current, LIST_FONT_THICKNESS_CURRENT))
 
             if selected_song_index < len(music_files) - 1:
-                next_song_name = os.path.basename(music_files[selected_song_index + 1])
-                cv2.putText(img, next_song_name, (LIST_X_START, y_next), font_face, 
-                            LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT)
+                list_items.append((music_display_names[selected_song_index + 1], (LIST_X_START, y_next),
+                                   LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT))
+            if selected_song_index < len(music_files) - 2:
+                list_items.append((music_display_names[selected_song_index + 2], (LIST_X_START, y_next + 25),
+                                   LIST_FONT_SCALE_PREV_NEXT, LIST_COLOR_PREV_NEXT, LIST_FONT_THICKNESS_PREV_NEXT))
+
+            list_panel.set_items(list_items)
+            list_panel.draw(img)
 
             # 2. Processar Gestos de Seleção
-            if detected_hands_data:
+            if num_hands:
                 # --- MÃO 1 (SCROLL) ---
                 # Assumimos que a primeira mão detectada (index 0) é a de scroll.
-                hand_1_data = detected_hands_data[0]
-                landmarks_1 = hand_1_data.get("landmarks")
-                
-                if landmarks_1 and len(landmarks_1) > 8:
-                    # Posição do indicador da Mão 1
-                    x_finger, y_finger = landmarks_1[8][1], landmarks_1[8][2] 
+                # Posição do indicador da Mão 1
+                x_finger, y_finger = fingertips[0][1]
 
-                    # Desenha o "cursor"
-                    cv2.circle(img, (x_finger, y_finger), 10, (0, 0, 255), cv2.FILLED) 
+                # Desenha o "cursor"
+                cv2.circle(img, (x_finger, y_finger), 10, (0, 0, 255), cv2.FILLED) 
 
-                    # --- Gesto de Navegação (Scroll Up/Down) ---
-                    if last_finger_y == 0: 
-                        last_finger_y = y_finger
+                # --- Gesto de Navegação (Scroll Up/Down) ---
+                if last_finger_y == 0: 
+                    last_finger_y = y_finger
                     
-                    y_delta = y_finger - last_finger_y 
+                y_delta = y_finger - last_finger_y 
 
-                    if currentTime - navigation_cooldown > NAVIGATION_COOLDOWN_TIME:
-                        if y_delta > NAVIGATION_Y_THRESHOLD: # Moveu para baixo
-                            if selected_song_index < len(music_files) - 1:
-                                selected_song_index += 1
-                                navigation_cooldown = currentTime
+                if currentTime - navigation_cooldown > NAVIGATION_COOLDOWN_TIME:
+                    if y_delta > NAVIGATION_Y_THRESHOLD: # Moveu para baixo
+                        if selected_song_index < len(music_files) - 1:
+                            selected_song_index += 1
+                            navigation_cooldown = currentTime
                         
-                        elif y_delta < -NAVIGATION_Y_THRESHOLD: # Moveu para cima
-                            if selected_song_index > 0:
-                                selected_song_index -= 1
-                                navigation_cooldown = currentTime
+                    elif y_delta < -NAVIGATION_Y_THRESHOLD: # Moveu para cima
+                        if selected_song_index > 0:
+                            selected_song_index -= 1
+                            navigation_cooldown = currentTime
                         
-                        if abs(y_delta) > NAVIGATION_Y_THRESHOLD:
-                            last_finger_y = y_finger 
+                    if abs(y_delta) > NAVIGATION_Y_THRESHOLD:
+                        last_finger_y = y_finger 
                     
-                    if abs(y_delta) < NAVIGATION_Y_THRESHOLD / 2:
-                         last_finger_y = y_finger
-
-                    # --- MÃO 2 (CLICK) ---
-                    # Verifica se a SEGUNDA mão existe e está fazendo o gesto de "pinch"
-                    if len(detected_hands_data) == 2:
-                        hand_2_data = detected_hands_data[1]
-                        landmarks_2 = hand_2_data.get("landmarks")
-
-                        if landmarks_2 and len(landmarks_2) > 8:
-                            # Coordenadas do Polegar (Mão 2)
-                            x_thumb2, y_thumb2 = landmarks_2[4][1], landmarks_2[4][2] 
-                            # Coordenadas do Indicador (Mão 2)
-                            x_finger2, y_finger2 = landmarks_2[8][1], landmarks_2[8][2] 
+                if abs(y_delta) < NAVIGATION_Y_THRESHOLD / 2:
+                     last_finger_y = y_finger
+
+                # --- MÃO 2 (CLICK) ---
+                # Verifica se a SEGUNDA mão existe e está fazendo o gesto de "pinch"
+                if num_hands == 2:
+                    # Coordenadas do Polegar e do Indicador (Mão 2)
+                    (x_thumb2, y_thumb2), (x_finger2, y_finger2) = fingertips[1]
                             
-                            # Desenha o gesto de clique (bom para debug)
-                            cv2.line(img, (x_thumb2, y_thumb2), (x_finger2, y_finger2), (0, 255, 0), 3)
+                    # Desenha o gesto de clique (bom para debug)
+                    cv2.line(img, (x_thumb2, y_thumb2), (x_finger2, y_finger2), (0, 255, 0), 3)
                             
-                            length = math.hypot(x_finger2 - x_thumb2, y_finger2 - y_thumb2)
+                    length = pinch_lengths[1]
 
-                            # --- Gesto de "Selecionar" (Pinch na Mão 2) ---
-                            if length < PINCH_THRESHOLD and (currentTime - selection_cooldown > SELECTION_COOLDOWN_TIME):
+                    # --- Gesto de "Selecionar" (Pinch na Mão 2) ---
+                    if length < PINCH_THRESHOLD and (currentTime - selection_cooldown > SELECTION_COOLDOWN_TIME):
                                 
-                                # Evita recarregar a música que já está tocando
-                                if selected_song_index == current_playing_index:
-                                    print("Música já está tocando. Voltando ao modo playback.")
-                                    app_mode = 'playback'
-                                    selection_cooldown = currentTime
-                                else:
-                                    selection_cooldown = currentTime # Ativa o cooldown
-                                    
-                                    # --- AÇÃO: TROCAR MÚSICA ---
-                                    song_to_load = music_files[selected_song_index]
-                                    print(f"Selecionado: {song_to_load}")
-
-                                    if playback_stream:
-                                        playback_stream.stop()
-                                        playback_stream.close()
-                                        print("Stream de áudio anterior parado.")
-                                    
-                                    audio_loaded = audio_controller.load_audio(song_to_load)
+                        # Evita recarregar a música que já está tocando
+                        if selected_song_index == current_playing_index:
+                            print("Música já está tocando. Voltando ao modo playback.")
+                            app_mode = 'playback'
+                            selection_cooldown = currentTime
+                        else:
+                            selection_cooldown = currentTime # Ativa o cooldown
                                     
-                                    if audio_loaded:
-                                        audio_data_global = audio_controller.audio_data
-                                        sample_rate_global = audio_controller.sample_rate
-                                        current_playback_frame = 0
-                                        playback_active = True
-                                        audio_file_path = song_to_load 
-                                        current_playing_index = selected_song_index 
-                                        
-                                        try:
-                                            sd.default.channels = audio_controller.num_channels
-                                            playback_stream = sd.OutputStream(
-                                                samplerate=sample_rate_global, channels=audio_controller.num_channels,
-                                                callback=audio_playback_callback, dtype=audio_controller.audio_data.dtype,
-                                                blocksize=1024 
-                                            )
-                                            playback_stream.start()
-                                            print(f"Novo stream iniciado para {os.path.basename(song_to_load)}")
-                                            app_mode = 'playback' 
-                                        except Exception as e:
-                                            print(f"Falha ao trocar de música: {e}")
-                                            playback_active = False
-                                    else:
-                                        print(f"Falha ao carregar {song_to_load}")
+                            # --- AÇÃO: TROCAR MÚSICA ---
+                            # A faixa é decodificada em segundo plano e entra no mesmo stream,
+                            # na fronteira de um bloco, com crossfade. O loop da câmera não para.
+                            song_to_load = music_files[selected_song_index]
+                            print(f"Selecionado: {song_to_load}")
+
+                            cached_track = track_cache.get(song_to_load)
+                            if audio_engine_global and cached_track is not None:
+                                # Já decodificada pelo prefetch: troca imediata
+                                audio_engine_global.set_track(cached_track.audio_data, crossfade_seconds=TRACK_CROSSFADE_S,
+                                                              sample_rate=cached_track.sample_rate,
+                                                              peak_pyramid=cached_track.peak_pyramid)
+                                audio_file_path = song_to_load
+                                current_playing_index = selected_song_index
+                                app_mode = 'playback'
+                                pending_song = None
+                            elif audio_engine_global and audio_engine_global.is_loading():
+                                # Outra faixa ainda está carregando: a seleção fica na fila e entra ao terminar
+                                pending_song = song_to_load
+                                print(f"Aguardando o carregamento atual; '{os.path.basename(song_to_load)}' entra em seguida.")
+                                current_playing_index = selected_song_index
+                                app_mode = 'playback'
+                            elif audio_engine_global:
+                                audio_engine_global.load_track_async(song_to_load,
+                                                                     crossfade_seconds=TRACK_CROSSFADE_S,
+                                                                     on_loaded=on_track_loaded,
+                                                                     storage=AUDIO_STORAGE,
+                                                                     pcm_cache=pcm_cache)
+                                audio_file_path = song_to_load
+                                current_playing_index = selected_song_index
+                                app_mode = 'playback'
             
-            elif not detected_hands_data:
+            elif not num_hands:
                 # Se nenhuma mão for detectada, reseta a posição Y de referência
                 last_finger_y = 0
 
         elif app_mode == 'playback':
-            if detected_hands_data:
-                if len(detected_hands_data) == 1:
+            if num_hands:
+                if num_hands == 1:
                     # --- LÓGICA DE VOLUME COM UMA MÃO ---
-                    hand_data = detected_hands_data[0]
-                    landmarks = hand_data.get("landmarks")
-                    if landmarks and len(landmarks) > 8:
-                        x1, y1 = landmarks[4][1], landmarks[4][2] # Polegar
-                        x2, y2 = landmarks[8][1], landmarks[8][2] # Indicador
-                        cv2.circle(img, (x1, y1), 10, (120, 255, 0), cv2.FILLED)
-                        cv2.circle(img, (x2, y2), 10, (0, 120, 255), cv2.FILLED)
-                        cv2.line(img, (x1, y1), (x2, y2), (200, 200, 200), 2)
-                        length_one_hand = math.hypot(x2 - x1, y2 - y1)
+                    (x1, y1), (x2, y2) = fingertips[0] # Polegar, Indicador
+                    cv2.circle(img, (x1, y1), 10, (120, 255, 0), cv2.FILLED)
+                    cv2.circle(img, (x2, y2), 10, (0, 120, 255), cv2.FILLED)
+                    cv2.line(img, (x1, y1), (x2, y2), (200, 200, 200), 2)
+                    length_one_hand = pinch_lengths[0]
                         
-                        if volume_controller.volume: 
-                            volume_percentage_display = volume_controller.set_volume_percentage(
-                                length_one_hand, VOL_DIST_MIN_ONE_HAND, VOL_DIST_MAX_ONE_HAND
-                            )
-                        if length_one_hand < VOL_DIST_MIN_ONE_HAND:
-                            cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                    if volume_controller.volume: 
+                        volume_percentage_display = volume_controller.get_volume_percentage(length_one_hand, VOL_DIST_MIN_ONE_HAND, VOL_DIST_MAX_ONE_HAND)
+                        control_rate.submit("volume", volume_percentage_display)
+                    if length_one_hand < VOL_DIST_MIN_ONE_HAND:
+                        cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
                     
-                elif len(detected_hands_data) == 2:
+                elif num_hands == 2:
                     # --- LÓGICA DE VOLUME COM DUAS MÃOS E WAVEFORM ---
-                    landmarks1 = detected_hands_data[0].get("landmarks") 
-                    landmarks2 = detected_hands_data[1].get("landmarks") 
-                    
-                    if (landmarks1 and len(landmarks1) > 8) and (landmarks2 and len(landmarks2) > 8):
-                        h1_thumb_x, h1_thumb_y = landmarks1[4][1], landmarks1[4][2]
-                        h1_index_x, h1_index_y = landmarks1[8][1], landmarks1[8][2]
-                        h1cx_vol = (h1_thumb_x + h1_index_x) // 2 
-                        h1cy_vol = (h1_thumb_y + h1_index_y) // 2
-
-                        h2_thumb_x, h2_thumb_y = landmarks2[4][1], landmarks2[4][2]
-                        h2_index_x, h2_index_y = landmarks2[8][1], landmarks2[8][2]
-                        h2cx_vol = (h2_thumb_x + h2_index_x) // 2
-                        h2cy_vol = (h2_thumb_y + h2_index_y) // 2
-
-                        # --- LÓGICA DE VOLUME COM DUAS MÃOS ---
-                        length_volume_two_hands = math.hypot(h2cx_vol - h1cx_vol, h2cy_vol - h1cy_vol)
-                        if volume_controller.volume:
-                            volume_percentage_display = volume_controller.set_volume_percentage(length_volume_two_hands, VOL_DIST_MIN_TWO_HANDS, VOL_DIST_MAX_TWO_HANDS)
+                    (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y) = fingertips[0]
+                    h1cx_vol = (h1_thumb_x + h1_index_x) // 2 
+                    h1cy_vol = (h1_thumb_y + h1_index_y) // 2
+
+                    (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y) = fingertips[1]
+                    h2cx_vol = (h2_thumb_x + h2_index_x) // 2
+                    h2cy_vol = (h2_thumb_y + h2_index_y) // 2
+
+                    # --- LÓGICA DE VOLUME COM DUAS MÃOS ---
+                    length_volume_two_hands = math.hypot(h2cx_vol - h1cx_vol, h2cy_vol - h1cy_vol)
+                    if volume_controller.volume:
+                        volume_percentage_display = volume_controller.get_volume_percentage(length_volume_two_hands, VOL_DIST_MIN_TWO_HANDS, VOL_DIST_MAX_TWO_HANDS)
+                        control_rate.submit("volume", volume_percentage_display)
                         
-                        if length_volume_two_hands < VOL_DIST_MIN_TWO_HANDS:
-                            cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (0, 255, 255), 2) # Linha de feedback
+                    if length_volume_two_hands < VOL_DIST_MIN_TWO_HANDS:
+                        cv2.line(img, (h1cx_vol, h1cy_vol), (h2cx_vol, h2cy_vol), (0, 255, 255), 2) # Linha de feedback
 
-                        # --- DESENHAR A FORMA DE ONDA DINAMICAMENTE ENTRE AS MÃOS ---
-                        if audio_loaded_successfully and playback_active and audio_data_global is not None and sample_rate_global > 0 and audio_controller.num_channels is not None:
+                    # --- DESENHAR A FORMA DE ONDA DINAMICAMENTE ENTRE AS MÃOS ---
+                    # A faixa tocada pode ter sido trocada em segundo plano pelo AudioEngine: usa os picos dela
+                    peak_pyramid = audio_engine_global.get_peak_pyramid() if audio_engine_global else None
+                    if audio_loaded_successfully and playback_active and peak_pyramid is not None:
                             
-                            wave_x_start = min(h1cx_vol, h2cx_vol)
-                            wave_x_end = max(h1cx_vol, h2cx_vol)
-                            dynamic_waveform_width_px = wave_x_end - wave_x_start
+                        wave_x_start = min(h1cx_vol, h2cx_vol)
+                        wave_x_end = max(h1cx_vol, h2cx_vol)
+                        dynamic_waveform_width_px = wave_x_end - wave_x_start
                             
-                            dynamic_y_center = (h1cy_vol + h2cy_vol) // 2
+                        dynamic_y_center = (h1cy_vol + h2cy_vol) // 2
                             
-                            if dynamic_waveform_width_px > 10: # Só desenha se houver largura mínima
-                                window_samples = int(WAVEFORM_WINDOW_DURATION_S * sample_rate_global)
-                                center_offset_audio = window_samples // 2
-                                start_sample_abs_audio = current_playback_frame - center_offset_audio
+                        if dynamic_waveform_width_px > 10: # Só desenha se houver largura mínima
+                            current_playback_frame = audio_engine_global.get_playback_frame()
+                            # Janela na taxa da faixa tocada (não na da primeira faixa carregada)
+                            window_samples = int(WAVEFORM_WINDOW_DURATION_S * peak_pyramid.sample_rate)
+                            center_offset_audio = window_samples // 2
+                            start_sample_abs_audio = current_playback_frame - center_offset_audio
                                 
-                                audio_segment_shape = (window_samples, audio_data_global.shape[1]) if audio_data_global.ndim > 1 else (window_samples,)
-                                audio_segment_raw = np.zeros(audio_segment_shape, dtype=audio_data_global.dtype)
+                            # Um min/max por pixel, direto do nível certo da pirâmide (volta ao início no loop)
+                            column_mins, column_maxs = peak_pyramid.get_bins(start_sample_abs_audio, window_samples, dynamic_waveform_width_px)
 
-                                for i in range(window_samples):
-                                    sample_to_get = (start_sample_abs_audio + i) % len(audio_data_global)
-                                    audio_segment_raw[i] = audio_data_global[sample_to_get]
-                                
-                                if audio_controller.num_channels > 1:
-                                    waveform_display_data = np.mean(audio_segment_raw, axis=1)
-                                else:
-                                    waveform_display_data = audio_segment_raw
-
-                                samples_per_pixel_dynamic = len(waveform_display_data) / dynamic_waveform_width_px
-
-                                for x_local in range(dynamic_waveform_width_px):
-                                    s_start = int(x_local * samples_per_pixel_dynamic)
-                                    s_end = int((x_local + 1) * samples_per_pixel_dynamic)
-                                    s_end = min(s_end, len(waveform_display_data))
-
-                                    if s_start < s_end:
-                                        sample_slice = waveform_display_data[s_start:s_end]
-                                        min_val, max_val = np.min(sample_slice), np.max(sample_slice)
-                                        
-                                        y_draw_min = int(dynamic_y_center - max_val * (WAVEFORM_HEIGHT_PX / 2))
-                                        y_draw_max = int(dynamic_y_center - min_val * (WAVEFORM_HEIGHT_PX / 2))
-                                        
-                                        draw_x_coord = wave_x_start + x_local
-                                        cv2.line(img, (draw_x_coord, y_draw_min), 
-                                                    (draw_x_coord, y_draw_max), 
-                                                    WAVEFORM_COLOR, WAVEFORM_LINE_THICKNESS)
-                                # Linha central dinâmica
-                                cv2.line(img, (wave_x_start, dynamic_y_center), 
-                                            (wave_x_end, dynamic_y_center), 
-                                            WAVEFORM_CENTER_LINE_COLOR, 1)
+                            # Todas as colunas (e a linha central) em uma chamada ao OpenCV
+                            waveform_renderer.draw(img, wave_x_start, dynamic_y_center, column_mins, column_maxs)
                         
-                        cv2.line(img, (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y), (255, 0, 0), 3) 
-                        cv2.line(img, (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y), (255, 165, 0), 3) 
+                    cv2.line(img, (h1_thumb_x, h1_thumb_y), (h1_index_x, h1_index_y), (255, 0, 0), 3) 
+                    cv2.line(img, (h2_thumb_x, h2_thumb_y), (h2_index_x, h2_index_y), (255, 165, 0), 3) 
+
+        # Valores que ficaram pendentes pela taxa máxima (o último de cada gesto sempre chega ao sink)
+        control_rate.flush()
 
         # --- EXIBIÇÕES DE TEXTO NA TELA ---
         currentTime = time.time()
@@ -552,11 +568,35 @@ if __name__ == '__main__':
         fps = 1 / deltaTime if deltaTime > 0 else 0
         previousTime = currentTime
         
-        font_face = cv2.FONT_HERSHEY_SIMPLEX; font_scale = 0.7; font_thickness = 1
+        font_scale = 0.7; font_thickness = 1
         text_y_start = 200; text_y_offset = 30
 
-        cv2.putText(img,f"FPS: {int(fps)}",(30, text_y_start),font_face,font_scale,(0,255,0),font_thickness)
-        cv2.putText(img,f"Vol: {int(volume_percentage_display)}%",(30, text_y_start+ text_y_offset),font_face,font_scale,(255,100,100),font_thickness)
+        # FPS médio atualizado a cada HUD_FPS_REFRESH_S (o texto do HUD só muda quando algum valor muda)
+        hud_frames += 1
+        if currentTime - hud_fps_time >= HUD_FPS_REFRESH_S:
+            hud_fps = hud_frames / (currentTime - hud_fps_time)
+            hud_frames = 0; hud_fps_time = currentTime
+
+        hud_items = [(f"FPS: {int(hud_fps)}",(30, text_y_start),font_scale,(0,255,0),font_thickness),
+                     (f"Vol: {int(volume_percentage_display)}%",(30, text_y_start+ text_y_offset),font_scale,(255,100,100),font_thickness)]
+
+        if spectrum_analyser:
+            # Último espectro completo publicado pela thread do analisador (não espera a FFT)
+            spectrum_analyser.read_into(spectrum_levels)
+            spectrum_renderer.draw(img, 30, img.shape[0] - SPECTRUM_HEIGHT_PX - 30, SPECTRUM_WIDTH_PX, SPECTRUM_HEIGHT_PX, spectrum_levels)
+
+        if audio_engine_global:
+            # Métricas lidas da thread da interface; o callback só grava em arrays pré-alocados
+            audio_metrics = audio_engine_global.get_metrics()
+            audio_xruns = audio_metrics["output_underflows"] + audio_metrics["ring_underflows"]
+            audio_hud_text = f"Audio: {audio_metrics['render']['worst_utilisation']*100:.0f}% bloco, xruns: {audio_xruns}"
+            if "spectrum" in audio_metrics:
+                audio_hud_text += f", FFT p99: {audio_metrics['spectrum']['p99_us']:.0f} us"
+            hud_items.append((audio_hud_text,(30, text_y_start+2*text_y_offset),font_scale,(200,200,200),font_thickness))
+
+        # Sprites de texto em cache, compostos em uma camada; só os itens cujo texto mudou são refeitos
+        hud_panel.set_items(hud_items)
+        hud_panel.draw(img)
 
         # Print no console removido para evitar poluição.
         
@@ -568,5 +608,14 @@ if __name__ == '__main__':
     # --- FINALIZAÇÃO ---
     print("Encerrando...")
     if playback_stream: print("Parando áudio..."); playback_stream.stop(); playback_stream.close(); print("Áudio parado.")
+    if spectrum_analyser: spectrum_analyser.stop()
+    if audio_engine_global: audio_engine_global.stop()
+    if audio_engine_global: print(f"Métricas de áudio: {audio_engine_global.get_metrics()}")
+    track_prefetcher.stop()
+    print(f"Cache de faixas: {track_cache.get_stats()}")
+    print(f"Cache de PCM em disco: {pcm_cache.get_stats()}")
+    print(f"Captura da câmera: {capture.get_stats()}")
+    print(f"Detecção das mãos: {detector.get_stats()}")
+    print(f"Camada de controle: {control_rate.get_stats()}")
     if capture.isOpened(): capture.release()
     cv2.destroyAllWindows(); print("Recursos liberados.")
\ No newline at end of file
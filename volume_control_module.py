@@ -26,18 +26,34 @@ class SystemVolumeControl:
         """Permite definir um valor máximo de dB personalizado."""
         self.target_max_db_override = max_db_value
         
-    def set_volume_percentage(self, lenght: float, HAND_DIST_MIN: int, HAND_DIST_MAX: int):
+    def set_volume_level(self, percentage: float):
+        """
+        Aplica um volume de 0 a 100% (mapeado linearmente em dB até o máximo configurado).
+        É a única chamada COM; use com o ControlRateLimiter para não chamá-la a cada quadro.
+        """
         if self.volume is None:
             print("Controle de volume não inicializado")
-            return 0.0
-            
+            return
+
         current_max_db = self.target_max_db_override if self.target_max_db_override is not None else self.max_db 
-        
-        vol_db = np.interp(lenght, [HAND_DIST_MIN, HAND_DIST_MAX], [self.min_db, current_max_db])
+        percentage = min(max(percentage, 0.0), 100.0)
+        vol_db = self.min_db + (current_max_db - self.min_db) * percentage / 100.0
 
         try:
             self.volume.SetMasterVolumeLevel(vol_db, None)
         except Exception as e:
                 print(f"Erro ao definir o volume: {e}")
 
-        return np.interp(lenght, [HAND_DIST_MIN, HAND_DIST_MAX], [0, 100])
\ No newline at end of file
+    def get_volume_percentage(self, lenght: float, HAND_DIST_MIN: int, HAND_DIST_MAX: int):
+        """ Converte a distância do gesto em porcentagem de volume (0 a 100), sem tocar no sistema. """
+        return float(np.interp(lenght, [HAND_DIST_MIN, HAND_DIST_MAX], [0, 100]))
+
+    def set_volume_percentage(self, lenght: float, HAND_DIST_MIN: int, HAND_DIST_MAX: int):
+        if self.volume is None:
+            print("Controle de volume não inicializado")
+            return 0.0
+
+        # Uma interpolação só: o dB é linear na porcentagem, como na interpolação direta da distância
+        percentage = self.get_volume_percentage(lenght, HAND_DIST_MIN, HAND_DIST_MAX)
+        self.set_volume_level(percentage)
+        return percentage
\ No newline at end of file
@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+
+class WaveformRenderer:
+    def __init__(self,
+                 height_px: int,
+                 color = (255, 255, 255),
+                 thickness: int = 1,
+                 center_line_color = (255, 255, 255),
+                 method: str = 'polylines'):
+        """
+        Desenha a waveform min/max (uma coluna vertical por pixel) com uma única
+        chamada ao OpenCV por quadro, em vez de um cv2.line por coluna.
+
+        Os extremos das colunas são calculados como arrays NumPy em buffers
+        reutilizados; o custo em Python não depende da largura da waveform.
+
+        Args:
+            height_px (int): Altura total da waveform (amplitude 1.0 = metade da altura).
+            color (tuple): Cor BGR das colunas.
+            thickness (int): Espessura das colunas (só no método 'polylines').
+            center_line_color (tuple): Cor BGR da linha central (None para não desenhar).
+            method (str): 'polylines' (todas as colunas em um cv2.polylines) ou
+                          'mask' (escrita direta dos pixels das colunas no quadro).
+        """
+        if method not in ('polylines', 'mask'):
+            raise ValueError(f"Método de desenho desconhecido: '{method}'. Use 'polylines' ou 'mask'.")
+
+        self.height_px = height_px
+        self.color = color
+        self.thickness = thickness
+        self.center_line_color = center_line_color
+        self.method = method
+
+        self._capacity = 0
+        self._ensure_buffers(256)
+        self._rows = np.zeros((0, 1), dtype=np.int32) # Índices de linha do quadro (método 'mask')
+
+    def _ensure_buffers(self, width_px):
+        """ (Re)aloca os buffers só quando a waveform fica mais larga que a maior já desenhada. """
+        if width_px <= self._capacity:
+            return
+
+        self._capacity = max(width_px, 2 * self._capacity)
+        self._y_scaled = np.zeros(self._capacity, dtype=np.float32)
+        # Um segmento vertical por coluna: [[x, y_topo], [x, y_base]]
+        self._segments = np.zeros((self._capacity, 2, 2), dtype=np.int32)
+        self._x_offsets = np.arange(self._capacity, dtype=np.int32)
+
+    def draw(self, img, x_start, y_center, column_mins, column_maxs):
+        """
+        Desenha as colunas [min, max] a partir de x_start, centradas em y_center.
+
+        Args:
+            img (np.ndarray): Quadro BGR (desenhado no lugar).
+            x_start (int): Coluna da imagem do primeiro bin.
+            y_center (int): Linha central da waveform.
+            column_mins (np.ndarray): Mínimo de cada coluna (float, -1.0 a 1.0).
+            column_maxs (np.ndarray): Máximo de cada coluna.
+        """
+        width_px = len(column_mins)
+        if width_px == 0:
+            return
+
+        self._ensure_buffers(width_px)
+        half_height = self.height_px / 2
+        segments = self._segments[:width_px]
+
+        # y = int(centro - valor * meia altura), como no desenho coluna a coluna
+        y_scaled = self._y_scaled[:width_px]
+        np.multiply(column_maxs, -half_height, out=y_scaled)
+        y_scaled += y_center
+        np.copyto(segments[:, 0, 1], y_scaled, casting='unsafe')
+        np.multiply(column_mins, -half_height, out=y_scaled)
+        y_scaled += y_center
+        np.copyto(segments[:, 1, 1], y_scaled, casting='unsafe')
+
+        if self.method == 'polylines':
+            np.add(self._x_offsets[:width_px], x_start, out=segments[:, 0, 0])
+            segments[:, 1, 0] = segments[:, 0, 0]
+            cv2.polylines(img, segments, False, self.color, self.thickness)
+        else:
+            self._draw_mask(img, x_start, segments)
+
+        if self.center_line_color is not None:
+            cv2.line(img, (x_start, y_center), (x_start + width_px, y_center), self.center_line_color, 1)
+
+    def _draw_mask(self, img, x_start, segments):
+        img_height, img_width = img.shape[:2]
+        if len(self._rows) < img_height:
+            self._rows = np.arange(img_height, dtype=np.int32)[:, np.newaxis]
+        y_top = segments[:, 0, 1]
+        y_bottom = segments[:, 1, 1]
+
+        # Recorte (ROI) que contém todas as colunas, limitado ao quadro
+        roi_x0 = max(x_start, 0)
+        roi_x1 = min(x_start + len(segments), img_width)
+        roi_y0 = max(int(y_top.min()), 0)
+        roi_y1 = min(int(y_bottom.max()) + 1, img_height)
+        if roi_x0 >= roi_x1 or roi_y0 >= roi_y1:
+            return
+
+        column_slice = slice(roi_x0 - x_start, roi_x1 - x_start)
+        rows = self._rows[roi_y0:roi_y1]
+        mask = (rows >= y_top[column_slice]) & (rows <= y_bottom[column_slice])
+        img[roi_y0:roi_y1, roi_x0:roi_x1][mask] = self.color
+
+class SpectrumRenderer:
+    def __init__(self, num_bands: int, color = (0, 200, 255), baseline_color = (255, 255, 255)):
+        """
+        Desenha os níveis do SpectrumAnalyser como barras verticais, todas em um único cv2.polylines.
+
+        Args:
+            num_bands (int): Número de barras (SpectrumAnalyser.num_bands).
+            color (tuple): Cor BGR das barras.
+            baseline_color (tuple): Cor BGR da linha de base (None para não desenhar).
+        """
+        self.num_bands = num_bands
+        self.color = color
+        self.baseline_color = baseline_color
+        self._y_scaled = np.zeros(num_bands, dtype=np.float32)
+        # Um segmento por banda: [[x, base], [x, topo]]
+        self._segments = np.zeros((num_bands, 2, 2), dtype=np.int32)
+        self._band_offsets = np.arange(num_bands, dtype=np.float32)
+
+    def draw(self, img, x, y, width, height, levels):
+        """
+        Desenha as barras no retângulo (x, y, width, height); 'levels' vai de 0.0 (base) a 1.0 (topo).
+        """
+        bar_step = width / self.num_bands
+        bar_thickness = max(int(bar_step) - 1, 1)
+        segments = self._segments
+        y_base = y + height
+
+        # x do centro de cada barra
+        np.multiply(self._band_offsets, bar_step, out=self._y_scaled)
+        self._y_scaled += x + bar_step / 2
+        np.copyto(segments[:, 0, 0], self._y_scaled, casting='unsafe')
+        segments[:, 1, 0] = segments[:, 0, 0]
+
+        segments[:, 0, 1] = y_base
+        np.multiply(levels, -height, out=self._y_scaled)
+        self._y_scaled += y_base
+        np.copyto(segments[:, 1, 1], self._y_scaled, casting='unsafe')
+
+        cv2.polylines(img, segments, False, self.color, bar_thickness)
+        if self.baseline_color is not None:
+            cv2.line(img, (x, y_base), (x + width, y_base), self.baseline_color, 1)